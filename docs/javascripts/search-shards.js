@@ -0,0 +1,161 @@
+// Sharded search: answers queries from search/shards/ (written by site_tools/search_shards.py).
+// Loads the manifest on the first search, then only the term shards and document chunks a
+// query needs. Stays inactive when the site has no shards (e.g. mkdocs serve), so the theme's
+// own search keeps working.
+(function() {
+  const base = new URL('../', document.currentScript.src);
+  const shardsDir = new URL('search/shards/', base);
+  const files = new Map();
+  let manifest;
+
+  function fetchJSON(name) {
+    if (!files.has(name)) {
+      files.set(name, fetch(new URL(name, shardsDir)).then(r => {
+        if (!r.ok) throw new Error(r.status + ' ' + name);
+        return r.json();
+      }));
+    }
+    return files.get(name);
+  }
+
+  function loadManifest() {
+    if (!manifest) {
+      manifest = fetchJSON('manifest.json').then(m => {
+        m.separatorRE = new RegExp(m.separator);
+        m.stop = new Set(m.stopwords);
+        return m;
+      });
+    }
+    return manifest;
+  }
+
+  // Drops tags and decodes entities (&lt; &amp; ...) like html.unescape(); a textarea parses its
+  // content as text, so nothing in it becomes an element
+  const decoder = document.createElement('textarea');
+  function plainText(text) {
+    if (!/[<&]/.test(text)) return text;
+    decoder.innerHTML = text.replace(/<[^>]*>/g, ' ');
+    return decoder.value;
+  }
+
+  // Same steps as search_shards.tokenize()
+  function tokenize(text, m) {
+    return plainText(text).toLowerCase().normalize('NFKD').replace(/[\u0300-\u036f]/g, '')
+      .split(m.separatorRE)
+      .map(t => t.replace(/^[^\p{L}\p{N}_]+|[^\p{L}\p{N}_]+$/gu, ''))
+      .filter(t => t.length >= m.prefix_len && !m.stop.has(t));
+  }
+
+  // doc → best score of the indexed terms starting with term (exact matches count double)
+  async function termScores(term, m) {
+    const scores = new Map();
+    const name = m.shards[term.slice(0, m.prefix_len)];
+    if (!name) return scores;
+    const shard = await fetchJSON(name);
+    for (const [t, list] of Object.entries(shard)) {
+      if (!t.startsWith(term)) continue;
+      const weight = t === term ? 2 : 1;
+      for (let i = 0; i < list.length; i += 2) {
+        const score = list[i + 1] * weight;
+        if (score > (scores.get(list[i]) || 0)) scores.set(list[i], score);
+      }
+    }
+    return scores;
+  }
+
+  async function search(query, limit = 20) {
+    const m = await loadManifest();
+    if (query.trim().length < m.min_search_length) return [];
+    const terms = [...new Set(tokenize(query, m))];
+    if (!terms.length) return [];
+    const perTerm = await Promise.all(terms.map(t => termScores(t, m)));
+    // Every term must match
+    let hits = perTerm[0];
+    for (const next of perTerm.slice(1)) {
+      const both = new Map();
+      for (const [doc, score] of hits) {
+        if (next.has(doc)) both.set(doc, score + next.get(doc));
+      }
+      hits = both;
+    }
+    const top = [...hits].sort((a, b) => b[1] - a[1]).slice(0, limit);
+    const chunks = await Promise.all(
+      [...new Set(top.map(([doc]) => Math.floor(doc / m.docs_chunk)))]
+        .map(c => fetchJSON(m.docs[c]).then(rows => [c, rows])));
+    const rows = new Map(chunks);
+    return top.map(([doc, score]) => {
+      const [location, title, page] = rows.get(Math.floor(doc / m.docs_chunk))[doc % m.docs_chunk];
+      return { url: new URL(location, base).href, title, page, score };
+    });
+  }
+
+  window.shardSearch = { search };
+
+  // Material for MkDocs: render into the search dialog instead of the theme's (emptied) index
+  function bind() {
+    const input = document.querySelector('[data-md-component="search-query"]');
+    const result = document.querySelector('[data-md-component="search-result"]');
+    if (!input || !result || input.dataset.shardSearch) return;
+    input.dataset.shardSearch = 'bound';
+    const meta = document.createElement('div');
+    meta.className = 'md-search-result__meta shard-search';
+    const list = document.createElement('ol');
+    list.className = 'md-search-result__list shard-search';
+    const style = document.createElement('style');
+    style.textContent = '.shard-search-active > :not(.shard-search) { display: none; }';
+    document.head.appendChild(style);
+    let timer;
+    let seq = 0;
+
+    async function update() {
+      const query = input.value;
+      const mine = ++seq;
+      let hits;
+      try {
+        hits = await search(query);
+      } catch (e) {
+        return;  // no shards on this site: leave the theme's search alone
+      }
+      if (mine !== seq) return;  // a newer query is running
+      if (!result.contains(list)) result.append(meta, list);
+      result.classList.add('shard-search-active');
+      meta.textContent = !query.trim() ? 'Type to start searching'
+        : hits.length ? hits.length + (hits.length === 1 ? ' matching document' : ' matching documents')
+        : 'No matching documents';
+      list.replaceChildren(...hits.map(hit => {
+        const item = document.createElement('li');
+        item.className = 'md-search-result__item';
+        const link = document.createElement('a');
+        link.className = 'md-search-result__link';
+        link.href = hit.url;
+        link.tabIndex = -1;
+        const article = document.createElement('article');
+        article.className = 'md-search-result__article md-typeset';
+        const heading = document.createElement('h1');
+        heading.textContent = hit.title;
+        article.appendChild(heading);
+        if (hit.page) {
+          const page = document.createElement('p');
+          page.textContent = hit.page;
+          article.appendChild(page);
+        }
+        link.appendChild(article);
+        item.appendChild(link);
+        return item;
+      }));
+    }
+
+    input.addEventListener('input', () => {
+      clearTimeout(timer);
+      timer = setTimeout(update, 100);
+    });
+  }
+
+  if (typeof document$ !== 'undefined') {
+    document$.subscribe(bind);  // instant navigation: re-bind if the header was replaced
+  } else if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', bind);
+  } else {
+    bind();
+  }
+})();
@@ -0,0 +1,284 @@
+"""
+backups.py — One compressed backup archive per run for the site_tools scripts (--backup / --restore).
+
+With --backup, the original of every file a run modifies goes into a single
+archive, <backup-dir>/<run-id>.tar.gz (default: .site_tools_cache/backups/),
+instead of a .bak file next to it:
+
+- objects/<sha256>  the original bytes, stored once per distinct content
+- manifest.json     run id, tool, time and one {path, sha256, bytes, mode} entry per file
+
+Pool workers (--jobs) send the originals back with each result and the parent
+appends them to the archive, so a run does one sequential archive write instead
+of one small file per modified Markdown file. The archive is written as
+<run-id>.tar.gz.partial and renamed when the run ends; an interrupted run keeps
+the .partial file with the originals stored so far.
+
+The run id is printed at the end of the run. --restore <run-id> (or "latest")
+writes every original back through a temp file and an atomic replace; files
+that already hold the original are left alone. Paths are stored relative to the
+folder the run was started from and restored relative to it (or to the current
+folder if it no longer exists).
+"""
+
+from __future__ import annotations
+import argparse
+import datetime
+import io
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+from mdcache import CACHE_DIR, content_hash, file_hash
+
+# tarfile is imported where it is used: most runs (and precommit.py) never back anything up
+if TYPE_CHECKING:
+    import tarfile
+
+BACKUP_DIR = f"{CACHE_DIR}/backups"
+ARCHIVE_SUFFIX = ".tar.gz"
+MANIFEST = "manifest.json"
+ARCHIVE_VERSION = 1
+
+# Original of one file as sent back from a pool worker: (path, bytes, mode)
+Stashed = Tuple[str, bytes, int]
+
+_archive: Optional["BackupArchive"] = None
+_collecting = False
+_pending: List[Stashed] = []
+
+class BackupSummary(NamedTuple):
+    run_id: str
+    path: pathlib.Path
+    files: int
+    objects: int
+    bytes: int
+
+def add_backup_arguments(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--backup", action="store_true",
+                    help="Store the originals of modified files in one archive per run (in --backup-dir)")
+    ap.add_argument("--restore", metavar="RUN_ID", default=None,
+                    help="Write back the originals stored by the --backup run RUN_ID (or 'latest') and exit")
+    ap.add_argument("--backup-dir", default=BACKUP_DIR, metavar="DIR",
+                    help=f"Folder for the backup archives (default: {BACKUP_DIR})")
+
+def _stored_path(path: pathlib.Path) -> str:
+    try:
+        return pathlib.Path(os.path.relpath(path)).as_posix()
+    except ValueError:
+        # Another drive on Windows: keep it absolute
+        return path.as_posix()
+
+class BackupArchive:
+    """Parent-side writer of one run's archive; opened on the first original it receives."""
+
+    def __init__(self, directory: pathlib.Path, tool: str):
+        self.directory = directory
+        self.tool = tool
+        self.run_id = ""
+        self.entries: List[dict] = []
+        self.objects: set = set()
+        self.stored = 0
+        self._tar: Optional[tarfile.TarFile] = None
+        self._partial: Optional[pathlib.Path] = None
+
+    def _open(self) -> tarfile.TarFile:
+        import tarfile
+        if self._tar is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            run_id, n = f"{stamp}-{self.tool}", 1
+            while (self.directory / f"{run_id}{ARCHIVE_SUFFIX}").exists() or \
+                    (self.directory / f"{run_id}{ARCHIVE_SUFFIX}.partial").exists():
+                n += 1
+                run_id = f"{stamp}-{self.tool}-{n}"
+            self.run_id = run_id
+            self._partial = self.directory / f"{run_id}{ARCHIVE_SUFFIX}.partial"
+            self._tar = tarfile.open(self._partial, "w:gz", compresslevel=6)
+        return self._tar
+
+    def _member(self, digest: str, size: int) -> tarfile.TarInfo:
+        import tarfile
+        info = tarfile.TarInfo(f"objects/{digest}")
+        info.size = size
+        info.mtime = int(time.time())
+        return info
+
+    def _record(self, path: str, digest: str, size: int, mode: int) -> None:
+        self.entries.append({"path": path, "sha256": digest, "bytes": size, "mode": mode})
+
+    def add(self, path: str, data: bytes, mode: int) -> None:
+        tar = self._open()
+        digest = content_hash(data)
+        if digest not in self.objects:
+            tar.addfile(self._member(digest, len(data)), io.BytesIO(data))
+            self.objects.add(digest)
+            self.stored += len(data)
+        self._record(path, digest, len(data), mode)
+
+    def add_file(self, path: pathlib.Path) -> None:
+        """add() reading the file from disk in chunks (for --stream)."""
+        tar = self._open()
+        st = os.stat(path)
+        digest = file_hash(path)
+        if digest not in self.objects:
+            with open(path, 'rb') as f:
+                tar.addfile(self._member(digest, st.st_size), f)
+            self.objects.add(digest)
+            self.stored += st.st_size
+        self._record(_stored_path(path), digest, st.st_size, st.st_mode & 0o7777)
+
+    def close(self) -> Optional[BackupSummary]:
+        """Write the manifest and move the archive into place; None if nothing was backed up."""
+        if self._tar is None:
+            return None
+        import tarfile
+        manifest = {
+            "version": ARCHIVE_VERSION,
+            "run_id": self.run_id,
+            "tool": self.tool,
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "cwd": os.getcwd(),
+            "files": self.entries,
+        }
+        data = (json.dumps(manifest, indent=1) + "\n").encode('utf-8')
+        info = tarfile.TarInfo(MANIFEST)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self._tar.addfile(info, io.BytesIO(data))
+        self._tar.close()
+        self._tar = None
+        final = self.directory / f"{self.run_id}{ARCHIVE_SUFFIX}"
+        os.replace(self._partial, final)
+        return BackupSummary(self.run_id, final, len(self.entries), len(self.objects), self.stored)
+
+def open_backup(enabled: bool, directory: str, tool: str) -> Optional[BackupArchive]:
+    """Start the run's archive when --backup was given, or return None. Nothing is written until a file is backed up."""
+    global _archive
+    if not enabled:
+        return None
+    _archive = BackupArchive(pathlib.Path(directory), tool)
+    return _archive
+
+def active() -> bool:
+    return _archive is not None
+
+def collect() -> None:
+    """Pool initializer: keep originals in memory until drain() sends them to the parent."""
+    global _collecting
+    # A forked worker inherits the parent's open archive: leave it alone so it is never flushed from here
+    _collecting = True
+
+def stash(path: pathlib.Path, data: bytes) -> None:
+    """Back up the original bytes of path before it is rewritten."""
+    mode = os.stat(path).st_mode & 0o7777
+    if _collecting or _archive is None:
+        _pending.append((_stored_path(path), data, mode))
+    else:
+        _archive.add(_stored_path(path), data, mode)
+
+def stash_file(path: pathlib.Path) -> None:
+    """stash() without holding the file: the parent streams it from disk; a worker has to read it."""
+    if _collecting or _archive is None:
+        stash(path, path.read_bytes())
+    else:
+        _archive.add_file(path)
+
+def drain() -> List[Stashed]:
+    """Return and clear the originals stashed in this process."""
+    global _pending
+    out, _pending = _pending, []
+    return out
+
+def extend(records: List[Stashed]) -> None:
+    """Add originals sent back from a pool worker to the run's archive."""
+    for path, data, mode in records:
+        _archive.add(path, data, mode)
+
+def close_backup(archive: Optional[BackupArchive]) -> None:
+    """Finish the run's archive and print its run id."""
+    global _archive
+    if archive is None:
+        return
+    _archive = None
+    summary = archive.close()
+    if summary is not None:
+        print(f"Backup: {summary.run_id} | Files: {summary.files} | Unique: {summary.objects} | "
+              f"{summary.bytes / 1024:,.1f} KB -> {summary.path}")
+
+def _find_archive(directory: pathlib.Path, run_id: str) -> pathlib.Path:
+    if run_id == "latest":
+        runs = list(directory.glob(f"*{ARCHIVE_SUFFIX}"))
+        if not runs:
+            raise FileNotFoundError(f"No backup archives in {directory}")
+        return max(runs, key=lambda p: p.stat().st_mtime_ns)
+    path = directory / f"{run_id}{ARCHIVE_SUFFIX}"
+    if not path.is_file():
+        raise FileNotFoundError(f"Backup run not found: {path}")
+    return path
+
+def _write_atomic(path: pathlib.Path, data: bytes, mode: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def _read_manifest(archive: pathlib.Path) -> dict:
+    import tarfile
+    with tarfile.open(archive, "r|gz") as tar:
+        for member in tar:
+            if member.name == MANIFEST:
+                return json.loads(tar.extractfile(member).read().decode('utf-8'))
+    raise ValueError(f"No {MANIFEST} in {archive}")
+
+def restore_run(run_id: str, directory: str, verbose: bool) -> int:
+    """Write back every original of a --backup run; returns the exit code."""
+    import tarfile
+    try:
+        archive = _find_archive(pathlib.Path(directory), run_id)
+        # The manifest is the last member, so a restore reads the archive twice, both times sequentially
+        manifest = _read_manifest(archive)
+        base = pathlib.Path(manifest["cwd"])
+        if not base.is_dir():
+            base = pathlib.Path.cwd()
+        wanted: Dict[str, List[dict]] = {}
+        unchanged = 0
+        for entry in manifest["files"]:
+            path = base / entry["path"]
+            if path.exists() and file_hash(path) == entry["sha256"]:
+                unchanged += 1
+                if verbose:
+                    print(f"[OK ] {entry['path']}  (already original)")
+                continue
+            wanted.setdefault(entry["sha256"], []).append(dict(entry, target=path))
+        restored = 0
+        with tarfile.open(archive, "r|gz") as tar:
+            for member in tar:
+                entries = wanted.pop(member.name[len("objects/"):], None) if member.name.startswith("objects/") else None
+                if not entries:
+                    continue
+                data = tar.extractfile(member).read()
+                if content_hash(data) != entries[0]["sha256"]:
+                    raise ValueError(f"Corrupt backup object {member.name} in {archive}")
+                for entry in entries:
+                    _write_atomic(entry["target"], data, entry["mode"])
+                    restored += 1
+                    if verbose:
+                        print(f"[RST] {entry['path']}")
+        if wanted:
+            raise ValueError(f"{sum(len(v) for v in wanted.values())} originals missing from {archive}")
+    except (OSError, ValueError, KeyError, tarfile.TarError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+    print(f"\nRestored: {restored} files | Already original: {unchanged} | Run: {manifest['run_id']} ({manifest['tool']})")
+    return 0
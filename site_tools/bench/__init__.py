@@ -0,0 +1,19 @@
+"""
+bench — Scaling benchmark for the site_tools Markdown transforms.
+
+- corpus.py:  deterministic synthetic docs trees (1k to 100k+ files, MB to GB),
+              shaped like docs/user-stories and docs/architecture.
+- measure.py: runs each tool as a subprocess in dry-run and write mode and
+              records wall time, files/sec, MB/sec and peak RSS.
+- __main__.py: the command line; saves a baseline JSON and compares against it.
+
+Usage (from the repository root):
+  python -m site_tools.bench --files 1000
+  python -m site_tools.bench --files 100000 --avg-kb 24 --save bench-baseline.json
+  python -m site_tools.bench --files 1000 --compare bench-baseline.json
+"""
+
+from .corpus import CorpusSpec, CorpusInfo, generate_corpus
+from .measure import Measurement, run_tool, compare
+
+__all__ = ["CorpusSpec", "CorpusInfo", "generate_corpus", "Measurement", "run_tool", "compare"]
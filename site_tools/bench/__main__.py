@@ -0,0 +1,116 @@
+"""
+Command line for the site_tools scaling benchmark.
+
+Usage (from the repository root):
+  python -m site_tools.bench --files 1000
+  python -m site_tools.bench --files 20000 --avg-kb 16 --repeat 3 --save bench-baseline.json
+  python -m site_tools.bench --files 20000 --avg-kb 16 --compare bench-baseline.json -- --jobs 0
+"""
+
+from __future__ import annotations
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+from dataclasses import asdict
+
+from .corpus import CorpusSpec, generate_corpus
+from .measure import MODES, compare, run_tool
+
+SITE_TOOLS = pathlib.Path(__file__).resolve().parent.parent
+DEFAULT_TOOLS = ["remove_bold.py", "remove_em_dash.py", "remove_rule.py"]
+# Same git-ignored folder as the --cache manifests
+DEFAULT_CORPUS_ROOT = pathlib.Path(".site_tools_cache") / "bench"
+
+def _git_commit() -> str:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SITE_TOOLS,
+                              capture_output=True, text=True)
+    except OSError:
+        return ""
+    return proc.stdout.strip() if proc.returncode == 0 else ""
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m site_tools.bench",
+                                 description="Benchmark the site_tools transforms on a synthetic Markdown corpus.")
+    ap.add_argument("--files", type=int, default=1000, help="Number of Markdown files to generate (default: 1000)")
+    ap.add_argument("--avg-kb", type=float, default=8.0, help="Average file size in KB (default: 8)")
+    ap.add_argument("--seed", type=int, default=7, help="Random seed (default: 7)")
+    ap.add_argument("--clean-ratio", type=float, default=0.4, help="Share of files with nothing to change (default: 0.4)")
+    ap.add_argument("--corpus", default=None,
+                    help="Corpus folder (default: .site_tools_cache/bench/corpus-<files>-<avg-kb>-<seed>); reused when the spec matches")
+    ap.add_argument("--regenerate", action="store_true", help="Rebuild the corpus even if it already matches")
+    ap.add_argument("--generate-only", action="store_true", help="Generate the corpus and exit")
+    ap.add_argument("--tool", action="append", default=None,
+                    help=f"Script in site_tools/ to run (repeatable; default: {', '.join(DEFAULT_TOOLS)})")
+    ap.add_argument("--mode", action="append", choices=MODES, default=None, help="dry-run and/or write (default: both)")
+    ap.add_argument("--repeat", type=int, default=1, help="Runs per tool and mode; best time is kept (default: 1)")
+    ap.add_argument("--save", metavar="FILE", default=None, help="Write the results as baseline JSON")
+    ap.add_argument("--compare", metavar="FILE", default=None, help="Compare files/sec against a saved baseline JSON")
+    ap.add_argument("--max-regression", type=float, default=10.0,
+                    help="With --compare: exit 1 if files/sec drops by more than this percent (default: 10)")
+    ap.add_argument("extra", nargs="*", help="Extra arguments passed to every tool (after --)")
+    args = ap.parse_args()
+
+    spec = CorpusSpec(files=args.files, avg_kb=args.avg_kb, seed=args.seed, clean_ratio=args.clean_ratio)
+    root = pathlib.Path(args.corpus) if args.corpus else DEFAULT_CORPUS_ROOT / f"corpus-{args.files}-{args.avg_kb:g}-{args.seed}"
+    tools = [SITE_TOOLS / t for t in (args.tool or DEFAULT_TOOLS)]
+    for tool in tools:
+        if not tool.is_file():
+            print(f"ERROR: Tool not found: {tool}", file=sys.stderr)
+            sys.exit(2)
+    baseline = None
+    if args.compare:
+        try:
+            baseline = json.loads(pathlib.Path(args.compare).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Cannot read baseline {args.compare}: {e}", file=sys.stderr)
+            sys.exit(2)
+
+    def progress(n: int) -> None:
+        print(f"  generated {n}/{spec.files} files", file=sys.stderr)
+
+    corpus = generate_corpus(root, spec, force=args.regenerate, progress=progress)
+    print(f"Corpus: {corpus.root} | Files: {corpus.files} | Size: {corpus.megabytes:,.1f} MB")
+    if args.generate_only:
+        return
+
+    results = []
+    print(f"{'tool':<18} {'mode':<8} {'seconds':>8} {'files/s':>10} {'MB/s':>8} {'peak RSS MB':>12}")
+    for tool in tools:
+        for mode in args.mode or MODES:
+            m = run_tool(tool, corpus.root, corpus.files, corpus.bytes, mode, args.extra, args.repeat)
+            rss = f"{m.peak_rss_mb:.1f}" if m.peak_rss_mb is not None else "-"
+            print(f"{m.tool:<18} {m.mode:<8} {m.seconds:>8.2f} {m.files_per_sec:>10,.0f} {m.mb_per_sec:>8.2f} {rss:>12}")
+            results.append(m)
+
+    if args.save:
+        report = {
+            "version": 1,
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "corpus": {"spec": asdict(spec), "files": corpus.files, "bytes": corpus.bytes},
+            "extra_args": args.extra,
+            "results": [m.to_dict() for m in results],
+        }
+        pathlib.Path(args.save).write_text(json.dumps(report, indent=2) + "\n", encoding='utf-8')
+        print(f"Saved baseline: {args.save}")
+
+    if baseline is not None:
+        if baseline.get("corpus", {}).get("files") != corpus.files or baseline.get("corpus", {}).get("bytes") != corpus.bytes:
+            print("WARNING: Baseline was measured on a different corpus; compare with care.", file=sys.stderr)
+        lines, regressed = compare(results, baseline, args.max_regression)
+        print(f"\nAgainst {args.compare} (commit {baseline.get('commit') or '?'}):")
+        print("\n".join(lines))
+        if regressed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
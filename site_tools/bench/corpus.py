@@ -0,0 +1,224 @@
+"""
+corpus.py — Deterministic synthetic Markdown trees for the site_tools benchmark.
+
+Documents are assembled from the block shapes found in docs/user-stories and
+docs/architecture: optional front matter, ATX and Setext headings, "Goal/Scope"
+quotes, prose with bold labels, inline code and em dashes, bullet lists, pipe
+tables, fenced YAML/JSON/mermaid blocks (including ```` fences that nest ```),
+horizontal rules and runs of blank lines.
+
+A share of the files (--clean-ratio) is written without any bold, dash or rule
+trigger so the byte prefilter fast path is part of every measurement.
+
+The tree is laid out as <root>/section-NNN/<slug>-NNNNNN.md and described by
+<root>/corpus.json; an existing tree with the same spec is reused as-is.
+"""
+
+from __future__ import annotations
+import json
+import pathlib
+import random
+import shutil
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional
+
+MANIFEST = "corpus.json"
+CORPUS_VERSION = 1
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    files: int = 1000
+    avg_kb: float = 8.0
+    seed: int = 7
+    files_per_dir: int = 200
+    clean_ratio: float = 0.4
+
+@dataclass(frozen=True)
+class CorpusInfo:
+    root: pathlib.Path
+    spec: CorpusSpec
+    files: int
+    bytes: int
+
+    @property
+    def megabytes(self) -> float:
+        return self.bytes / (1024 * 1024)
+
+WORDS = (
+    "tenant contract dataset refresh policy lineage KPI owner runtime ledger schema "
+    "connector pipeline audit evidence retention residency quota snapshot catalog "
+    "steward approval rollout version metric alert gateway partition replay"
+).split()
+ROLES = ["Platform Admin", "Tenant Admin", "Data Steward", "Security Admin", "Observability Engineer", "Platform Owner"]
+SECTIONS = ["Context", "Actors (Personas and Roles)", "Preconditions", "Scenario Flow", "Acceptance Criteria",
+            "Failure Paths", "Observability and Governance", "Decision", "Consequences", "Implementation Notes"]
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choices(WORDS, k=n))
+
+def _title(rng: random.Random) -> str:
+    return " ".join(w.capitalize() for w in rng.sample(WORDS, 3))
+
+def _dash(rng: random.Random, dirty: bool) -> str:
+    if not dirty:
+        return ", "
+    return rng.choice([" — ", "—", " – ", " — "])
+
+def _bold(rng: random.Random, text: str, dirty: bool) -> str:
+    if not dirty:
+        return text
+    return rng.choice(["**{}**", "**{}**", "__{}__", "<b>{}</b>", "<strong>{}</strong>"]).format(text)
+
+# --- Blocks; each returns a list of lines without newlines -------------------------
+
+def front_matter(rng: random.Random, dirty: bool) -> List[str]:
+    lines = ["---", f"title: {_title(rng)}", f"tags: [{', '.join(rng.sample(WORDS, 3))}]"]
+    if dirty:
+        # Never touched by the transforms: front matter is passed through
+        lines.append(f"summary: \"**{rng.choice(WORDS)}** — {_words(rng, 4)}\"")
+    lines.append("---")
+    return lines
+
+def goal_scope(rng: random.Random, dirty: bool) -> List[str]:
+    return [f"> Goal: {_words(rng, 12)}.  ",
+            f"> Scope: {_words(rng, 8)}{_dash(rng, dirty)}{_words(rng, 6)}."]
+
+def heading(rng: random.Random, dirty: bool) -> List[str]:
+    title = rng.choice(SECTIONS)
+    if dirty and rng.random() < 0.2:
+        title = f"{title}{_dash(rng, True)}{_bold(rng, rng.choice(WORDS), True)}"
+    if rng.random() < 0.1:
+        return [title, rng.choice(["=", "-"]) * max(3, len(title))]
+    return [f"{'#' * rng.choice((2, 2, 3))} {title}"]
+
+def prose(rng: random.Random, dirty: bool) -> List[str]:
+    out = []
+    for _ in range(rng.randint(2, 5)):
+        parts = [_words(rng, rng.randint(6, 14))]
+        if rng.random() < 0.5:
+            parts.append(_bold(rng, _title(rng), dirty))
+        if rng.random() < 0.4:
+            parts.append(f"`{rng.choice(WORDS)}.**{rng.choice(WORDS)}**`" if dirty else f"`{rng.choice(WORDS)}_id`")
+        sentence = " ".join(parts)
+        if rng.random() < 0.5:
+            sentence += _dash(rng, dirty) + _words(rng, rng.randint(4, 9))
+        out.append(sentence + ".  ")
+    return out
+
+def bullets(rng: random.Random, dirty: bool) -> List[str]:
+    out = []
+    for i in range(rng.randint(3, 8)):
+        label = _bold(rng, f"{rng.choice(ROLES)}:", dirty) if dirty else f"{rng.choice(ROLES)}:"
+        indent = "  " if i and rng.random() < 0.25 else ""
+        out.append(f"{indent}- {label} {_words(rng, rng.randint(4, 10))}  ")
+    return out
+
+def numbered(rng: random.Random, dirty: bool) -> List[str]:
+    return [f"{i}. {rng.choice(ROLES)} {_words(rng, 7)}{_dash(rng, dirty) if rng.random() < 0.3 else ' '}{_words(rng, 3)}  "
+            for i in range(1, rng.randint(4, 8))]
+
+def table(rng: random.Random, dirty: bool) -> List[str]:
+    cols = rng.randint(3, 6)
+    out = ["| " + " | ".join(_title(rng) for _ in range(cols)) + " |",
+           "|" + "|".join("---" for _ in range(cols)) + "|"]
+    for _ in range(rng.randint(3, 12)):
+        cells = []
+        for _ in range(cols):
+            cell = _words(rng, rng.randint(1, 4))
+            if dirty and rng.random() < 0.3:
+                cell = f"{_bold(rng, rng.choice(WORDS).title() + ':', True)} {cell}"
+            elif dirty and rng.random() < 0.15:
+                cell += _dash(rng, True) + rng.choice(WORDS)
+            cells.append(cell)
+        out.append("| " + " | ".join(cells) + " |")
+    return out
+
+def fence(rng: random.Random, dirty: bool) -> List[str]:
+    lang = rng.choice(["yaml", "json", "mermaid", "text"])
+    body = []
+    for _ in range(rng.randint(3, 12)):
+        if lang == "json":
+            body.append(f'  "{rng.choice(WORDS)}": "{_words(rng, 2)}",')
+        elif lang == "mermaid":
+            body.append(f"  {rng.choice(WORDS)} --> {rng.choice(WORDS)}")
+        else:
+            body.append(f"{rng.choice(WORDS)}_{rng.choice(WORDS)}: {_words(rng, 2)}")
+    if dirty:
+        # Looks like every trigger, but sits inside a fence
+        body.insert(rng.randrange(len(body) + 1), rng.choice(["---", "**not bold**", "a — b", "***"]))
+    marker = rng.choice(["```", "```", "~~~"])
+    if rng.random() < 0.15:
+        # Outer fence documenting a fenced block
+        return ["````markdown", f"```{lang}", *body, "```", "````"]
+    return [f"{marker}{lang}", *body, marker]
+
+def rule(rng: random.Random, dirty: bool) -> List[str]:
+    if not dirty:
+        return []
+    return [rng.choice(["---", "---", "***", "___", "- - -", "* * *"])]
+
+def blank_run(rng: random.Random, dirty: bool) -> List[str]:
+    return [""] * rng.randint(1, 2) if dirty else []
+
+def back_link(rng: random.Random, dirty: bool) -> List[str]:
+    return [f"← Back to [{_title(rng)}](../{rng.choice(WORDS)}-overview.md)"]
+
+Block = Callable[[random.Random, bool], List[str]]
+BODY_BLOCKS: List[Block] = [prose, prose, prose, bullets, bullets, numbered, table, fence, rule, blank_run]
+
+def document(rng: random.Random, target_bytes: int, dirty: bool) -> str:
+    lines: List[str] = []
+    if rng.random() < 0.3:
+        lines += front_matter(rng, dirty)
+    if rng.random() < 0.3:
+        lines += back_link(rng, dirty) + [""]
+    lines += [f"# {_title(rng)}", ""] + goal_scope(rng, dirty) + [""]
+    size = sum(len(l) + 1 for l in lines)
+    while size < target_bytes:
+        block = heading(rng, dirty) + [""]
+        for _ in range(rng.randint(1, 3)):
+            body = rng.choice(BODY_BLOCKS)(rng, dirty)
+            if body:
+                block += body + [""]
+        lines += block
+        size += sum(len(l) + 1 for l in block)
+    return "\n".join(lines).rstrip("\n") + "\n"
+
+def _read_manifest(root: pathlib.Path) -> Optional[dict]:
+    try:
+        return json.loads((root / MANIFEST).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+def generate_corpus(root: pathlib.Path, spec: CorpusSpec, force: bool = False,
+                    progress: Optional[Callable[[int], None]] = None) -> CorpusInfo:
+    """
+    Write the corpus described by spec under root and return its totals.
+    A tree already generated with the same spec is reused unless force is set.
+    """
+    manifest = _read_manifest(root)
+    if not force and manifest and manifest.get("version") == CORPUS_VERSION and manifest.get("spec") == asdict(spec):
+        return CorpusInfo(root, spec, manifest["files"], manifest["bytes"])
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+
+    rng = random.Random(spec.seed)
+    avg = spec.avg_kb * 1024
+    total = 0
+    for i in range(spec.files):
+        if i % spec.files_per_dir == 0:
+            folder = root / f"section-{i // spec.files_per_dir:03d}"
+            folder.mkdir()
+        dirty = rng.random() >= spec.clean_ratio
+        # Sizes spread from a quarter to twice the average, mean ~= avg
+        target = int(avg * rng.choice((0.25, 0.5, 0.75, 1.0, 1.0, 1.25, 1.5, 2.0)))
+        data = document(rng, target, dirty).encode('utf-8')
+        (folder / f"{rng.choice(WORDS).lower()}-{i:06d}.md").write_bytes(data)
+        total += len(data)
+        if progress and (i + 1) % 1000 == 0:
+            progress(i + 1)
+
+    info = {"version": CORPUS_VERSION, "spec": asdict(spec), "files": spec.files, "bytes": total}
+    (root / MANIFEST).write_text(json.dumps(info, indent=2) + "\n", encoding='utf-8')
+    return CorpusInfo(root, spec, spec.files, total)
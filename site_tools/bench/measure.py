@@ -0,0 +1,115 @@
+"""
+measure.py — Run a site_tools script as a subprocess and record its throughput.
+
+Each run is timed around the whole process (interpreter start, walk, read,
+transform, write), so the numbers match what a user or CI job sees. Peak RSS
+comes from os.wait4() for that one child; on Linux it covers the tool and any
+--jobs workers it reaped (largest single process). Platforms without wait4
+report no RSS.
+
+Write-mode runs get a fresh copy of the pristine corpus before every repeat;
+the copy is not part of the measured time.
+"""
+
+from __future__ import annotations
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+MODES = ("dry-run", "write")
+
+@dataclass
+class Measurement:
+    tool: str
+    mode: str
+    files: int
+    bytes: int
+    seconds: float
+    files_per_sec: float
+    mb_per_sec: float
+    peak_rss_mb: Optional[float]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+def _maxrss_mb(ru_maxrss: int) -> float:
+    # Linux reports kilobytes, macOS bytes
+    return ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else ru_maxrss / 1024
+
+def _run_once(cmd: List[str]) -> Tuple[float, Optional[float]]:
+    with tempfile.TemporaryFile() as err:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=err)
+        rss = None
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            rss = _maxrss_mb(usage.ru_maxrss)
+        else:
+            proc.wait()
+        elapsed = time.perf_counter() - start
+        # Exit code 1 only means a dry-run found changes
+        if proc.returncode not in (0, 1):
+            err.seek(0)
+            msg = err.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"{' '.join(cmd)} failed ({proc.returncode}): {msg}")
+    return elapsed, rss
+
+def run_tool(tool: pathlib.Path, corpus: pathlib.Path, files: int, size: int, mode: str,
+             extra: Sequence[str] = (), repeat: int = 1, scratch: Optional[pathlib.Path] = None) -> Measurement:
+    """Best wall time and highest peak RSS over repeat runs of tool on corpus."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode}")
+    best = float("inf")
+    peak: Optional[float] = None
+    for _ in range(max(1, repeat)):
+        target = corpus
+        if mode == "write":
+            target = (scratch or corpus.parent) / f"{corpus.name}-write"
+            if target.exists():
+                shutil.rmtree(target)
+            shutil.copytree(corpus, target)
+        cmd = [sys.executable, str(tool), "--path", str(target), *extra]
+        if mode == "dry-run":
+            cmd.append("--dry-run")
+        try:
+            elapsed, rss = _run_once(cmd)
+        finally:
+            if target != corpus:
+                shutil.rmtree(target, ignore_errors=True)
+        best = min(best, elapsed)
+        if rss is not None:
+            peak = rss if peak is None else max(peak, rss)
+    mb = size / (1024 * 1024)
+    return Measurement(tool.name, mode, files, size, best, files / best, mb / best, peak)
+
+def compare(current: Sequence[Measurement], baseline: dict, max_regression: float) -> Tuple[List[str], bool]:
+    """
+    Format a files/sec comparison against a saved baseline report.
+    Returns (lines, regressed): regressed is True when any tool/mode in both
+    reports lost more than max_regression percent of its files/sec.
+    """
+    before: Dict[Tuple[str, str], dict] = {(r["tool"], r["mode"]): r for r in baseline.get("results", [])}
+    lines = [f"{'tool':<18} {'mode':<8} {'base files/s':>13} {'files/s':>10} {'change':>8}  {'base RSS':>9} {'RSS':>9}"]
+    regressed = False
+    for m in current:
+        old = before.get((m.tool, m.mode))
+        if old is None:
+            lines.append(f"{m.tool:<18} {m.mode:<8} {'-':>13} {m.files_per_sec:>10,.0f} {'new':>8}")
+            continue
+        change = (m.files_per_sec / old["files_per_sec"] - 1) * 100
+        flag = ""
+        if change < -max_regression:
+            regressed = True
+            flag = "  REGRESSION"
+        old_rss = f"{old['peak_rss_mb']:.1f}" if old.get("peak_rss_mb") is not None else "-"
+        new_rss = f"{m.peak_rss_mb:.1f}" if m.peak_rss_mb is not None else "-"
+        lines.append(f"{m.tool:<18} {m.mode:<8} {old['files_per_sec']:>13,.0f} {m.files_per_sec:>10,.0f} "
+                     f"{change:>+7.1f}%  {old_rss:>9} {new_rss:>9}{flag}")
+    return lines, regressed
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+bench_bold.py — Micro-benchmark for the inline bold stripper in remove_bold.py.
+
+Compares lines/sec of the current single-scan stripper with the previous
+multi-regex path (kept below as a reference copy) on long, bold-heavy table rows
+and on plain prose lines, and checks that both produce the same output and counts.
+
+Usage:
+  python bench_bold.py
+  python bench_bold.py --cells 40 --lines 5000 --repeat 5
+"""
+
+from __future__ import annotations
+import argparse
+import random
+import re
+import sys
+import time
+from typing import Callable, List, Tuple
+
+from remove_bold import process_line_outside_code_with_leading
+
+# --- Previous implementation (reference for "before" numbers) ---------------------
+
+_INLINE_CODE_SPLIT_RE = re.compile(r'(`+[^`]*`+)')
+_HTML_B_TAGS_RE = re.compile(r'</?(?:strong|b)\s*>', re.IGNORECASE)
+_MD_BOLD_DOUBLE_RE = re.compile(r'\*\*(.+?)\*\*', re.DOTALL)
+_MD_BOLD_UNDERS_RE = re.compile(r'__(.+?)__', re.DOTALL)
+
+def _legacy_outside_code(line: str) -> Tuple[str, int]:
+    parts = _INLINE_CODE_SPLIT_RE.split(line)
+    changed = 0
+    for i in range(0, len(parts), 2):
+        seg = _HTML_B_TAGS_RE.sub('', parts[i])
+        seg, c1 = _MD_BOLD_DOUBLE_RE.subn(r'\1', seg)
+        seg, c2 = _MD_BOLD_UNDERS_RE.subn(r'\1', seg)
+        changed += c1 + c2
+        parts[i] = seg
+    return ''.join(parts), changed
+
+def legacy_with_leading(line: str, skip_leading_bold: bool) -> Tuple[str, int]:
+    parts = _INLINE_CODE_SPLIT_RE.split(line)
+    changed_total = 0
+    if skip_leading_bold:
+        m = re.match(r'^(\s*)(\*\*.+?\*\*|__.+?__)(.*)$', parts[0], flags=re.DOTALL)
+        if m:
+            indent, leading_bold, rest = m.groups()
+            processed_rest, ch = _legacy_outside_code(rest)
+            parts[0] = indent + leading_bold + processed_rest
+            changed_total += ch
+    for i in range(0, len(parts), 2):
+        if i == 0 and skip_leading_bold:
+            before = parts[0]
+            seg = _HTML_B_TAGS_RE.sub('', before)
+            lead_match = re.match(r'^(\s*)(\*\*.+?\*\*|__.+?__)', before, flags=re.DOTALL)
+            if lead_match:
+                seg_marked = re.sub(r'^(\s*)(\*\*.+?\*\*|__.+?__)', r'\1@@LEADING_BOLD@@', seg, count=1, flags=re.DOTALL)
+                seg_marked, c1 = _MD_BOLD_DOUBLE_RE.subn(r'\1', seg_marked)
+                seg_marked, c2 = _MD_BOLD_UNDERS_RE.subn(r'\1', seg_marked)
+                parts[0] = seg_marked.replace('@@LEADING_BOLD@@', lead_match.group(0))
+                changed_total += c1 + c2
+                continue
+        new_seg, ch = _legacy_outside_code(parts[i])
+        parts[i] = new_seg
+        changed_total += ch
+    return ''.join(parts), changed_total
+
+# --- Corpus ---------------------------------------------------------------------------
+
+WORDS = "tenant contract dataset refresh policy lineage KPI owner runtime ledger schema".split()
+
+def table_row(rng: random.Random, cells: int) -> str:
+    out = []
+    for _ in range(cells):
+        w = rng.sample(WORDS, 3)
+        kind = rng.random()
+        if kind < 0.4:
+            out.append(f"**{w[0]}:** {w[1]} **{w[2]}**")
+        elif kind < 0.6:
+            out.append(f"__{w[0]}__ `{w[1]}_**id**` {w[2]}")
+        elif kind < 0.75:
+            out.append(f"<b>{w[0]}</b> {w[1]} <strong>{w[2]}</strong>")
+        else:
+            out.append(f"{w[0]} {w[1]} {w[2]}")
+    return "| " + " | ".join(out) + " |"
+
+def labeled_line(rng: random.Random) -> str:
+    w = rng.sample(WORDS, 4)
+    return f"**{w[0].title()}:** {w[1]} with **{w[2]}** and {w[3]}"
+
+def prose_line(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(14)) + "."
+
+def bench(fn: Callable[[str, bool], Tuple[str, int]], lines: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            fn(line, True)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the inline bold stripper against the previous regex path.")
+    ap.add_argument("--cells", type=int, default=24, help="Cells per table row (default: 24)")
+    ap.add_argument("--lines", type=int, default=2000, help="Lines per corpus (default: 2000)")
+    ap.add_argument("--repeat", type=int, default=5, help="Runs per measurement; best is kept (default: 5)")
+    ap.add_argument("--seed", type=int, default=7, help="Random seed (default: 7)")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    corpora = {
+        f"table rows ({args.cells} cells)": [table_row(rng, args.cells) for _ in range(args.lines)],
+        "leading labels": [labeled_line(rng) for _ in range(args.lines)],
+        "plain prose": [prose_line(rng) for _ in range(args.lines)],
+    }
+
+    print(f"{'corpus':<24} {'before (lines/s)':>17} {'after (lines/s)':>16} {'speedup':>8}")
+    for name, lines in corpora.items():
+        for line in lines:
+            if process_line_outside_code_with_leading(line, True) != legacy_with_leading(line, True):
+                print(f"ERROR: output differs on: {line}", file=sys.stderr)
+                sys.exit(1)
+        before = bench(legacy_with_leading, lines, args.repeat)
+        after = bench(process_line_outside_code_with_leading, lines, args.repeat)
+        print(f"{name:<24} {before:>17,.0f} {after:>16,.0f} {after / before:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
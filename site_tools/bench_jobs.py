@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+bench_jobs.py — Measure the --jobs speedup curve of a site_tools script.
+
+Runs the chosen tool in --dry-run mode with --jobs 1..N and prints wall time and
+speedup against the serial run. The docs tree can be replicated into a temporary
+folder (--copies) so the curve reflects a larger corpus than ./docs.
+
+Usage:
+  python bench_jobs.py --tool remove_bold.py
+  python bench_jobs.py --tool cleanup.py --path docs --copies 8 --max-jobs 8 --repeat 3
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+HERE = pathlib.Path(__file__).resolve().parent
+
+def replicate(src: pathlib.Path, dst: pathlib.Path, copies: int) -> None:
+    """Copy the src tree into dst/copy-0 .. dst/copy-(copies-1)."""
+    for i in range(copies):
+        shutil.copytree(src, dst / f"copy-{i}")
+
+def time_run(tool: pathlib.Path, path: pathlib.Path, jobs: int, extra: List[str]) -> float:
+    cmd = [sys.executable, str(tool), "--path", str(path), "--dry-run", "--jobs", str(jobs), *extra]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    # Exit code 1 only means the dry-run found changes
+    if proc.returncode not in (0, 1):
+        raise RuntimeError(f"{' '.join(cmd)} failed ({proc.returncode}): {proc.stderr.strip()}")
+    return elapsed
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark --jobs scaling of a site_tools script.")
+    ap.add_argument("--tool", default="cleanup.py", help="Script in site_tools/ to benchmark (default: cleanup.py)")
+    ap.add_argument("--path", default="docs", help="Docs tree to scan (default: ./docs)")
+    ap.add_argument("--copies", type=int, default=1, help="Replicate the tree N times into a temp folder (default: 1 = scan in place)")
+    ap.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1, help="Largest worker count to try (default: CPU count)")
+    ap.add_argument("--repeat", type=int, default=3, help="Runs per worker count; the best time is kept (default: 3)")
+    ap.add_argument("extra", nargs="*", help="Extra arguments passed to the tool (after --)")
+    args = ap.parse_args()
+
+    tool = HERE / args.tool
+    root = pathlib.Path(args.path).resolve()
+    if not tool.is_file():
+        print(f"ERROR: Tool not found: {tool}", file=sys.stderr)
+        sys.exit(2)
+    if not root.is_dir():
+        print(f"ERROR: Path not found or not a directory: {root}", file=sys.stderr)
+        sys.exit(2)
+
+    with tempfile.TemporaryDirectory(prefix="bench-jobs-") as tmp:
+        target = root
+        if args.copies > 1:
+            target = pathlib.Path(tmp)
+            replicate(root, target, args.copies)
+        n_files = sum(1 for _ in target.rglob("*.md"))
+        print(f"Tool: {args.tool} | Files: {n_files} | Repeat: {args.repeat}")
+        print(f"{'jobs':>4}  {'best (s)':>9}  {'speedup':>7}")
+
+        serial = None
+        for jobs in range(1, max(1, args.max_jobs) + 1):
+            best = min(time_run(tool, target, jobs, args.extra) for _ in range(args.repeat))
+            serial = serial or best
+            print(f"{jobs:>4}  {best:>9.3f}  {serial / best:>6.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+buildtrace.py — Run `mkdocs build` with per-plugin and per-page timing
+
+Runs the mkdocs command line in this process with timers around:
+
+- every plugin event handler (search, minify, redirects, awesome-pages, the
+  site_tools hooks, ...), recorded as "<plugin>.on_<event>" with the page's
+  source path for page events,
+- the build phases MkDocs itself runs per page: reading and rendering the
+  Markdown (_populate_page, with Page.read_source and Page.render inside it)
+  and rendering the theme template and writing the HTML (_build_page), plus
+  theme/extra templates, load_config and the whole build.
+
+Afterwards it prints the slowest hooks and pages and writes a trace in the
+Chrome trace-event format (default: .site_tools_cache/buildtrace.json), which
+opens in chrome://tracing or https://ui.perfetto.dev. With --compare OLD.json
+the totals per span name are compared with an earlier trace, e.g. the previous
+build's (the old file is read before it is overwritten) or one archived by CI.
+
+Each span costs two perf_counter_ns() calls and a tuple append; the trace is
+only assembled after the build, so the tracer can stay on in CI. The summary
+prints an estimate of that overhead.
+
+Arguments after "--" go to mkdocs unchanged (default: build).
+
+Usage:
+  python buildtrace.py -- build --strict
+  python buildtrace.py --top 20 --trace build-trace.json -- build -f mkdocs.yml
+  python buildtrace.py --compare .site_tools_cache/buildtrace.json -- build --strict
+
+Exit codes:
+  mkdocs' own exit code (1 e.g. when --strict aborts on warnings); the trace is
+  written either way.
+"""
+
+from __future__ import annotations
+import argparse
+import functools
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from mdcache import CACHE_DIR
+
+DEFAULT_TRACE = f"{CACHE_DIR}/buildtrace.json"
+CALIBRATION_CALLS = 20000
+PHASES = ["load_config", "build", "populate_page", "read_source", "render_markdown", "build_page",
+          "theme_template", "extra_template"]
+TEMPLATE_HOOKS = (".on_page_context", ".on_post_page")  # the plugin handlers _build_page runs
+
+class Span(NamedTuple):
+    name: str
+    cat: str        # "plugin" or "mkdocs"
+    start: int      # perf_counter_ns
+    dur: int        # ns
+    tid: int
+    page: Optional[str]
+
+class Tracer:
+    """Collects spans; wrap() returns a timed version of a callable."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter_ns()
+
+    def wrap(self, func: Callable, name: str, cat: str, page_of: Callable = None) -> Callable:
+        spans = self.spans
+        clock = time.perf_counter_ns
+        ident = threading.get_ident
+
+        @functools.wraps(func)  # also copies mkdocs_priority, which orders the handlers
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                spans.append(Span(name, cat, start, clock() - start, ident(),
+                                  page_of(args, kwargs) if page_of else None))
+        return timed
+
+    def overhead(self) -> float:
+        """Estimated seconds the recorded spans added to the build."""
+        probe = Tracer()
+        nop = probe.wrap(lambda: None, "nop", "calibration")
+        start = time.perf_counter_ns()
+        for _ in range(CALIBRATION_CALLS):
+            nop()
+        wrapped = time.perf_counter_ns() - start
+        start = time.perf_counter_ns()
+        for _ in range(CALIBRATION_CALLS):
+            (lambda: None)()
+        plain = time.perf_counter_ns() - start
+        return max(wrapped - plain, 0) / CALIBRATION_CALLS * len(self.spans) / 1e9
+
+def _src_uri(page) -> Optional[str]:
+    file = getattr(page, "file", None)
+    return getattr(file, "src_uri", None)
+
+def _page_arg(args: tuple, kwargs: dict) -> Optional[str]:
+    """Source path of the page an event or build step works on, if any."""
+    page = kwargs.get("page")
+    if page is None and args:
+        page = args[0]  # on_pre_page(page, ...), _populate_page(page, ...), Page methods
+    return _src_uri(page)
+
+def _self_page(args: tuple, kwargs: dict) -> Optional[str]:
+    return _src_uri(args[0]) if args else None
+
+def install(tracer: Tracer) -> None:
+    """Patch MkDocs so plugin handlers and the per-page build steps record spans."""
+    import mkdocs.config
+    import mkdocs.plugins
+    from mkdocs.commands import build
+    from mkdocs.structure.pages import Page
+
+    register = mkdocs.plugins.PluginCollection._register_event
+
+    def traced_register(self, event_name, method, plugin_name=None):
+        if isinstance(method, mkdocs.plugins.CombinedEvent):
+            return register(self, event_name, method, plugin_name=plugin_name)
+        name = f"{plugin_name or '<unknown>'}.on_{event_name}"
+        return register(self, event_name, tracer.wrap(method, name, "plugin", _page_arg),
+                        plugin_name=plugin_name)
+
+    mkdocs.plugins.PluginCollection._register_event = traced_register
+    mkdocs.config.load_config = tracer.wrap(mkdocs.config.load_config, "load_config", "mkdocs")
+    build.build = tracer.wrap(build.build, "build", "mkdocs")
+    build._populate_page = tracer.wrap(build._populate_page, "populate_page", "mkdocs", _page_arg)
+    build._build_page = tracer.wrap(build._build_page, "build_page", "mkdocs", _page_arg)
+    build._build_theme_template = tracer.wrap(build._build_theme_template, "theme_template", "mkdocs")
+    build._build_extra_template = tracer.wrap(build._build_extra_template, "extra_template", "mkdocs")
+    Page.read_source = tracer.wrap(Page.read_source, "read_source", "mkdocs", _self_page)
+    Page.render = tracer.wrap(Page.render, "render_markdown", "mkdocs", _self_page)
+
+def run_mkdocs(argv: Sequence[str]) -> int:
+    from mkdocs.__main__ import cli
+    try:
+        cli.main(args=list(argv), prog_name="mkdocs")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    return 0
+
+def trace_events(tracer: Tracer, argv: Sequence[str]) -> List[dict]:
+    pid = os.getpid()
+    events = [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0,
+               "args": {"name": "mkdocs " + " ".join(argv)}}]
+    for s in sorted(tracer.spans, key=lambda s: (s.start, -s.dur)):
+        event = {"name": s.name, "cat": s.cat, "ph": "X", "pid": pid, "tid": s.tid,
+                 "ts": round((s.start - tracer.origin) / 1000, 3), "dur": round(s.dur / 1000, 3)}
+        if s.page:
+            event["args"] = {"page": s.page}
+        events.append(event)
+    return events
+
+def write_trace(path: pathlib.Path, events: List[dict], argv: Sequence[str], status: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    data = {"traceEvents": events, "displayTimeUnit": "ms",
+            "otherData": {"command": "mkdocs " + " ".join(argv), "exit_code": status}}
+    tmp.write_text(json.dumps(data, separators=(',', ':')), encoding='utf-8')
+    os.replace(tmp, path)
+
+def totals_by_name(events: List[dict]) -> Dict[str, float]:
+    """Summed duration (ms) of the complete events, by name."""
+    totals: Dict[str, float] = defaultdict(float)
+    for e in events:
+        if e.get("ph") == "X":
+            totals[e["name"]] += e["dur"] / 1000
+    return totals
+
+def report(tracer: Tracer, top: int) -> None:
+    hooks: Dict[str, List[int]] = defaultdict(list)
+    slowest_page: Dict[str, Tuple[int, Optional[str]]] = {}
+    pages: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    build_ns = sum(s.dur for s in tracer.spans if s.name == "build")
+    for s in tracer.spans:
+        if s.cat == "plugin":
+            hooks[s.name].append(s.dur)
+            if s.dur > slowest_page.get(s.name, (-1, None))[0]:
+                slowest_page[s.name] = (s.dur, s.page)
+        if s.page:
+            pages[s.page][s.name] += s.dur
+
+    if hooks and top:
+        print(f"\nSlowest hooks (of {len(hooks)}):")
+        print(f"  {'total ms':>10} {'calls':>6} {'max ms':>9}  hook  (slowest page)")
+    for name, durs in sorted(hooks.items(), key=lambda kv: -sum(kv[1]))[:top]:
+        worst = slowest_page[name][1]
+        print(f"  {sum(durs) / 1e6:10.1f} {len(durs):6} {max(durs) / 1e6:9.2f}  {name}"
+              + (f"  ({worst})" if worst and len(durs) > 1 else ""))
+
+    # populate_page and build_page contain the page's other spans, so they make up its total
+    def total(steps: Dict[str, int]) -> int:
+        return steps.get("populate_page", 0) + steps.get("build_page", 0)
+
+    if pages and top:
+        print(f"\nSlowest pages (of {len(pages)}):")
+        print(f"  {'total ms':>10} {'markdown':>9} {'template':>9} {'hooks':>9}  page")
+    for page, steps in sorted(pages.items(), key=lambda kv: -total(kv[1]))[:top]:
+        hook_ns = sum(d for n, d in steps.items() if n in hooks)
+        template_ns = steps.get("build_page", 0) - sum(
+            d for n, d in steps.items() if n in hooks and n.endswith(TEMPLATE_HOOKS))
+        print(f"  {total(steps) / 1e6:10.1f} {steps.get('render_markdown', 0) / 1e6:9.1f} "
+              f"{template_ns / 1e6:9.1f} {hook_ns / 1e6:9.1f}  {page}")
+
+    phases: Dict[str, int] = defaultdict(int)
+    for s in tracer.spans:
+        if s.cat == "mkdocs":
+            phases[s.name] += s.dur
+    if phases:
+        print("\nPhases: " + " | ".join(f"{n} {phases[n] / 1e9:.2f} s" for n in PHASES if n in phases))
+
+    hook_total = sum(sum(d) for d in hooks.values())
+    print(f"\nBuild: {build_ns / 1e9:.2f} s | Plugin hooks: {hook_total / 1e9:.2f} s | Pages: {len(pages)} | "
+          f"Spans: {len(tracer.spans)} | Tracing overhead: ~{tracer.overhead() * 1000:.0f} ms")
+
+def load_totals(path: pathlib.Path) -> Optional[Dict[str, float]]:
+    try:
+        return totals_by_name(json.loads(path.read_text(encoding='utf-8')).get("traceEvents", []))
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Cannot read {path}, nothing to compare with: {e}", file=sys.stderr)
+        return None
+
+def compare(old: Dict[str, float], old_path: pathlib.Path, events: List[dict], top: int) -> None:
+    new = totals_by_name(events)
+    deltas = sorted(((new.get(n, 0.0) - old.get(n, 0.0), n) for n in set(old) | set(new)),
+                    key=lambda d: -abs(d[0]))
+    print(f"\nChange against {old_path} (total ms per span name):")
+    print(f"  {'before':>10} {'after':>10} {'delta':>10}  span")
+    for delta, name in deltas[:top]:
+        print(f"  {old.get(name, 0.0):10.1f} {new.get(name, 0.0):10.1f} {delta:+10.1f}  {name}")
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Run mkdocs with per-plugin and per-page timing; writes a Chrome trace.",
+        epilog="Arguments after -- are passed to mkdocs (default: build).")
+    ap.add_argument("--trace", default=DEFAULT_TRACE,
+                    help=f"Trace file to write (default: {DEFAULT_TRACE})")
+    ap.add_argument("--top", type=int, default=10, help="Hooks and pages to list (default: 10)")
+    ap.add_argument("--compare", metavar="OLD_TRACE", help="Compare the span totals with an earlier trace")
+    ap.add_argument("mkdocs_args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    argv = args.mkdocs_args[1:] if args.mkdocs_args[:1] == ["--"] else args.mkdocs_args
+    argv = argv or ["build"]
+
+    # Read before the build, so --compare may name the trace this run overwrites
+    old = load_totals(pathlib.Path(args.compare)) if args.compare else None
+    tracer = Tracer()
+    install(tracer)
+    status = run_mkdocs(argv)
+
+    events = trace_events(tracer, argv)
+    trace_path = pathlib.Path(args.trace)
+    write_trace(trace_path, events, argv, status)
+    report(tracer, args.top)
+    if old is not None:
+        compare(old, pathlib.Path(args.compare), events, args.top)
+    print(f"Trace: {trace_path} ({len(events)} events; open in chrome://tracing or ui.perfetto.dev)")
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
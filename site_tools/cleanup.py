@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+cleanup.py — Run the bold, em dash and horizontal rule cleanups in a single pass.
+
+Combines remove_bold.py, remove_em_dash.py and remove_rule.py into one engine:
+each file is read once, its block structure (front matter, fences, headings) is
+classified once, every selected rule is applied line by line, and the file is
+written at most once. Per-rule counters are still reported separately.
+
+Rules (select with --rules, default: all):
+- bold      Strip **text**, __text__, <b>, <strong> (see remove_bold.py).
+- em-dash   Replace em dashes, optionally en dashes (see remove_em_dash.py).
+- rule      Remove horizontal rules and collapse blank-line runs (see remove_rule.py).
+
+Structure is classified once on the source text (see mdblocks.py), and the
+rules run in the order bold → em-dash → rule on each line, so the result matches
+running the three scripts one after another (except that the trailing newline
+is always kept). A line that only turns into a rule or heading after bold or
+em dash rewriting is still classified by its source form.
+
+Usage:
+  python cleanup.py --dry-run -v
+  python cleanup.py --path docs --backup -v
+  python cleanup.py --restore latest -v
+  python cleanup.py --path archived/docs-v1.zip --check
+  python cleanup.py --rules bold,em-dash --replacement " - " --also-en-dash -v
+  python cleanup.py --dry-run --jobs 0
+  python cleanup.py --dry-run --cache
+  python cleanup.py --dry-run --changed-since origin/main -v
+  python cleanup.py --dry-run --profile --profile-top 20
+  python cleanup.py --check --fail-fast
+  python cleanup.py --path generated-reference --stream -v
+  python cleanup.py --path docs --watch
+  python cleanup.py --check --fail-fast run --changed-since origin/main
+
+Exit codes:
+  0 on success (or no changes)
+  1 on dry-run with modifications, or --check with violations (useful in CI)
+  2 on an invalid path or rule name
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import pathlib
+import sys
+from functools import partial
+from typing import Dict, Iterable, Iterator, Tuple
+
+from mdblocks import HEADINGS, PASSTHROUGH, iter_kinds
+from remove_bold import process_line_outside_code_with_leading
+from remove_em_dash import EM_DASH, EN_DASH, process_line as replace_dashes_in_line
+from remove_rule import should_remove_as_hr
+from gitscope import GitScopeError, add_changed_since_argument, changed_paths
+from prefilter import RULES, applicable_rules, decode, parse_rules
+from mdcache import add_cache_argument, open_cache, transform_sources
+from backups import add_backup_arguments, close_backup, open_backup, restore_run, stash, stash_file
+from runner import add_jobs_argument, resolve_jobs, run_files
+from runprofile import add_profile_argument, open_profile, start_file
+from walk import SKIP_DIRS, iter_files, should_process
+from ziparchive import is_archive, process_archive
+from mdcheck import FAIL_FAST_MODES, check_file
+from mdstream import LineSink, LineSource
+from watch import add_watch_arguments, watch_files
+
+COUNTER_KEYS = ("bold", "em_dash", "removed_hr", "collapsed_blanks")
+
+def clean_lines(
+    lines: Iterable[str],
+    counts: Dict[str, int],
+    rules: Tuple[str, ...] = RULES,
+    skip_headings: bool = True,
+    skip_leading_bold: bool = True,
+    repl: str = "-",
+    also_en: bool = False,
+    keep_setext: bool = True,
+    collapse_blank_lines: bool = True,
+    front_matter: bool = True,
+) -> Iterator[str]:
+    """
+    Apply the selected rules to lines (without line endings) one at a time and
+    yield the output lines, adding to counts as it goes. Holds no more than the
+    current and previous line, so it can run over a streamed file.
+    front_matter=False treats a leading "---" as a thematic break, not front matter.
+    """
+    do_bold = "bold" in rules
+    do_dash = "em-dash" in rules
+    do_rule = "rule" in rules
+    prev_blank = False
+
+    for kind, line in iter_kinds(lines, front_matter):
+        if kind in PASSTHROUGH:
+            if do_rule:
+                prev_blank = not line.strip()
+            yield line
+            continue
+
+        # Inline rules: headings are left alone when requested. The membership
+        # tests skip the per-line split for lines with nothing to change.
+        if not (skip_headings and kind in HEADINGS):
+            if do_bold and ('*' in line or '_' in line or '<' in line):
+                line, ch = process_line_outside_code_with_leading(line, skip_leading_bold=skip_leading_bold)
+                counts["bold"] += ch
+            if do_dash and (EM_DASH in line or (also_en and EN_DASH in line)):
+                line, ch = replace_dashes_in_line(line, repl, also_en)
+                counts["em_dash"] += ch
+
+        # Line rules: drop horizontal rules, collapse blank runs
+        if do_rule:
+            if should_remove_as_hr(line, kind, keep_setext=keep_setext):
+                counts["removed_hr"] += 1
+                continue
+            blank = not line.strip()
+            if collapse_blank_lines and blank and prev_blank:
+                counts["collapsed_blanks"] += 1
+                continue
+            prev_blank = blank
+
+        yield line
+
+def clean_text(text: str, rules: Tuple[str, ...] = RULES, **options) -> Tuple[str, Dict[str, int]]:
+    """
+    Apply the selected rules to full Markdown text in one scan.
+    Returns (new_text, counters) with one counter per COUNTER_KEYS entry.
+    """
+    counts = dict.fromkeys(COUNTER_KEYS, 0)
+    out_lines = list(clean_lines(text.splitlines(keepends=False), counts, rules, **options))
+    trailing_nl = text.endswith('\n')
+    result = '\n'.join(out_lines) + ('\n' if trailing_nl else '')
+    return result, counts
+
+def format_counts(counts: Dict[str, int]) -> str:
+    return ", ".join(f"{k}={counts[k]}" for k in COUNTER_KEYS)
+
+def process_file(path: pathlib.Path, dry_run: bool, verbose: bool, backup: bool, rules: Tuple[str, ...], **options) -> Tuple[Dict[str, int], bool]:
+    prof = start_file(path)
+    data = path.read_bytes()
+    if prof:
+        prof.lap("read", len(data))
+    # Fast path: drop rules whose trigger bytes do not occur in the file
+    rules = applicable_rules(rules, data, options)
+    if not rules:
+        counts = dict.fromkeys(COUNTER_KEYS, 0)
+        if prof:
+            prof.lap("decode")
+        if verbose:
+            print(f"[OK ] {path}  ({format_counts(counts)})")
+        return counts, False
+    original = decode(data)
+    if prof:
+        prof.lap("decode")
+    new_text, counts = clean_text(original, rules=rules, **options)
+    if prof:
+        prof.lap("transform")
+    modified = (sum(counts.values()) > 0 and new_text != original)
+    if verbose:
+        print(f"[{'CHG' if modified else 'OK '}] {path}  ({format_counts(counts)})")
+    if modified and not dry_run:
+        if backup:
+            stash(path, data)
+        path.write_text(new_text, encoding='utf-8')
+        if prof:
+            prof.lap("write")
+    return counts, modified
+
+def process_file_stream(path: pathlib.Path, dry_run: bool, verbose: bool, backup: bool, rules: Tuple[str, ...], **options) -> Tuple[Dict[str, int], bool]:
+    """
+    process_file with bounded memory (--stream): lines are streamed through
+    clean_lines into a temp file that replaces the original only if it changed.
+    """
+    prof = start_file(path)
+    counts = dict.fromkeys(COUNTER_KEYS, 0)
+    sink = LineSink(path, dry_run)
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            source = LineSource(f)
+            for line in clean_lines(source, counts, rules, **options):
+                sink.write_line(line)
+            size = os.fstat(f.fileno()).st_size
+        result_digest = sink.finish(source.trailing_nl)
+        if prof:
+            prof.lap("transform", size)
+        modified = (sum(counts.values()) > 0 and result_digest != source.digest())
+        if verbose:
+            print(f"[{'CHG' if modified else 'OK '}] {path}  ({format_counts(counts)})")
+        if modified and not dry_run:
+            if backup:
+                stash_file(path)
+            sink.commit()
+            if prof:
+                prof.lap("write")
+    finally:
+        sink.discard()
+    return counts, modified
+
+def main():
+    ap = argparse.ArgumentParser(description="Strip bold, replace em dashes and remove horizontal rules from Markdown under docs/ in one pass.")
+    ap.add_argument("--path", default="docs", help="Root folder or .zip archive to scan (default: ./docs)")
+    ap.add_argument("--ext", nargs="*", default=[".md", ".markdown"], help="Markdown file extensions")
+    ap.add_argument("--rules", default=",".join(RULES),
+                    help=f"Comma-separated rules to apply (default: {','.join(RULES)})")
+    ap.add_argument("--dry-run", action="store_true", help="Show changes without writing")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    ap.add_argument("--include", action="append", default=[], help="Glob pattern to include (repeatable)")
+    ap.add_argument("--exclude", action="append", default=[], help="Glob pattern to exclude (repeatable)")
+    ap.add_argument("--skip-headings", dest="skip_headings", action="store_true", default=True,
+                    help="Skip heading lines (ATX/Setext) for bold and em-dash [default]")
+    ap.add_argument("--no-skip-headings", dest="skip_headings", action="store_false",
+                    help="Also process headings")
+    ap.add_argument("--skip-leading-bold", dest="skip_leading_bold", action="store_true", default=True,
+                    help="Preserve leading **bold**/__bold__ labels at start of line [default]")
+    ap.add_argument("--no-skip-leading-bold", dest="skip_leading_bold", action="store_false",
+                    help="Also strip leading bold labels at line start")
+    ap.add_argument("--replacement", default="-",
+                    help="Replacement string for em dashes (default: '-')")
+    ap.add_argument("--also-en-dash", dest="also_en", action="store_true", default=False,
+                    help="Also replace en dashes (–) with the same replacement")
+    ap.add_argument("--keep-setext", dest="keep_setext", action="store_true", default=True,
+                    help="Preserve Setext heading underlines (default)")
+    ap.add_argument("--no-keep-setext", dest="keep_setext", action="store_false",
+                    help="Also remove Setext underlines made of '-'")
+    ap.add_argument("--collapse-blank-lines", dest="collapse_blank_lines", action="store_true", default=True,
+                    help="Collapse consecutive blank lines into a single blank line (default)")
+    ap.add_argument("--no-collapse-blank-lines", dest="collapse_blank_lines", action="store_false",
+                    help="Do not collapse consecutive blank lines")
+    ap.add_argument("--stream", action="store_true",
+                    help="Stream each file line by line with bounded memory; rewrites go through a temp file and an atomic replace")
+    ap.add_argument("--check", action="store_true",
+                    help="Only report violations as path:line:col: rule (no rewriting); exit 1 if any")
+    ap.add_argument("--fail-fast", nargs="?", const="file", default=None, choices=FAIL_FAST_MODES,
+                    help="With --check: stop at the first violation per file (default) or for the whole run")
+    add_jobs_argument(ap)
+    add_changed_since_argument(ap)
+    add_cache_argument(ap, "cleanup")
+    add_backup_arguments(ap)
+    add_profile_argument(ap, "cleanup")
+    add_watch_arguments(ap)
+    args = ap.parse_args()
+    if args.restore:
+        sys.exit(restore_run(args.restore, args.backup_dir, args.verbose))
+
+    try:
+        rules = parse_rules(args.rules)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+    if args.watch and args.changed_since:
+        print("ERROR: --watch and --changed-since cannot be combined", file=sys.stderr)
+        sys.exit(2)
+
+    root = pathlib.Path(args.path).resolve()
+    zipped = is_archive(root)
+    if not zipped and (not root.exists() or not root.is_dir()):
+        print(f"ERROR: Path not found or not a directory or zip archive: {root}", file=sys.stderr)
+        sys.exit(2)
+    if zipped and (args.changed_since or args.watch):
+        print("ERROR: --changed-since and --watch need a folder, not a zip archive", file=sys.stderr)
+        sys.exit(2)
+
+    options = dict(
+        skip_headings=args.skip_headings,
+        skip_leading_bold=args.skip_leading_bold,
+        repl=args.replacement,
+        also_en=args.also_en,
+        keep_setext=args.keep_setext,
+        collapse_blank_lines=args.collapse_blank_lines,
+    )
+
+    total_files = total_mod = total_cached = total_violations = 0
+    totals = dict.fromkeys(COUNTER_KEYS, 0)
+    profile = open_profile(args.profile, "cleanup", resolve_jobs(args.jobs))
+    archive = open_backup(args.backup, args.backup_dir, "cleanup")
+
+    changed = None
+    if args.changed_since:
+        try:
+            changed = changed_paths(root, args.changed_since, args.ext, SKIP_DIRS)
+        except GitScopeError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(2)
+
+    if changed is not None:
+        candidates = (p for p in changed if should_process(p, args.include, args.exclude))
+    else:
+        candidates = iter_files(root, args.ext, args.include, args.exclude)
+    if profile:
+        candidates = profile.timed(candidates)
+
+    if args.check:
+        worker = partial(check_file, verbose=args.verbose, fail_fast=args.fail_fast, rules=rules, **options)
+    else:
+        worker = partial(
+            process_file_stream if args.stream and not zipped else process_file,  # members are in memory anyway
+            dry_run=args.dry_run,
+            verbose=args.verbose,
+            backup=args.backup and not zipped,  # a zip archive is backed up whole
+            rules=rules,
+            **options,
+        )
+    if args.watch:
+        def on_save(path: pathlib.Path) -> None:
+            counts, modified = worker(path)
+            if modified and not (args.verbose or args.check):
+                print(f"[CHG] {path}  ({format_counts(counts)})")
+        watch_files(root, args.ext, args.include, args.exclude, on_save, debounce=args.debounce / 1000,
+                    force_polling=args.poll, poll_interval=args.poll_interval, verbose=args.verbose)
+        close_backup(archive)
+        return
+
+    sources = transform_sources(__file__, *(sys.modules[m].__file__ for m in ("remove_bold", "remove_em_dash", "remove_rule", "mdcheck", "mdstream")))
+    cache = open_cache(None if zipped else args.cache, "cleanup", dict(options, rules=list(rules)), sources=sources)
+    if zipped:
+        results = process_archive(root, worker, args.ext, args.include, args.exclude,
+                                  write=not (args.dry_run or args.check), backup=args.backup)
+    else:
+        results = run_files(worker, candidates, jobs=args.jobs, cache=cache, verbose=args.verbose)
+    for result in results:
+        total_files += 1
+        if result is None:
+            total_cached += 1
+            continue
+        if args.check:
+            count, failed = result
+            total_violations += count
+            total_mod += 1 if failed else 0
+            if failed and args.fail_fast == "run":
+                break
+            continue
+        counts, modified = result
+        for k in COUNTER_KEYS:
+            totals[k] += counts[k]
+        total_mod += 1 if modified else 0
+
+    if args.check:
+        cached = f" | Cached: {total_cached}" if cache else ""
+        print(f"\nChecked: {total_files} files | Files with violations: {total_mod} | Violations: {total_violations} | "
+              f"Rules: {','.join(rules)}{cached}")
+    elif args.verbose or args.dry_run:
+        cached = f" | Cached: {total_cached}" if cache else ""
+        print(f"\nScanned: {total_files} files | Modified: {total_mod} | Bold: {totals['bold']} | "
+              f"Em dashes: {totals['em_dash']} | Rules removed: {totals['removed_hr']} | "
+              f"Blank lines collapsed: {totals['collapsed_blanks']} | Rules: {','.join(rules)}{cached} | Dry-run: {args.dry_run}")
+    close_backup(archive)
+    if cache:
+        cache.save()
+    if profile:
+        profile.finish(args.profile_top)
+    # CI gate: non-zero if changes would occur
+    if (args.dry_run or args.check) and total_mod > 0:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
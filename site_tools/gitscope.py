@@ -0,0 +1,75 @@
+"""
+gitscope.py — Limit a site_tools run to the Markdown files changed since a git ref.
+
+Asks the local repository for files added, modified or renamed between the
+merge base of <ref> and HEAD plus the working tree, and for untracked files.
+Renames report the new path; deleted files are dropped. Callers still apply
+their own should_process include/exclude filtering.
+
+Used by --changed-since <ref>, e.g. in the CI pr-check job:
+  python site_tools/cleanup.py --path docs --dry-run --changed-since origin/main
+"""
+
+from __future__ import annotations
+import argparse
+import pathlib
+from typing import Iterable, List, Set
+
+class GitScopeError(RuntimeError):
+    pass
+
+def add_changed_since_argument(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--changed-since", metavar="REF", default=None,
+                    help="Only process files added/modified since the merge base with REF (e.g. origin/main)")
+
+def _git(cwd: pathlib.Path, *args: str) -> str:
+    import subprocess  # only runs with --changed-since; keeps script startup light
+    try:
+        proc = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, encoding='utf-8')
+    except OSError as e:
+        raise GitScopeError(f"git not available: {e}") from e
+    if proc.returncode != 0:
+        raise GitScopeError(f"git {' '.join(args)} failed: {proc.stderr.strip()}")
+    return proc.stdout
+
+def _parse_name_status(out: str) -> List[str]:
+    """Parse `git diff --name-status -z` output into the current path of each A/M/R/C entry."""
+    fields = out.split('\0')
+    paths: List[str] = []
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i]
+        if status[0] in "RC":  # rename/copy: status, old path, new path
+            paths.append(fields[i + 2])
+            i += 3
+        else:
+            if status[0] in "AM":
+                paths.append(fields[i + 1])
+            i += 2
+    return paths
+
+def changed_paths(root: pathlib.Path, ref: str, exts: Iterable[str], skip_dirs: Set[str]) -> List[pathlib.Path]:
+    """
+    Return existing files under root with one of exts that changed since the merge
+    base of ref and HEAD (committed, staged, unstaged or untracked), sorted by path.
+    """
+    top = pathlib.Path(_git(root, "rev-parse", "--show-toplevel").strip()).resolve()
+    base = _git(top, "merge-base", ref, "HEAD").strip()
+    try:
+        scope = root.relative_to(top).as_posix() if root != top else "."
+    except ValueError:
+        raise GitScopeError(f"{root} is not inside the git work tree {top}") from None
+    diff = _git(top, "diff", "--name-status", "-z", "-M", "--diff-filter=ACMR", base, "--", scope)
+    untracked = _git(top, "ls-files", "-z", "--others", "--exclude-standard", "--", scope)
+
+    exts = {e.lower() for e in exts}
+    found = set()
+    for rel in _parse_name_status(diff) + [p for p in untracked.split('\0') if p]:
+        p = top / rel
+        if p.suffix.lower() not in exts:
+            continue
+        if skip_dirs.intersection(p.relative_to(root).parts[:-1]):
+            continue
+        if p.is_file():  # also drops files deleted in the working tree
+            found.add(p)
+    return sorted(found)
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+linkcheck.py — Check relative links, #anchors, nav entries and redirects in ./docs without building the site
+
+Scans every Markdown page in parallel (--jobs) and builds an in-memory index of
+page paths and the anchors each page defines, then checks against that index:
+
+- every relative link and image ([text](target), ![alt](src), [ref]: target):
+  the page or file must exist under docs/, and a #fragment must be an anchor of
+  the target page (or of the same page for "#fragment" links),
+- every nav: entry in mkdocs.yml (with --config), every redirect_maps target of
+  the redirects plugin, and the local extra_css / extra_javascript files.
+
+Anchors follow Python-Markdown's toc extension, which MkDocs Material uses:
+- headings are slugified like toc's default slugify (or slugify_unicode /
+  pymdownx uslugify when mkdocs.yml configures it, and toc's separator),
+- {#id} attribute lists (attr_list) override a heading's slug and also define
+  anchors on other blocks; raw HTML id="..." / name="..." define anchors too,
+- a repeated slug gets "_1", "_2", ... like toc's unique(),
+- footnotes define fn:<label> and fnref:<label>.
+
+Front matter, fenced code and inline code spans are skipped (mdblocks.py).
+External URLs (http:, mailto:, ...) and site-absolute /paths are not checked.
+
+mkdocs.yml is read with a tolerant YAML loader: !!python/name:... and other
+python tags become their dotted name, and !ENV / !relative tags their value.
+
+Each problem prints as "path:line:col: rule: message".
+
+--baseline FILE lists known problems, one "path: rule: message" per line
+(without line and column, so edits around them do not matter). Problems in it
+are counted but not printed (-v prints them), and only new ones fail the run;
+entries that no longer occur are reported so the file can shrink.
+--update-baseline rewrites FILE with the current problems.
+
+Usage:
+  python linkcheck.py
+  python linkcheck.py --path docs --config mkdocs.yml -v
+  python linkcheck.py --jobs 0
+  python linkcheck.py --no-config
+  python linkcheck.py --profile --profile-top 20
+  python linkcheck.py --baseline site_tools/linkcheck_baseline.txt
+  python linkcheck.py --baseline site_tools/linkcheck_baseline.txt --update-baseline
+
+Exit codes:
+  0 when every link resolves
+  1 when broken links, anchors, nav entries or redirects were found
+    (with --baseline: only ones not listed in it)
+  2 on an invalid path, an unreadable mkdocs.yml or an unreadable baseline
+"""
+
+from __future__ import annotations
+import argparse
+import html
+import os
+import pathlib
+import posixpath
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter
+from functools import partial
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+from urllib.parse import unquote
+
+import yaml
+
+from prefilter import decode
+from runner import add_jobs_argument, resolve_jobs, run_files
+from runprofile import add_profile_argument, open_profile, start_file
+from walk import SKIP_DIRS, iter_files, should_process
+from mdblocks import ATX_HEADING, INLINE_CODE_SPLIT_RE, PASSTHROUGH, SETEXT_UNDERLINE, scan_lines
+
+# [text](target "title") and ![alt](src); one level of nested brackets in the text
+LINK_RE = re.compile(
+    r'(!?)\[((?:[^\[\]]|\[[^\]]*\])*)\]'
+    r'\(\s*(<[^>]*>|[^\s()]*(?:\([^\s()]*\)[^\s()]*)*)(?:\s+(?:"[^"]*"|\'[^\']*\'|\([^)]*\)))?\s*\)'
+)
+REF_DEF_RE = re.compile(r'^ {0,3}\[([^\]^][^\]]*)\]:\s*(<[^>]*>|\S+)')
+FOOTNOTE_DEF_RE = re.compile(r'^ {0,3}\[\^([^\]]+)\]:')
+ATTR_LIST_RE = re.compile(r'(?:^|\s)\{:?\s*([^}]*)\}')
+ATTR_ID_RE = re.compile(r'(?:^|\s)#([^\s}]+)')
+HEADING_ATTR_RE = re.compile(r'\s+\{:?\s*([^}]*)\}\s*$')
+HTML_ID_RE = re.compile(r'<[A-Za-z][^>]*?\s(?:id|name)\s*=\s*["\']([^"\']+)["\']')
+ATX_PREFIX_RE = re.compile(r'^\s*#{1,6}\s+')
+LIST_HEADING_RE = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+#{1,6}\s+')    # "- # Title": a heading inside a list item
+ATX_CLOSING_RE = re.compile(r'(?:^|\s+)#+\s*$')
+SCHEME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:')
+
+# Inline markup removed before slugifying, like toc slugifies the rendered heading text
+_IMAGE_RE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_LINK_TEXT_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)|\[([^\]]*)\]\[[^\]]*\]')
+_TAG_RE = re.compile(r'<[^>]+>')
+_EMPHASIS_RE = re.compile(r'\*+|~~|==|\^\^|(?<!\w)_+|_+(?!\w)')
+
+INDEX_NAMES = ("index.md", "README.md")
+
+class Link(NamedTuple):
+    line: int        # 1-based
+    col: int         # 1-based
+    target: str
+
+class PageScan(NamedTuple):
+    anchors: List[str]
+    links: List[Link]
+
+class Problem(NamedTuple):
+    path: str
+    line: int
+    col: int
+    rule: str
+    message: str
+
+# --- slugs -----------------------------------------------------------------------
+
+def slugify(value: str, separator: str = "-", unicode: bool = False) -> str:
+    """markdown.extensions.toc.slugify (unicode=True: slugify_unicode)."""
+    if not unicode:
+        value = unicodedata.normalize('NFKD', value)
+        value = value.encode('ascii', 'ignore').decode('ascii')
+    value = re.sub(r'[^\w\s-]', '', value).strip().lower()
+    return re.sub(r'[{}\s]+'.format(re.escape(separator)), separator, value)
+
+def unique(slug: str, used: Set[str]) -> str:
+    """toc's unique(): append _1, _2, ... until the id is unused."""
+    while slug in used or not slug:
+        m = re.match(r'^(.*)_([0-9]+)$', slug)
+        slug = f"{m.group(1)}_{int(m.group(2)) + 1}" if m else f"{slug}_1"
+    used.add(slug)
+    return slug
+
+def heading_text(markdown: str) -> str:
+    """Plain text of a heading's inline Markdown, as toc sees it after rendering."""
+    parts = INLINE_CODE_SPLIT_RE.split(markdown)
+    for i, seg in enumerate(parts):
+        if i % 2:
+            parts[i] = seg.strip('`').strip()  # code spans keep their text as written
+            continue
+        seg = _IMAGE_RE.sub('', seg)
+        seg = _LINK_TEXT_RE.sub(lambda m: m.group(1) if m.group(1) is not None else m.group(2), seg)
+        seg = _TAG_RE.sub('', seg)
+        parts[i] = html.unescape(_EMPHASIS_RE.sub('', seg))
+    return ''.join(parts)
+
+def split_heading(raw: str) -> Tuple[str, Optional[str]]:
+    """(heading Markdown, explicit {#id} or None) for the text of an ATX/Setext heading."""
+    text = raw.strip()
+    explicit = None
+    m = HEADING_ATTR_RE.search(text)
+    if m:
+        ids = ATTR_ID_RE.findall(m.group(1))
+        explicit = ids[-1] if ids else None
+        text = text[:m.start()]
+    text = ATX_CLOSING_RE.sub('', text)
+    return text.strip(), explicit
+
+# --- per-page scan (pool workers) --------------------------------------------------
+
+def _link_target(raw: str) -> str:
+    raw = raw.strip()
+    if raw.startswith('<') and raw.endswith('>'):
+        raw = raw[1:-1]
+    return raw
+
+def scan_page(text: str, separator: str = "-", unicode: bool = False) -> PageScan:
+    """Anchors defined by a page and the links it contains (outside front matter and code)."""
+    lines = text.splitlines(keepends=False)
+    index = scan_lines(lines)
+    headings: List[Tuple[str, Optional[str]]] = []
+    explicit: Set[str] = set()
+    other: List[str] = []
+    links: List[Link] = []
+
+    for ln, kind in index.lines_of(PASSTHROUGH):
+        line = lines[ln]
+        parts = index.segments(ln, line)
+        if kind == ATX_HEADING:
+            headings.append(split_heading(ATX_PREFIX_RE.sub('', line, count=1)))
+        elif kind == SETEXT_UNDERLINE:
+            # Python-Markdown only takes a one-line paragraph as a Setext heading
+            if ln < 2 or not lines[ln - 2].strip():
+                headings.append(split_heading(lines[ln - 1]))
+            continue
+        elif not line.strip():
+            continue
+        else:
+            m = LIST_HEADING_RE.match(line) if '#' in line else None
+            if m:
+                headings.append(split_heading(line[m.end():]))
+            m = FOOTNOTE_DEF_RE.match(line)
+            if m:
+                other.append(f"fn:{m.group(1)}")
+            m = REF_DEF_RE.match(line)
+            if m:
+                links.append(Link(ln + 1, m.start(2) + 1, _link_target(m.group(2))))
+                continue
+        col = 0
+        for i, seg in enumerate(parts):
+            if i % 2 == 0:  # even indices are outside code
+                if '](' in seg:
+                    for m in LINK_RE.finditer(seg):
+                        links.append(Link(ln + 1, col + m.start(3) + 1, _link_target(m.group(3))))
+                if '{' in seg and kind != ATX_HEADING:
+                    for m in ATTR_LIST_RE.finditer(seg):
+                        explicit.update(ATTR_ID_RE.findall(m.group(1)))
+                if '<' in seg:
+                    other.extend(HTML_ID_RE.findall(seg))
+                if '[^' in seg:
+                    other.extend(f"fnref:{label}" for label in re.findall(r'\[\^([^\]]+)\](?!:)', seg))
+            col += len(seg)
+
+    # Like toc: explicit ids are reserved first, then headings get unique slugs in order
+    used = set(explicit) | {e for _, e in headings if e}
+    anchors = list(explicit) + other
+    for markdown, custom in headings:
+        anchors.append(custom if custom else unique(slugify(heading_text(markdown), separator, unicode), used))
+    return PageScan(anchors, links)
+
+def process_file(path: pathlib.Path, verbose: bool, separator: str, unicode: bool) -> PageScan:
+    prof = start_file(path)
+    data = path.read_bytes()
+    if prof:
+        prof.lap("read", len(data))
+    text = decode(data)
+    if prof:
+        prof.lap("decode")
+    page = scan_page(text, separator, unicode)
+    if prof:
+        prof.lap("transform")
+    if verbose:
+        print(f"[OK ] {path}  (anchors={len(page.anchors)}, links={len(page.links)})")
+    return page
+
+# --- mkdocs.yml ----------------------------------------------------------------------
+
+def load_config(path: pathlib.Path) -> dict:
+    """Parse mkdocs.yml, keeping python/name and custom tags instead of failing on them."""
+    class TolerantLoader(yaml.SafeLoader):
+        pass
+
+    def python_tag(loader, suffix, node):
+        # !!python/name:pkg.mod.func -> "pkg.mod.func"
+        return suffix.split(':', 1)[-1]
+
+    def custom_tag(loader, suffix, node):
+        if isinstance(node, yaml.ScalarNode):
+            return loader.construct_scalar(node)
+        if isinstance(node, yaml.SequenceNode):
+            return loader.construct_sequence(node)
+        return loader.construct_mapping(node)
+
+    TolerantLoader.add_multi_constructor('tag:yaml.org,2002:python/', python_tag)
+    TolerantLoader.add_multi_constructor('!', custom_tag)
+    with open(path, encoding='utf-8') as f:
+        config = yaml.load(f, Loader=TolerantLoader)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path}: not a YAML mapping")
+    return config
+
+def toc_options(config: dict) -> Tuple[str, bool]:
+    """(separator, unicode) of the toc extension configured in mkdocs.yml."""
+    for ext in config.get("markdown_extensions") or []:
+        if isinstance(ext, dict) and "toc" in ext:
+            opts = ext["toc"] or {}
+            name = str(opts.get("slugify") or "")
+            return str(opts.get("separator", "-")), ("unicode" in name or "uslugify" in name)
+    return "-", False
+
+def iter_nav(nav) -> Iterator[str]:
+    """Every page path or URL in a nav: tree."""
+    if isinstance(nav, str):
+        yield nav
+    elif isinstance(nav, list):
+        for item in nav:
+            yield from iter_nav(item)
+    elif isinstance(nav, dict):
+        for value in nav.values():
+            yield from iter_nav(value)
+
+def redirect_maps(config: dict) -> Dict[str, str]:
+    for plugin in config.get("plugins") or []:
+        if isinstance(plugin, dict) and "redirects" in plugin:
+            return dict((plugin["redirects"] or {}).get("redirect_maps") or {})
+    return {}
+
+def _config_line(config_lines: Sequence[str], value: str) -> int:
+    """1-based line of the first mkdocs.yml line that mentions value (0 if none)."""
+    for i, line in enumerate(config_lines, 1):
+        if value in line:
+            return i
+    return 0
+
+# --- checking ----------------------------------------------------------------------
+
+class SiteIndex:
+    """Pages with their anchors, and every other file under docs/ (posix paths relative to docs/)."""
+
+    def __init__(self, pages: Dict[str, Set[str]], files: Set[str]):
+        self.pages = pages
+        self.files = files
+        self.dirs = {posixpath.dirname(p) for p in files}
+        for d in list(self.dirs):
+            while d:
+                d = posixpath.dirname(d)
+                self.dirs.add(d)
+
+    def resolve(self, source: str, target: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (page or file the link points to, problem message or None). source is
+        the linking page; the result is None for links this checker leaves alone.
+        """
+        if SCHEME_RE.match(target) or target.startswith('//'):
+            return None, None
+        path, _, fragment = target.partition('#')
+        path = unquote(path.split('?', 1)[0])
+        if path.startswith('/'):
+            return None, None
+        if not path:
+            page = source
+        else:
+            resolved = posixpath.normpath(posixpath.join(posixpath.dirname(source), path))
+            if resolved == '..' or resolved.startswith('../'):
+                return None, f"points outside the docs folder: {target}"
+            if resolved in self.pages or resolved in self.files:
+                page = resolved
+            elif resolved in self.dirs or resolved == '.':
+                base = '' if resolved == '.' else resolved + '/'
+                page = next((base + n for n in INDEX_NAMES if base + n in self.pages), None)
+                if page is None:
+                    return None, f"folder without an index page: {path}"
+            else:
+                return None, f"target not found: {resolved}"
+        fragment = unquote(fragment)
+        if fragment and page in self.pages and fragment not in self.pages[page]:
+            return page, f"anchor #{fragment} not found in {page}"
+        return page, None
+
+def check_pages(site: SiteIndex, scans: Dict[str, PageScan], root_label: str) -> Iterator[Problem]:
+    for source, page in scans.items():
+        for link in page.links:
+            _, problem = site.resolve(source, link.target)
+            if problem:
+                rule = "broken-anchor" if problem.startswith("anchor") else "broken-link"
+                yield Problem(f"{root_label}/{source}", link.line, link.col, rule, problem)
+
+def check_config(site: SiteIndex, config: dict, config_path: str, config_lines: Sequence[str]) -> Iterator[Problem]:
+    for entry in iter_nav(config.get("nav") or []):
+        if SCHEME_RE.match(entry) or entry.startswith('/'):
+            continue
+        if entry.split('#', 1)[0] not in site.pages:
+            yield Problem(config_path, _config_line(config_lines, entry), 1, "nav", f"page not found: {entry}")
+
+    for old, new in redirect_maps(config).items():
+        line = _config_line(config_lines, old)
+        if old in site.pages:
+            yield Problem(config_path, line, 1, "redirect", f"redirect source is an existing page: {old}")
+        _, problem = site.resolve("", str(new))
+        if problem:
+            yield Problem(config_path, line, 1, "redirect", f"{old} -> {problem}")
+
+    for key in ("extra_css", "extra_javascript"):
+        for entry in config.get(key) or []:
+            entry = entry.get("path", "") if isinstance(entry, dict) else str(entry)
+            if entry and not SCHEME_RE.match(entry) and not entry.startswith('//') and entry not in site.files:
+                yield Problem(config_path, _config_line(config_lines, entry), 1, key, f"file not found: {entry}")
+
+def list_files(root: pathlib.Path) -> Set[str]:
+    """Every file under root as a posix path relative to it."""
+    out: Set[str] = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        rel = os.path.relpath(dirpath, root)
+        rel = '' if rel == '.' else pathlib.Path(rel).as_posix() + '/'
+        out.update(rel + name for name in filenames)
+    return out
+
+def baseline_key(p: Problem) -> str:
+    """A problem as it is listed in a --baseline file: no line or column."""
+    return f"{p.path}: {p.rule}: {p.message}"
+
+def read_baseline(path: pathlib.Path) -> Counter:
+    """Known problems of a --baseline file, counted (a page may hold the same broken link twice)."""
+    known: Counter = Counter()
+    for line in path.read_text(encoding='utf-8').splitlines():
+        line = line.strip()
+        if line and not line.startswith('#'):
+            known[line] += 1
+    return known
+
+def write_baseline(path: pathlib.Path, problems: Sequence[Problem]) -> None:
+    lines = sorted(baseline_key(p) for p in problems)
+    header = ("# Known linkcheck problems; only problems not listed here fail the check.\n"
+              "# Regenerate with: python site_tools/linkcheck.py --baseline FILE --update-baseline\n")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(header + ''.join(line + '\n' for line in lines), encoding='utf-8')
+
+def main():
+    ap = argparse.ArgumentParser(description="Check relative links, anchors, nav entries and redirects of the Markdown under docs/.")
+    ap.add_argument("--path", default=None, help="Docs folder (default: docs_dir from --config, else ./docs)")
+    ap.add_argument("--config", default="mkdocs.yml", help="MkDocs config whose nav/redirects to check (default: mkdocs.yml)")
+    ap.add_argument("--no-config", dest="config", action="store_const", const=None, help="Only check the links inside the pages")
+    ap.add_argument("--ext", nargs="*", default=[".md", ".markdown"], help="Markdown file extensions")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    ap.add_argument("--include", action="append", default=[], help="Glob pattern of pages whose links are checked (repeatable)")
+    ap.add_argument("--exclude", action="append", default=[], help="Glob pattern of pages whose links are not checked (repeatable)")
+    ap.add_argument("--baseline", default=None, metavar="FILE", help="Known problems (path: rule: message per line); only new problems fail")
+    ap.add_argument("--update-baseline", action="store_true", help="With --baseline: rewrite FILE with the current problems and exit 0")
+    add_jobs_argument(ap)
+    add_profile_argument(ap, "linkcheck")
+    args = ap.parse_args()
+    started = time.perf_counter()
+    if args.update_baseline and not args.baseline:
+        ap.error("--update-baseline needs --baseline FILE")
+
+    known: Counter = Counter()
+    if args.baseline and not args.update_baseline:
+        try:
+            known = read_baseline(pathlib.Path(args.baseline))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"ERROR: cannot read baseline {args.baseline}: {e}", file=sys.stderr)
+            sys.exit(2)
+
+    config: Optional[dict] = None
+    config_lines: List[str] = []
+    if args.config:
+        config_path = pathlib.Path(args.config)
+        if config_path.is_file():
+            try:
+                config = load_config(config_path)
+                config_lines = config_path.read_text(encoding='utf-8').splitlines()
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                print(f"ERROR: cannot read {config_path}: {e}", file=sys.stderr)
+                sys.exit(2)
+        elif args.config != ap.get_default("config"):
+            print(f"ERROR: Config not found: {config_path}", file=sys.stderr)
+            sys.exit(2)
+
+    docs_dir = args.path or (config or {}).get("docs_dir") or "docs"
+    if config is not None and not args.path:
+        docs_dir = str(pathlib.Path(args.config).parent / docs_dir)
+    root = pathlib.Path(docs_dir).resolve()
+    if not root.exists() or not root.is_dir():
+        print(f"ERROR: Path not found or not a directory: {root}", file=sys.stderr)
+        sys.exit(2)
+    separator, unicode = toc_options(config or {})
+
+    profile = open_profile(args.profile, "linkcheck", resolve_jobs(args.jobs))
+    # Every page is indexed (links may point anywhere); --include/--exclude only narrow which pages are checked
+    candidates = iter_files(root, args.ext)
+    if profile:
+        candidates = profile.timed(candidates)
+    paths = list(candidates)
+
+    worker = partial(process_file, verbose=args.verbose, separator=separator, unicode=unicode)
+    scans: Dict[str, PageScan] = {}
+    pages: Dict[str, Set[str]] = {}
+    for path, page in zip(paths, run_files(worker, paths, jobs=args.jobs, verbose=args.verbose)):
+        rel = path.relative_to(root).as_posix()
+        pages[rel] = set(page.anchors)
+        if should_process(path, args.include, args.exclude):
+            scans[rel] = page
+
+    site = SiteIndex(pages, list_files(root))
+    problems = list(check_pages(site, scans, os.path.relpath(root).replace(os.sep, '/')))
+    if config is not None:
+        problems.extend(check_config(site, config, args.config, config_lines))
+    if args.update_baseline:
+        write_baseline(pathlib.Path(args.baseline), problems)
+
+    unmatched = known.copy()
+    new: List[Problem] = []
+    for p in problems:
+        key = baseline_key(p)
+        if unmatched[key] > 0:
+            unmatched[key] -= 1
+            if args.verbose:
+                print(f"{p.path}:{p.line}:{p.col}: {p.rule}: {p.message} (known)")
+        else:
+            new.append(p)
+            print(f"{p.path}:{p.line}:{p.col}: {p.rule}: {p.message}")
+    fixed = sorted(unmatched.elements())
+    if fixed:
+        print(f"\n{len(fixed)} baseline entr{'y' if len(fixed) == 1 else 'ies'} no longer reported; "
+              f"remove from {args.baseline} or run --update-baseline:")
+        for key in fixed:
+            print(f"  {key}")
+
+    anchors = sum(len(a) for a in pages.values())
+    links = sum(len(s.links) for s in scans.values())
+    nav = sum(1 for _ in iter_nav((config or {}).get("nav") or []))
+    summary = f"Problems: {len(problems)}"
+    if args.baseline and not args.update_baseline:
+        summary += f" ({len(problems) - len(new)} known, {len(new)} new)"
+    print(f"\nPages: {len(pages)} | Anchors: {anchors} | Links: {links} | Nav entries: {nav} | "
+          f"{summary} | {time.perf_counter() - started:.2f} s")
+    if args.update_baseline:
+        print(f"Baseline written: {args.baseline} ({len(problems)} entries)")
+    if profile:
+        profile.finish(args.profile_top)
+    sys.exit(1 if new and not args.update_baseline else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+mdblocks.py — Shared Markdown block-structure tokenizer for the site_tools scripts.
+
+Scans a document once and returns a BlockIndex: a compact list of line spans
+(front matter, fenced code, ATX heading, Setext underline, prose) plus the
+inline code-span offsets of every line outside front matter and fences.
+Transforms only visit the spans they care about and reuse the code-span offsets
+instead of re-running INLINE_CODE_SPLIT_RE per line.
+
+The rules are the ones the scripts have always used:
+- Front matter: a "---" first line up to the next "---" line (inclusive).
+- Fences: ``` or ~~~ runs of 3+; a fence closes on the same character with at least the same length.
+- ATX heading: "#" to "######" followed by whitespace.
+- Setext underline: a "===" or "---" line whose previous line is not blank
+  (and is not front matter).
+
+iter_kinds() applies the same rules to a line iterator without holding the
+document, for the streaming mode (cleanup.py --stream).
+
+A BlockIndex round-trips through to_dict()/from_dict() (plain JSON types), so it
+can be cached per file hash; see cached_scan().
+"""
+
+from __future__ import annotations
+import hashlib
+import itertools
+import json
+import os
+import pathlib
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+FENCE_RE = re.compile(r'^\s*([`~]{3,})(.*)$')                     # start/end of fenced code block
+INLINE_CODE_SPLIT_RE = re.compile(r'(`+[^`]*`+)')                 # split keeping inline code spans
+FRONT_MATTER_DELIM = re.compile(r'^\s*---\s*$')
+ATX_HEADING_RE = re.compile(r'^\s*#{1,6}\s+')
+SETEXT_UNDERLINE_RE = re.compile(r'^\s*(=+|-+)\s*$')
+
+FRONT_MATTER = "front_matter"
+FENCE = "fence"                  # fence delimiter lines and everything between them
+ATX_HEADING = "atx_heading"
+SETEXT_UNDERLINE = "setext_underline"
+PROSE = "prose"
+
+PASSTHROUGH = frozenset({FRONT_MATTER, FENCE})
+HEADINGS = frozenset({ATX_HEADING, SETEXT_UNDERLINE})
+
+INDEX_VERSION = 2
+
+# (kind, first line, end line exclusive)
+Span = Tuple[str, int, int]
+
+class BlockIndex:
+    __slots__ = ("line_count", "spans", "code_spans")
+
+    def __init__(self, line_count: int, spans: List[Span], code_spans: Dict[int, List[Tuple[int, int]]]):
+        self.line_count = line_count
+        self.spans = spans
+        self.code_spans = code_spans
+
+    def lines_of(self, skip: frozenset = PASSTHROUGH) -> Iterator[Tuple[int, str]]:
+        """Yield (line number, kind) for every line whose kind is not in skip, in order."""
+        for kind, start, end in self.spans:
+            if kind in skip:
+                continue
+            for ln in range(start, end):
+                yield ln, kind
+
+    def segments(self, ln: int, line: str) -> List[str]:
+        """
+        Split line like INLINE_CODE_SPLIT_RE.split(line): text outside code spans at
+        even indices, code spans at odd indices.
+        """
+        offsets = self.code_spans.get(ln)
+        if not offsets:
+            return [line]
+        parts: List[str] = []
+        pos = 0
+        for start, end in offsets:
+            parts.append(line[pos:start])
+            parts.append(line[start:end])
+            pos = end
+        parts.append(line[pos:])
+        return parts
+
+    def to_dict(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "lines": self.line_count,
+            "spans": [list(s) for s in self.spans],
+            "code": {str(ln): [o for pair in offs for o in pair] for ln, offs in self.code_spans.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BlockIndex":
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported block index version: {data.get('version')}")
+        code = {int(ln): list(zip(flat[::2], flat[1::2])) for ln, flat in data["code"].items()}
+        return cls(data["lines"], [tuple(s) for s in data["spans"]], code)
+
+def _code_offsets(line: str) -> List[Tuple[int, int]]:
+    return [m.span() for m in INLINE_CODE_SPLIT_RE.finditer(line)]
+
+def iter_kinds(lines: Iterable[str], front_matter: bool = True) -> Iterator[Tuple[str, str]]:
+    """
+    Classify lines one at a time and yield (kind, line). Needs no look-ahead, only
+    the previous line and the fence state, so it also works on a streamed file.
+    With front_matter=False a leading "---" is not taken as front matter (for
+    text that already had it removed, like the Markdown MkDocs hands to hooks).
+    """
+    it = iter(lines)
+    prev = None
+    if front_matter:
+        for line in it:
+            if FRONT_MATTER_DELIM.match(line or ''):
+                # prev stays None: the closing "---" is no paragraph a Setext underline could follow
+                yield FRONT_MATTER, line
+                for line in it:
+                    yield FRONT_MATTER, line
+                    if FRONT_MATTER_DELIM.match(line):
+                        break
+            else:
+                it = itertools.chain((line,), it)
+            break
+
+    in_fence = False
+    fence_marker = None
+    for line in it:
+        # The first non-blank character decides which regexes can possibly match
+        first = line.lstrip()[:1]
+
+        if first in ('`', '~'):
+            m = FENCE_RE.match(line)
+            if m:
+                marker = m.group(1)
+                if not in_fence:
+                    in_fence = True
+                    fence_marker = marker
+                elif marker[0] == fence_marker[0] and len(marker) >= len(fence_marker):
+                    in_fence = False
+                    fence_marker = None
+                yield FENCE, line
+                prev = line
+                continue
+
+        if in_fence:
+            kind = FENCE
+        elif first == '#' and ATX_HEADING_RE.match(line):
+            kind = ATX_HEADING
+        elif first in ('=', '-') and prev is not None and SETEXT_UNDERLINE_RE.match(line) and prev.strip():
+            kind = SETEXT_UNDERLINE
+        else:
+            kind = PROSE
+        yield kind, line
+        prev = line
+
+def scan_lines(lines: Sequence[str]) -> BlockIndex:
+    """Classify every line once and return the merged span index."""
+    spans: List[Span] = []
+    code_spans: Dict[int, List[Tuple[int, int]]] = {}
+    last = None
+    ln = -1
+    for ln, (kind, line) in enumerate(iter_kinds(lines)):
+        if kind == last:
+            continue
+        if last is not None:
+            spans[-1] = (last, spans[-1][1], ln)
+        spans.append((kind, ln, ln))
+        last = kind
+    if spans:
+        spans[-1] = (last, spans[-1][1], ln + 1)
+
+    for kind, start, end in spans:
+        if kind in PASSTHROUGH:
+            continue
+        for i in range(start, end):
+            if '`' in lines[i]:
+                offsets = _code_offsets(lines[i])
+                if offsets:
+                    code_spans[i] = offsets
+
+    return BlockIndex(len(lines), spans, code_spans)
+
+def scan(text: str) -> BlockIndex:
+    return scan_lines(text.splitlines(keepends=False))
+
+def cached_scan(text: str, cache_dir: Optional[pathlib.Path]) -> BlockIndex:
+    """
+    scan(text), memoized on disk as <cache_dir>/<sha256 of text>.json.
+    With cache_dir None this is a plain scan().
+    """
+    if cache_dir is None:
+        return scan(text)
+    digest = hashlib.sha256(text.encode('utf-8', errors='surrogatepass')).hexdigest()
+    entry = cache_dir / f"{digest}.json"
+    try:
+        return BlockIndex.from_dict(json.loads(entry.read_text(encoding='utf-8')))
+    except (OSError, ValueError, KeyError):
+        pass
+    index = scan(text)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(index.to_dict(), separators=(',', ':')), encoding='utf-8')
+    os.replace(tmp, entry)
+    return index
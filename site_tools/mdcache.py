@@ -0,0 +1,117 @@
+"""
+mdcache.py — Persistent "verified clean" manifest for the site_tools scripts.
+
+Stores, per file, the mtime, size and SHA-256 of the content that a tool last
+verified as clean, together with a fingerprint of the tool, its transform options
+and its source code, including the shared modules every transform builds on
+(SHARED_SOURCES: the block tokenizer and the prefilter). On later runs:
+
+- mtime and size unchanged, fingerprint unchanged → skipped without being read.
+- mtime or size changed but the content hash matches → skipped without transforming.
+- anything else (including changed options such as --skip-headings,
+  --replacement or --keep-setext) → processed as usual.
+
+Only files that needed no change are recorded; modified files are verified on the next run.
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CACHE_DIR = ".site_tools_cache"
+MANIFEST_VERSION = 1
+SHARED_SOURCES = ("mdblocks.py", "prefilter.py")
+
+# (mtime_ns, size, sha256) of a file verified clean
+CacheKey = Tuple[int, int, str]
+
+def add_cache_argument(ap: argparse.ArgumentParser, tool: str) -> None:
+    default = f"{CACHE_DIR}/{tool}.json"
+    ap.add_argument("--cache", nargs="?", const=default, default=None, metavar="FILE",
+                    help=f"Skip files verified clean on an earlier run (manifest default: {default})")
+
+def transform_sources(*paths: str) -> List[str]:
+    """paths plus SHARED_SOURCES: the sources to fingerprint for a transform."""
+    here = pathlib.Path(__file__).parent
+    return list(paths) + [str(here / name) for name in SHARED_SOURCES]
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def file_hash(path: pathlib.Path) -> str:
+    """content_hash of a file, read in chunks so large files are never held in memory."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fingerprint(tool: str, options: Dict[str, object], sources: Iterable[str]) -> str:
+    """Hash of the tool name, its transform options and the source of the modules that implement it."""
+    h = hashlib.sha256()
+    h.update(json.dumps({"tool": tool, "options": options}, sort_keys=True, default=str).encode('utf-8'))
+    for src in sources:
+        h.update(pathlib.Path(src).read_bytes())
+    return h.hexdigest()
+
+class CleanCache:
+    def __init__(self, manifest: pathlib.Path, fingerprint: str):
+        self.manifest = manifest
+        self.fingerprint = fingerprint
+        self.entries: Dict[str, dict] = {}
+        self.dirty = False
+        try:
+            data = json.loads(manifest.read_text(encoding='utf-8'))
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            pass  # missing or unreadable manifest → start empty
+
+    @staticmethod
+    def _key(path: pathlib.Path) -> str:
+        return path.resolve().as_posix()
+
+    def lookup(self, path: pathlib.Path, st: os.stat_result) -> Tuple[bool, Optional[str]]:
+        """
+        Return (fresh, known_hash). fresh means mtime/size/fingerprint all match and the
+        file can be skipped unread; known_hash is the stored hash when only mtime/size differ.
+        """
+        entry = self.entries.get(self._key(path))
+        if not entry or entry.get("fingerprint") != self.fingerprint:
+            return False, None
+        if entry.get("mtime_ns") == st.st_mtime_ns and entry.get("size") == st.st_size:
+            return True, entry.get("sha256")
+        return False, entry.get("sha256")
+
+    def record(self, path: pathlib.Path, key: CacheKey) -> None:
+        mtime_ns, size, digest = key
+        self.entries[self._key(path)] = {
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "sha256": digest,
+            "fingerprint": self.fingerprint,
+        }
+        self.dirty = True
+
+    def forget(self, path: pathlib.Path) -> None:
+        if self.entries.pop(self._key(path), None) is not None:
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.manifest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest.with_name(self.manifest.name + ".tmp")
+        tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "entries": self.entries}, sort_keys=True), encoding='utf-8')
+        os.replace(tmp, self.manifest)
+        self.dirty = False
+
+def open_cache(manifest: Optional[str], tool: str, options: Dict[str, object], sources: Iterable[str]) -> Optional[CleanCache]:
+    """Open the manifest named by --cache, or return None when caching is off."""
+    if not manifest:
+        return None
+    return CleanCache(pathlib.Path(manifest), fingerprint(tool, options, sources))
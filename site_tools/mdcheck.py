@@ -0,0 +1,206 @@
+"""
+mdcheck.py — Check-only mode for the cleanup rules (cleanup.py --check).
+
+Reports where a file would change instead of rewriting it. The checker walks
+the same block index as the transforms (front matter and fences are skipped;
+headings too for the inline rules unless --no-skip-headings) and looks for:
+
+- bold       a **text** or __text__ pair the bold rule would unwrap
+- em-dash    an em dash (or en dash with --also-en-dash) the dash rule would replace
+- rule-line  a horizontal rule line the rule pass would drop
+- blank-run  a blank line that would be collapsed into the previous one
+
+Only lines that actually change are rewritten (to see what the later rules
+get); the rest are scanned in place and no output text is built. A file has
+violations exactly when cleanup.py with the same --rules and options would
+modify it, so --check can replace --dry-run as the CI gate. Columns are
+1-based and point into the source line, except em dash columns on a line that
+also loses bold markers, which refer to the line after bold removal.
+
+Each violation prints as "path:line:col: rule: message".
+"""
+
+from __future__ import annotations
+import pathlib
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from mdblocks import HEADINGS, INLINE_CODE_SPLIT_RE, PASSTHROUGH, scan_lines
+from prefilter import applicable_rules, decode
+from remove_bold import HTML_B_TAGS_RE, _leading_bold_end, _unwrap, process_line_outside_code_with_leading
+from remove_em_dash import EM_DASH, EN_DASH, process_line as replace_dashes_in_line
+from remove_rule import should_remove_as_hr
+from runprofile import start_file
+
+FAIL_FAST_MODES = ("file", "run")
+
+class Violation(NamedTuple):
+    line: int        # 1-based
+    col: int         # 1-based
+    rule: str
+    message: str
+
+def _pairs(seg: str, marker: str) -> List[Tuple[int, int]]:
+    """(opener, closer) offsets of the marker pairs remove_bold._unwrap would remove, without building the result."""
+    pairs: List[Tuple[int, int]] = []
+    start = seg.find(marker)
+    while start != -1:
+        end = seg.find(marker, start + 3)
+        if end == -1:
+            break
+        pairs.append((start, end))
+        start = seg.find(marker, end + 2)
+    return pairs
+
+def _to_source(off: int, removed: Sequence[Tuple[int, int]]) -> int:
+    """Map an offset in text with the (start, end) spans removed back to the text that still had them."""
+    for start, end in removed:
+        if start > off:
+            break
+        off += end - start
+    return off
+
+def bold_columns(parts: Sequence[str], skip_leading_bold: bool) -> Tuple[List[int], bool]:
+    """
+    Return (offsets, tags): the 0-based line offsets of the bold pairs the bold rule
+    would unwrap, and whether the line holds <b>/<strong> tags (removed but not counted).
+    """
+    hits: List[int] = []
+    has_tags = False
+    pos = 0
+    for i, seg in enumerate(parts):
+        if i % 2 == 0 and seg:
+            keep = _leading_bold_end(seg) if i == 0 and skip_leading_bold else 0
+            if keep and '<' in seg[:keep] and HTML_B_TAGS_RE.search(seg, 0, keep):
+                has_tags = True  # the kept label still loses its tags
+            tail = seg[keep:] if keep else seg
+            tags: List[Tuple[int, int]] = []
+            if '<' in tail:
+                tags = [m.span() for m in HTML_B_TAGS_RE.finditer(tail)]
+                if tags:
+                    has_tags = True
+                    tail = HTML_B_TAGS_RE.sub('', tail)
+            if '**' in tail or '__' in tail:
+                stars = _pairs(tail, '**')
+                offs = [_to_source(a, tags) for a, _ in stars]
+                if stars:
+                    # __ pairs are found after ** removal, like the bold rule does
+                    removed = [span for a, b in stars for span in ((a, a + 2), (b, b + 2))]
+                    tail = _unwrap(tail, '**')[0]
+                    offs += [_to_source(_to_source(a, removed), tags) for a, _ in _pairs(tail, '__')]
+                else:
+                    offs += [_to_source(a, tags) for a, _ in _pairs(tail, '__')]
+                hits.extend(pos + keep + o for o in sorted(offs))
+        pos += len(seg)
+    return hits, has_tags
+
+def dash_columns(parts: Sequence[str], repl: str, also_en: bool) -> List[Tuple[int, str]]:
+    """0-based offsets of the dashes the em dash rule would replace, outside code spans."""
+    targets = [(EM_DASH, "em dash would be replaced")] + ([(EN_DASH, "en dash would be replaced")] if also_en else [])
+    targets = [t for t in targets if t[0] != repl]  # replacing a dash with itself changes nothing
+    hits: List[Tuple[int, str]] = []
+    pos = 0
+    for i, seg in enumerate(parts):
+        if i % 2 == 0:
+            for ch, name in targets:
+                at = seg.find(ch)
+                while at != -1:
+                    hits.append((pos + at, name))
+                    at = seg.find(ch, at + 1)
+        pos += len(seg)
+    hits.sort()
+    return hits
+
+def find_violations(
+    text: str,
+    rules: Sequence[str],
+    skip_headings: bool = True,
+    skip_leading_bold: bool = True,
+    repl: str = "-",
+    also_en: bool = False,
+    keep_setext: bool = True,
+    collapse_blank_lines: bool = True,
+    fail_fast: bool = False,
+) -> Iterator[Violation]:
+    """
+    Yield the violations of the selected rules (cleanup.py names: bold, em-dash, rule)
+    in line order. With fail_fast, stop after the first one.
+    """
+    do_bold = "bold" in rules
+    do_dash = "em-dash" in rules
+    do_rule = "rule" in rules
+    lines = text.splitlines(keepends=False)
+    index = scan_lines(lines)
+    prev_blank = False
+
+    for kind, start, end in index.spans:
+        if kind in PASSTHROUGH:
+            prev_blank = lines[end - 1].strip() == ''
+            continue
+
+        inline = (do_bold or do_dash) and not (skip_headings and kind in HEADINGS)
+        for ln in range(start, end):
+            line = lines[ln]
+            found: List[Violation] = []
+            if inline:
+                # Cheap membership tests first: most lines have nothing for either rule
+                parts = None
+                if do_bold and ('*' in line or '_' in line or '<' in line):
+                    parts = index.segments(ln, line)
+                    offs, has_tags = bold_columns(parts, skip_leading_bold)
+                    found.extend(Violation(ln + 1, o + 1, "bold", "bold pair would be unwrapped") for o in offs)
+                    if offs or has_tags:
+                        # Later rules see the line as the bold rule leaves it
+                        line, _ = process_line_outside_code_with_leading(line, skip_leading_bold=skip_leading_bold, parts=parts)
+                        parts = INLINE_CODE_SPLIT_RE.split(line)
+                if do_dash and (EM_DASH in line or (also_en and EN_DASH in line)):
+                    if parts is None:
+                        parts = index.segments(ln, line)
+                    hits = dash_columns(parts, repl, also_en)
+                    if hits:
+                        found.extend(Violation(ln + 1, o + 1, "em-dash", name) for o, name in hits)
+                        found.sort(key=lambda v: v.col)
+                        if do_rule:
+                            line, _ = replace_dashes_in_line(line, repl, also_en, parts=parts)
+
+            if do_rule:
+                blank = not line.strip()
+                if should_remove_as_hr(line, kind, keep_setext=keep_setext):
+                    found.append(Violation(ln + 1, len(line) - len(line.lstrip()) + 1, "rule-line", "horizontal rule would be removed"))
+                elif collapse_blank_lines and blank and prev_blank:
+                    found.append(Violation(ln + 1, 1, "blank-run", "blank line would be collapsed"))
+                else:
+                    prev_blank = blank
+
+            for v in found:
+                yield v
+                if fail_fast:
+                    return
+
+def check_file(path: pathlib.Path, verbose: bool, fail_fast: Optional[str], rules: Sequence[str], **options) -> Tuple[int, bool]:
+    """
+    Print the violations in one file. Returns (violation count, has_violations),
+    the same (counters, modified) shape as the scripts' process_file.
+    """
+    prof = start_file(path)
+    data = path.read_bytes()
+    if prof:
+        prof.lap("read", len(data))
+    rules = applicable_rules(rules, data, options)
+    if not rules:
+        if prof:
+            prof.lap("decode")
+        if verbose:
+            print(f"[OK ] {path}")
+        return 0, False
+    text = decode(data)
+    if prof:
+        prof.lap("decode")
+    count = 0
+    for v in find_violations(text, rules, fail_fast=fail_fast is not None, **options):
+        print(f"{path}:{v.line}:{v.col}: {v.rule}: {v.message}")
+        count += 1
+    if prof:
+        prof.lap("transform")
+    if verbose and not count:
+        print(f"[OK ] {path}")
+    return count, count > 0
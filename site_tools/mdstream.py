@@ -0,0 +1,101 @@
+"""
+mdstream.py — Bounded-memory line streaming and atomic replace for the site_tools scripts.
+
+The in-memory path holds a file as text, as a splitlines() list, as an output
+list and as the joined result. The streaming path instead:
+
+- reads the file line by line (LineSource), split exactly like str.splitlines(),
+- sends each line through a generator transform (e.g. cleanup.clean_lines),
+- writes every output line straight into a temp file in the same directory (LineSink),
+- and only if the content really changed, moves the temp file over the original
+  with os.replace(). Otherwise the temp file is deleted.
+
+Neither side keeps more than the current line, so peak memory per file does not
+grow with file size. os.replace() is atomic on the same file system, so an
+interrupted run leaves either the old or the new file, never a half-written one.
+A run killed at the worst moment can leave a stray ".<name>.<random>.tmp" file,
+which the walkers ignore because of its extension.
+
+"Changed" is decided without holding either text: both sides feed a BLAKE2b
+digest, and the file is rewritten only when the digests differ.
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import pathlib
+import shutil
+import tempfile
+from typing import IO, Iterator, Optional
+
+class LineSource:
+    """
+    Iterate a text file opened with universal newlines, yielding lines like
+    text.splitlines(keepends=False) on the whole decoded text would.
+    """
+
+    def __init__(self, f: IO[str]):
+        self._f = f
+        self._digest = hashlib.blake2b()
+        self.trailing_nl = False
+
+    def __iter__(self) -> Iterator[str]:
+        for raw in self._f:
+            self._digest.update(raw.encode('utf-8'))
+            self.trailing_nl = raw.endswith('\n')
+            # Also breaks on \v, \f, \x1c-\x1e, \x85, U+2028 and U+2029, like str.splitlines()
+            yield from raw.splitlines()
+
+    def digest(self) -> bytes:
+        return self._digest.digest()
+
+class LineSink:
+    """
+    Join output lines with "\\n" into a temp file next to target (or only hash
+    them when dry_run). commit() replaces target atomically; discard() drops the temp file.
+    """
+
+    def __init__(self, target: pathlib.Path, dry_run: bool):
+        self.target = target
+        self._digest = hashlib.blake2b()
+        self._first = True
+        self._f: Optional[IO[str]] = None
+        if not dry_run:
+            self._f = tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=target.parent, prefix=f".{target.name}.", suffix=".tmp", delete=False)
+
+    def write_line(self, line: str) -> None:
+        if self._first:
+            self._first = False
+        else:
+            line = '\n' + line
+        self._digest.update(line.encode('utf-8'))
+        if self._f is not None:
+            self._f.write(line)
+
+    def finish(self, trailing_nl: bool) -> bytes:
+        """Write the final newline if the source had one; return the digest of the output text."""
+        if trailing_nl:
+            self._digest.update(b'\n')
+            if self._f is not None:
+                self._f.write('\n')
+        if self._f is not None:
+            self._f.close()
+        return self._digest.digest()
+
+    def commit(self) -> None:
+        """Atomically replace the target with the temp file, keeping its permission bits."""
+        assert self._f is not None, "commit() on a dry-run sink"
+        self._f.close()
+        shutil.copymode(self.target, self._f.name)
+        os.replace(self._f.name, self.target)
+        self._f = None
+
+    def discard(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            try:
+                os.unlink(self._f.name)
+            except FileNotFoundError:
+                pass
+            self._f = None
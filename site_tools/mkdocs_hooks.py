@@ -0,0 +1,131 @@
+"""
+mkdocs_hooks.py — Apply the cleanup.py rules to page Markdown in memory during `mkdocs build` / `mkdocs serve`.
+
+Listed in mkdocs.yml next to the plugins (MkDocs 1.4+ loads hook files without packaging):
+
+  hooks:
+    - site_tools/mkdocs_hooks.py
+
+on_page_markdown runs each page's Markdown through cleanup.clean_text (bold,
+em dashes, horizontal rules) before it is rendered, so publishing needs no disk
+rewrite and no separate tree walk. The source files are left as they are.
+
+Results are memoized by the SHA-256 of the page Markdown. MkDocs loads a hook
+file once per process, so during `mkdocs serve` a rebuild only transforms the
+pages whose content changed; the memo is bounded to MEMO_SIZE entries.
+
+The rules and options are cleanup.py's defaults; change RULES / OPTIONS below
+to match a different cleanup.py command line.
+
+MkDocs passes the Markdown without its front matter, so front matter detection
+is off here: a page body that starts with a "---" thematic break is cleaned like
+the rest of the page, as cleanup.py does on disk.
+
+Run this file directly to check that the hook gives the same page bodies as
+cleanup.py on the files (exit code 1 on any difference):
+
+  python site_tools/mkdocs_hooks.py --path docs
+"""
+
+from __future__ import annotations
+import argparse
+import logging
+import pathlib
+import sys
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from cleanup import COUNTER_KEYS, clean_text
+from mdcache import content_hash
+from prefilter import RULES, applicable_rules
+from walk import iter_files
+
+OPTIONS = dict(
+    skip_headings=True,
+    skip_leading_bold=True,
+    repl="-",
+    also_en=False,
+    keep_setext=True,
+    collapse_blank_lines=True,
+)
+MEMO_SIZE = 4096
+
+log = logging.getLogger("mkdocs.hooks.site_tools")
+
+_memo: "OrderedDict[str, str]" = OrderedDict()
+_stats: Dict[str, int] = {}
+
+def clean_markdown(markdown: str) -> Tuple[str, Dict[str, int]]:
+    """Clean page Markdown that MkDocs has already split from its front matter."""
+    # The byte prefilter still skips clean pages
+    rules = applicable_rules(RULES, markdown.encode('utf-8'), OPTIONS)
+    if not rules:
+        return markdown, dict.fromkeys(COUNTER_KEYS, 0)
+    return clean_text(markdown, rules=rules, front_matter=False, **OPTIONS)
+
+def on_pre_build(config, **kwargs) -> None:
+    _stats.clear()
+    _stats.update(dict.fromkeys(("pages", "changed", "memo_hits"), 0), **dict.fromkeys(COUNTER_KEYS, 0))
+
+def on_page_markdown(markdown: str, page, config, files, **kwargs) -> str:
+    _stats["pages"] += 1
+    key = content_hash(markdown.encode('utf-8'))
+    cached = _memo.get(key)
+    if cached is not None:
+        _memo.move_to_end(key)
+        _stats["memo_hits"] += 1
+        return cached
+
+    result = markdown
+    new_text, counts = clean_markdown(markdown)
+    if sum(counts.values()) and new_text != markdown:
+        result = new_text
+        _stats["changed"] += 1
+        for k in COUNTER_KEYS:
+            _stats[k] += counts[k]
+        log.debug("site_tools: cleaned %s (%s)", page.file.src_uri,
+                  ", ".join(f"{k}={counts[k]}" for k in COUNTER_KEYS))
+    _memo[key] = result
+    if len(_memo) > MEMO_SIZE:
+        _memo.popitem(last=False)
+    return result
+
+def on_post_build(config, **kwargs) -> None:
+    log.info("site_tools: %d pages, %d cleaned in memory, %d from memo | bold=%d, em_dash=%d, removed_hr=%d, collapsed_blanks=%d",
+             _stats["pages"], _stats["changed"], _stats["memo_hits"],
+             *(_stats[k] for k in COUNTER_KEYS))
+
+# --- Parity check: hook output vs. cleanup.py on disk ---------------------------------
+
+# A page whose body starts with a thematic break: once MkDocs drops the front
+# matter, the body begins with "---" and must not be read as front matter again
+BODY_RULE_SAMPLE = "---\ntitle: Sample\n---\n---\nIntro with **bold**.\n\n---\n\nMore \u2014 text.\n"
+
+def check_page(text: str) -> Tuple[str, str]:
+    """(hook output, cleanup.py output) for the body of one page file."""
+    from mkdocs.utils.meta import get_data  # split the front matter the way Page.read_source does
+    rules = applicable_rules(RULES, text.encode('utf-8'), OPTIONS)
+    on_disk = clean_text(text, rules=rules, **OPTIONS)[0] if rules else text
+    return clean_markdown(get_data(text)[0])[0], get_data(on_disk)[0]
+
+def main():
+    ap = argparse.ArgumentParser(description="Check that the build hook cleans page bodies like cleanup.py does on disk.")
+    ap.add_argument("--path", default="docs", help="Docs folder (default: ./docs)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="List every page checked")
+    args = ap.parse_args()
+
+    pages = [("<sample: body starts with --->", BODY_RULE_SAMPLE)]
+    pages += [(str(p), p.read_text(encoding='utf-8')) for p in iter_files(pathlib.Path(args.path), [".md", ".markdown"])]
+    differ = 0
+    for name, text in pages:
+        hook, disk = check_page(text)
+        if hook != disk:
+            differ += 1
+            print(f"[DIFF] {name}")
+        elif args.verbose:
+            print(f"[OK] {name}")
+    print(f"\nPages: {len(pages)} | Differ: {differ}")
+    sys.exit(1 if differ else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+neardup.py — Report clusters of near-duplicate paragraphs in ./docs (MinHash + LSH)
+
+Finds paragraphs that were copied between pages and have drifted apart, without
+comparing every paragraph to every other:
+
+- splits each file into paragraphs: runs of non-blank prose lines, with the
+  front matter, fence and heading rules of the other site_tools scripts (mdblocks),
+- skips paragraphs shorter than --min-words words,
+- computes a MinHash signature (--num-perm values) over the word --shingle-grams
+  of each paragraph,
+- puts the signatures into locality-sensitive hash bands sized for --threshold,
+  and checks only the paragraphs that share a band,
+- reports clusters of paragraphs whose estimated similarity (Jaccard) is at
+  least --threshold.
+
+Signatures are cached per file content hash (default:
+.site_tools_cache/neardup.json), so repeat runs only hash edited files;
+--no-cache hashes everything.
+
+Usage:
+  python neardup.py
+  python neardup.py --path docs/modules --threshold 0.9 --min-words 30
+  python neardup.py --jobs 0 --no-cache -v
+
+Exit codes:
+  0 when no near-duplicates were found
+  1 when clusters were found
+  2 on an invalid path
+"""
+
+from __future__ import annotations
+import argparse
+import base64
+import hashlib
+import json
+import os
+import pathlib
+import random
+import re
+import sys
+import zlib
+from array import array
+from collections import defaultdict
+from functools import partial
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from mdblocks import PROSE, scan_lines
+from mdcache import CACHE_DIR, add_cache_argument, fingerprint, transform_sources
+from runner import add_jobs_argument, run_files
+from walk import iter_files
+
+CACHE_VERSION = 1
+SEED = 1
+MERSENNE_61 = (1 << 61) - 1
+WORD_RE = re.compile(r'\w+')
+
+class Paragraph(NamedTuple):
+    line: int        # 1-based first line
+    excerpt: str
+    signature: bytes
+
+def paragraphs(text: str) -> List[Tuple[int, str]]:
+    """(first line, text) of every run of non-blank prose lines."""
+    lines = text.splitlines()
+    index = scan_lines(lines)
+    out: List[Tuple[int, str]] = []
+    for kind, start, end in index.spans:
+        if kind != PROSE:
+            continue
+        first = None
+        for ln in range(start, end + 1):
+            blank = ln == end or not lines[ln].strip()
+            if blank and first is not None:
+                out.append((first + 1, ' '.join(l.strip() for l in lines[first:ln])))
+                first = None
+            elif not blank and first is None:
+                first = ln
+    return out
+
+def permutations(num_perm: int) -> List[Tuple[int, int]]:
+    """The (a, b) pairs of the hash functions (a*x + b) mod 2^61-1, the same on every run."""
+    rnd = random.Random(SEED)
+    return [(rnd.randrange(1, MERSENNE_61), rnd.randrange(0, MERSENNE_61)) for _ in range(num_perm)]
+
+def minhash(words: Sequence[str], shingle: int, perms: List[Tuple[int, int]]) -> bytes:
+    """Signature of the paragraph's word shingles: the minimum of each hash function, 32 bits each."""
+    hashes = list({zlib.crc32(' '.join(words[i:i + shingle]).encode('utf-8'))
+                   for i in range(max(len(words) - shingle + 1, 1))})
+    sig = array('I', (min([(a * h + b) % MERSENNE_61 for h in hashes]) & 0xFFFFFFFF for a, b in perms))
+    return sig.tobytes()
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity: the fraction of signature values that agree."""
+    x, y = array('I', a), array('I', b)
+    return sum(1 for i, j in zip(x, y) if i == j) / len(x)
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands*rows <= num_perm that minimize the false positive plus
+    false negative probability mass around threshold.
+    """
+    def integrate(f, lo: float, hi: float, steps: int = 100) -> float:
+        step = (hi - lo) / steps
+        return sum(f(lo + (i + 0.5) * step) for i in range(steps)) * step
+
+    best, best_err = (1, num_perm), float("inf")
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            fp = integrate(lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+            fn = integrate(lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+            if fp + fn < best_err:
+                best, best_err = (bands, rows), fp + fn
+    return best
+
+def process_file(path: pathlib.Path, shingle: int, min_words: int, num_perm: int, verbose: bool) -> List[Paragraph]:
+    perms = permutations(num_perm)
+    found = []
+    for line, text in paragraphs(path.read_text(encoding='utf-8')):
+        words = WORD_RE.findall(text.lower())
+        if len(words) < min_words:
+            continue
+        excerpt = text if len(text) <= 80 else text[:77] + "..."
+        found.append(Paragraph(line, excerpt, minhash(words, shingle, perms)))
+    if verbose:
+        print(f"[HASH] {path}  ({len(found)} paragraphs)")
+    return found
+
+def load_cache(path: pathlib.Path, fp: str) -> Dict[str, list]:
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}  # missing or unreadable manifest → hash everything
+    if data.get("version") != CACHE_VERSION or data.get("fingerprint") != fp:
+        return {}
+    return data.get("files", {})
+
+def save_cache(path: pathlib.Path, fp: str, files: Dict[str, list]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "fingerprint": fp, "files": files},
+                              separators=(',', ':')), encoding='utf-8')
+    os.replace(tmp, path)
+
+def _encode(paras: List[Paragraph]) -> list:
+    return [[p.line, p.excerpt, base64.b64encode(p.signature).decode('ascii')] for p in paras]
+
+def _decode(rows: list) -> List[Paragraph]:
+    return [Paragraph(line, excerpt, base64.b64decode(sig)) for line, excerpt, sig in rows]
+
+def find_clusters(sigs: List[bytes], bands: int, rows: int, threshold: float) -> Tuple[List[List[int]], Dict[Tuple[int, int], float], int]:
+    """(clusters of paragraph indices, similarity of each verified pair, candidate pairs checked)."""
+    buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+    width = rows * 4  # bytes per band
+    for i, sig in enumerate(sigs):
+        for band in range(bands):
+            buckets[band, sig[band * width:(band + 1) * width]].append(i)
+
+    parent = list(range(len(sigs)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    pairs: Dict[Tuple[int, int], float] = {}
+    for members in buckets.values():
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                pair = (members[x], members[y])
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                sim = similarity(sigs[pair[0]], sigs[pair[1]])
+                if sim >= threshold:
+                    pairs[pair] = sim
+                    parent[find(pair[0])] = find(pair[1])
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in {i for pair in pairs for i in pair}:
+        groups[find(i)].append(i)
+    clusters = sorted((sorted(g) for g in groups.values()), key=lambda g: (-len(g), g[0]))
+    return clusters, pairs, len(checked)
+
+def main():
+    ap = argparse.ArgumentParser(description="Report clusters of near-duplicate paragraphs (MinHash + LSH).")
+    ap.add_argument("--path", default="docs", help="Root folder to scan (default: ./docs)")
+    ap.add_argument("--ext", nargs="*", default=[".md"], help="File extensions to include")
+    ap.add_argument("--include", action="append", default=[], help="Glob pattern to include (repeatable)")
+    ap.add_argument("--exclude", action="append", default=[], help="Glob pattern to exclude (repeatable)")
+    ap.add_argument("--threshold", type=float, default=0.8,
+                    help="Minimum estimated similarity (Jaccard, 0-1) to report (default: 0.8)")
+    ap.add_argument("--min-words", type=int, default=20, help="Skip paragraphs with fewer words (default: 20)")
+    ap.add_argument("--shingle", type=int, default=3, help="Words per shingle (default: 3)")
+    ap.add_argument("--num-perm", type=int, default=128, help="MinHash signature length (default: 128)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    add_jobs_argument(ap)
+    add_cache_argument(ap, "neardup")
+    ap.set_defaults(cache=f"{CACHE_DIR}/neardup.json")
+    ap.add_argument("--no-cache", dest="cache", action="store_const", const=None,
+                    help="Hash every file, ignoring the signature cache")
+    args = ap.parse_args()
+
+    root = pathlib.Path(args.path).resolve()
+    if not root.exists() or not root.is_dir():
+        print(f"ERROR: Path not found or not a directory: {root}", file=sys.stderr)
+        sys.exit(2)
+    if not 0 < args.threshold <= 1:
+        print("ERROR: --threshold must be between 0 and 1", file=sys.stderr)
+        sys.exit(2)
+
+    fp = fingerprint("neardup", {"shingle": args.shingle, "min_words": args.min_words,
+                                 "num_perm": args.num_perm, "seed": SEED}, transform_sources(__file__))
+    cache_path = pathlib.Path(args.cache) if args.cache else None
+    cached = load_cache(cache_path, fp) if cache_path else {}
+
+    paths = list(iter_files(root, args.ext, args.include, args.exclude))
+    digests = [hashlib.sha256(p.read_bytes()).hexdigest() for p in paths]
+    stale = [p for p, d in zip(paths, digests) if d not in cached]
+    worker = partial(process_file, shingle=args.shingle, min_words=args.min_words,
+                     num_perm=args.num_perm, verbose=args.verbose)
+    fresh = dict(zip(stale, run_files(worker, stale, jobs=args.jobs)))
+
+    files: Dict[str, list] = {}
+    paras: List[Tuple[pathlib.Path, Paragraph]] = []
+    for path, digest in zip(paths, digests):
+        if path in fresh:
+            files[digest] = _encode(fresh[path])
+        else:
+            files[digest] = cached[digest]
+        paras.extend((path, p) for p in (fresh.get(path) or _decode(files[digest])))
+    if cache_path:
+        save_cache(cache_path, fp, files)
+
+    bands, rows = choose_bands(args.num_perm, args.threshold)
+    clusters, pairs, checked = find_clusters([p.signature for _, p in paras], bands, rows, args.threshold)
+
+    for n, cluster in enumerate(clusters, 1):
+        sims = [s for (a, b), s in pairs.items() if a in cluster]
+        print(f"\nCluster {n}: {len(cluster)} paragraphs, similarity {min(sims):.2f}-{max(sims):.2f}")
+        for i in cluster:
+            path, para = paras[i]
+            print(f"  {path.relative_to(root).as_posix()}:{para.line}  {para.excerpt}")
+
+    print(f"\nFiles: {len(paths)} | Hashed: {len(stale)} | Paragraphs: {len(paras)} | "
+          f"LSH: {bands} bands x {rows} rows | Candidate pairs: {checked} | "
+          f"Clusters: {len(clusters)} ({sum(map(len, clusters))} paragraphs)")
+    sys.exit(1 if clusters else 0)
+
+if __name__ == "__main__":
+    main()
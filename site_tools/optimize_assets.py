@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+optimize_assets.py — Minify SVGs and losslessly recompress PNGs under ./docs
+
+SVG (text-level rewrite, checked to still parse as XML):
+- strips comments, <metadata> and Inkscape/Sodipodi/Sketch editor elements and
+  attributes (keep them with --keep-editor-data),
+- with --strip-drawio-source, also strips the draw.io "content" attribute: the
+  embedded diagram source, often the only editable copy of the diagram, so it
+  is kept by default,
+- rounds numbers in geometry attributes (d, points, x, y, width, ...) to
+  --precision decimals and drops leading zeros ("0.5" → ".5"); transform
+  matrices get their own --transform-precision (default: 6), since an error in
+  a scale or skew term grows with every coordinate it multiplies,
+- removes <defs> children whose ids are never referenced,
+- removes whitespace-only runs with a line break between tags (outside <text> and <style>),
+- with --subset-fonts, subsets every embedded data: URI font to the characters the
+  SVG's text uses (needs fontTools and brotli: pip install fonttools brotli).
+
+PNG (pixel-identical; the filtered image data is never changed):
+- recompresses the image data at zlib level 9 with the default and filtered
+  strategies, whichever is smaller, into one IDAT chunk,
+- drops tEXt/zTXt/iTXt/tIME metadata chunks unless --keep-metadata.
+
+A file is only rewritten when the result is smaller. Optimized and already
+optimal files are recorded in a content-hash manifest (default:
+.site_tools_cache/optimize_assets.json), so later runs only process new or
+changed assets; --no-cache processes everything.
+
+Usage:
+  python optimize_assets.py --dry-run -v
+  python optimize_assets.py --path docs/assets --backup -v
+  python optimize_assets.py --restore latest -v
+  python optimize_assets.py --subset-fonts --jobs 0
+  python optimize_assets.py --dry-run --no-cache --precision 2
+  python optimize_assets.py --path docs/assets/exported --strip-drawio-source
+
+Exit codes:
+  0 on success (or no changes)
+  1 on dry-run with files that would shrink (useful in CI)
+  2 on an invalid path, or --subset-fonts without fontTools
+"""
+
+from __future__ import annotations
+import argparse
+import base64
+import bisect
+import io
+import os
+import pathlib
+import re
+import struct
+import sys
+import zlib
+from functools import partial
+from typing import List, NamedTuple, Optional, Set, Tuple
+from xml.etree import ElementTree
+
+from mdcache import CACHE_DIR, add_cache_argument, content_hash, open_cache
+from backups import add_backup_arguments, close_backup, open_backup, restore_run, stash
+from runner import add_jobs_argument, resolve_jobs, run_files
+from runprofile import add_profile_argument, open_profile, start_file
+from walk import iter_files
+
+DEFAULT_MANIFEST = f"{CACHE_DIR}/optimize_assets.json"
+
+# --- SVG -------------------------------------------------------------------------
+
+_CDATA_SPLIT_RE = re.compile(r'(<!\[CDATA\[.*?\]\]>)', re.S)
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+_METADATA_RE = re.compile(r'<metadata\b[^>]*?(?:/>|>.*?</metadata>)', re.S)
+_EDITOR_PREFIXES = "inkscape|sodipodi|sketch|serif"
+_EDITOR_ELEM_RE = re.compile(rf'<({_EDITOR_PREFIXES}):([\w.-]+)\b[^>]*?(?:/>|>.*?</\1:\2>)', re.S)
+_EDITOR_ATTR_RE = re.compile(rf'\s(?:xmlns:)?(?:{_EDITOR_PREFIXES})(?::[\w.-]+)?="[^"]*"')
+_DRAWIO_CONTENT_RE = re.compile(r'(<svg\b[^>]*?)\scontent="[^"]*"', re.S)
+_PROTECTED_REGION_RE = re.compile(r'<text\b.*?</text>|<style\b.*?</style>', re.S)
+_BLANK_BETWEEN_TAGS_RE = re.compile(r'>\s*\n\s*<')
+_START_TAG_RE = re.compile(r'<[A-Za-z][^>]*>', re.S)
+_GEOMETRY_ATTR_RE = re.compile(
+    r'(\s(?:d|points|viewBox|x|y|x1|y1|x2|y2|cx|cy|r|rx|ry|fx|fy|width|height|dx|dy|stroke-width|offset)=")([^"]*)(")'
+)
+_TRANSFORM_ATTR_RE = re.compile(r'(\s(?:transform|gradientTransform|patternTransform)=")([^"]*)(")')
+_ATTR_GAP_RE = re.compile(r'\s+(?=[\w:.-]+=")')
+_TAG_END_GAP_RE = re.compile(r'\s+(?=/?>$)')
+_NUMBER_RE = re.compile(r'-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?')
+_TAG_RE = re.compile(r'<(/?)([\w:.-]+)[^>]*?(/?)>', re.S)
+_DEFS_RE = re.compile(r'<defs\b[^>]*>', re.S)
+_ID_ATTR_RE = re.compile(r'\sid="([^"]+)"')
+_REF_RE = re.compile(r'url\(\s*[\'"]?#([^)\'"\s]+)|href="#([^"]+)"')
+_FONT_URI_RE = re.compile(
+    r'(url\(\s*([\'"]?))data:((?:font|application)/[\w.+-]+)((?:;[\w=.-]+)*);base64,([A-Za-z0-9+/=\s]+)(\2\s*\))'
+)
+_NON_TEXT_TAGS = {"style", "script", "metadata", "title", "desc"}
+
+def _round_number(m: re.Match, precision: int) -> str:
+    s = m.group()
+    if '.' not in s and 'e' not in s and 'E' not in s:
+        return s
+    out = f"{round(float(s), precision):.{precision}f}".rstrip('0').rstrip('.')
+    if out in ('', '-0', '-'):
+        out = '0'
+    if out.startswith('0.'):
+        out = out[1:]
+    elif out.startswith('-0.'):
+        out = '-' + out[2:]
+    return out if len(out) < len(s) else s
+
+def _round_attrs(tag: str, attr_re: re.Pattern, precision: int) -> str:
+    if precision < 0:
+        return tag
+    return attr_re.sub(
+        lambda a: a.group(1) + _NUMBER_RE.sub(lambda n: _round_number(n, precision), a.group(2)) + a.group(3),
+        tag,
+    )
+
+def _round_geometry(tag: re.Match, precision: int, transform_precision: int) -> str:
+    out = _round_attrs(tag.group(), _GEOMETRY_ATTR_RE, precision)
+    return _round_attrs(out, _TRANSFORM_ATTR_RE, transform_precision)
+
+def _tidy_tag(tag: re.Match) -> str:
+    """One space between attributes, none before the closing bracket."""
+    return _TAG_END_GAP_RE.sub('', _ATTR_GAP_RE.sub(' ', tag.group()))
+
+def _collapse_blank_lines(seg: str) -> str:
+    """Drop whitespace runs with a line break between tags, except inside <text> and <style>."""
+    spans = [m.span() for m in _PROTECTED_REGION_RE.finditer(seg)]
+    starts = [a for a, _ in spans]
+
+    def sub(m: re.Match) -> str:
+        k = bisect.bisect_right(starts, m.start()) - 1
+        return m.group() if k >= 0 and m.start() < spans[k][1] - 1 else '><'
+
+    return _BLANK_BETWEEN_TAGS_RE.sub(sub, seg)
+
+def _element_end(text: str, start: int) -> int:
+    """Index just past the element whose start tag begins at start."""
+    depth = 0
+    for m in _TAG_RE.finditer(text, start):
+        closing, _, self_closing = m.groups()
+        if closing:
+            depth -= 1
+        elif not self_closing:
+            depth += 1
+        if depth <= 0:
+            return m.end()
+    return len(text)
+
+def _drop_unused_defs(text: str) -> str:
+    refs = {a or b for a, b in _REF_RE.findall(text)}
+    out: List[str] = []
+    pos = 0
+    for defs in _DEFS_RE.finditer(text):
+        if defs.start() < pos or defs.group().endswith('/>'):
+            continue
+        out.append(text[pos:defs.end()])
+        i = defs.end()
+        while True:
+            nxt = text.find('<', i)
+            if nxt < 0 or text.startswith('</', nxt):
+                break
+            end = _element_end(text, nxt)
+            element = text[nxt:end]
+            ids = _ID_ATTR_RE.findall(element)
+            if not ids or any(i in refs for i in ids):
+                out.append(text[i:end])
+            else:
+                out.append(text[i:nxt])  # keep the whitespace before it, drop the element
+            i = end
+        pos = i
+    out.append(text[pos:])
+    return ''.join(out)
+
+def text_chars(root: ElementTree.Element) -> Set[str]:
+    """Every character in the SVG's rendered text (not style, script or metadata)."""
+    chars: Set[str] = set()
+
+    def visit(el: ElementTree.Element) -> None:
+        tag = el.tag.rsplit('}', 1)[-1] if isinstance(el.tag, str) else ""
+        if tag not in _NON_TEXT_TAGS:
+            chars.update(el.text or "")
+            for child in el:
+                visit(child)
+        chars.update(el.tail or "")
+
+    visit(root)
+    return {c for c in chars if not c.isspace()} | {" "}
+
+def subset_font(data: bytes, chars: Set[str]) -> bytes:
+    """data subset to chars, in its original format (woff2, woff or sfnt)."""
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+    font = TTFont(io.BytesIO(data))
+    options = subset.Options()
+    options.flavor = font.flavor
+    options.layout_features = ['*']
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=''.join(sorted(chars)))
+    subsetter.subset(font)
+    out = io.BytesIO()
+    font.save(out)
+    return out.getvalue()
+
+def embedded_font_bytes(text: str) -> int:
+    return sum(len(m.group(5)) for m in _FONT_URI_RE.finditer(text))
+
+def _subset_fonts(text: str, root: ElementTree.Element) -> str:
+    chars = text_chars(root)
+
+    def sub(m: re.Match) -> str:
+        data = base64.b64decode(m.group(5))
+        smaller = subset_font(data, chars)
+        if len(smaller) >= len(data):
+            return m.group()
+        return f"{m.group(1)}data:{m.group(3)}{m.group(4)};base64,{base64.b64encode(smaller).decode('ascii')}{m.group(6)}"
+
+    return _FONT_URI_RE.sub(sub, text)
+
+def optimize_svg(text: str, precision: int, transform_precision: int, keep_editor_data: bool,
+                 strip_drawio: bool, subset: bool) -> str:
+    root = ElementTree.fromstring(text.encode('utf-8'))  # raises ParseError: not touched
+    parts = _CDATA_SPLIT_RE.split(text)
+    for i in range(0, len(parts), 2):  # even indices are outside CDATA sections
+        seg = _COMMENT_RE.sub('', parts[i])
+        if not keep_editor_data:
+            seg = _METADATA_RE.sub('', seg)
+            seg = _EDITOR_ELEM_RE.sub('', seg)
+            seg = _START_TAG_RE.sub(lambda t: _EDITOR_ATTR_RE.sub('', t.group()), seg)
+        if strip_drawio:
+            seg = _DRAWIO_CONTENT_RE.sub(r'\1', seg, count=1)
+        if precision >= 0 or transform_precision >= 0:
+            seg = _START_TAG_RE.sub(lambda t: _round_geometry(t, precision, transform_precision), seg)
+        seg = _START_TAG_RE.sub(_tidy_tag, seg)
+        parts[i] = _collapse_blank_lines(seg)
+    out = _drop_unused_defs(''.join(parts)).strip() + ('\n' if text.endswith('\n') else '')
+    if subset:
+        out = _subset_fonts(out, root)
+    ElementTree.fromstring(out.encode('utf-8'))  # the result must still be well-formed
+    return out
+
+# --- PNG -------------------------------------------------------------------------
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+METADATA_CHUNKS = {b'tEXt', b'zTXt', b'iTXt', b'tIME'}
+
+def _png_chunks(data: bytes) -> List[Tuple[bytes, bytes]]:
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("not a PNG file")
+    chunks = []
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, ctype = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        (crc,) = struct.unpack('>I', data[pos + 8 + length:pos + 12 + length])
+        if len(body) != length or zlib.crc32(ctype + body) != crc:
+            raise ValueError(f"corrupt {ctype.decode('latin-1')} chunk")
+        chunks.append((ctype, body))
+        pos += 12 + length
+        if ctype == b'IEND':
+            break
+    return chunks
+
+def _chunk(ctype: bytes, body: bytes) -> bytes:
+    return struct.pack('>I4s', len(body), ctype) + body + struct.pack('>I', zlib.crc32(ctype + body))
+
+def optimize_png(data: bytes, keep_metadata: bool) -> bytes:
+    chunks = _png_chunks(data)
+    idat = b''.join(body for ctype, body in chunks if ctype == b'IDAT')
+    raw = zlib.decompress(idat)
+    best = idat
+    for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED):
+        c = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        packed = c.compress(raw) + c.flush()
+        if len(packed) < len(best):
+            best = packed
+    out = [PNG_SIGNATURE]
+    wrote_idat = False
+    for ctype, body in chunks:
+        if ctype == b'IDAT':
+            if not wrote_idat:
+                out.append(_chunk(b'IDAT', best))
+                wrote_idat = True
+        elif keep_metadata or ctype not in METADATA_CHUNKS:
+            out.append(_chunk(ctype, body))
+    return b''.join(out)
+
+# --- driver ----------------------------------------------------------------------
+
+class AssetResult(NamedTuple):
+    before: int
+    after: int
+    fonts: int               # bytes of embedded fonts (base64) left in an SVG
+    digest: Optional[str]    # sha256 of the rewritten file (None if unchanged)
+    error: str
+
+def process_file(path: pathlib.Path, dry_run: bool, verbose: bool, backup: bool, precision: int,
+                 transform_precision: int, keep_editor_data: bool, strip_drawio: bool, keep_metadata: bool,
+                 subset: bool) -> Tuple[AssetResult, bool]:
+    prof = start_file(path)
+    data = path.read_bytes()
+    if prof:
+        prof.lap("read", len(data))
+    new = data
+    fonts = 0
+    error = ""
+    try:
+        if path.suffix.lower() == '.svg':
+            text = data.decode('utf-8')
+            if prof:
+                prof.lap("decode")
+            out = optimize_svg(text, precision, transform_precision, keep_editor_data, strip_drawio, subset)
+            fonts = embedded_font_bytes(out)
+            new = out.encode('utf-8')
+        else:
+            new = optimize_png(data, keep_metadata)
+    except (ValueError, zlib.error, ElementTree.ParseError) as e:  # UnicodeDecodeError is a ValueError
+        error = f"{type(e).__name__}: {e}"
+        new = data
+    if prof:
+        prof.lap("transform")
+    modified = len(new) < len(data)
+    if not modified:
+        new = data
+    if verbose:
+        if error:
+            print(f"[ERR] {path}  ({error}; left as is)")
+        else:
+            saved = len(data) - len(new)
+            font_note = f", embedded fonts {fonts / 1024:,.1f} KB" if fonts else ""
+            print(f"[{'CHG' if modified else 'OK '}] {path}  ({len(data) / 1024:,.1f} KB -> {len(new) / 1024:,.1f} KB, "
+                  f"-{saved / max(len(data), 1):.1%}{font_note})")
+    if modified and not dry_run:
+        if backup:
+            stash(path, data)
+        path.write_bytes(new)
+        if prof:
+            prof.lap("write")
+    digest = content_hash(new) if modified else None
+    return AssetResult(len(data), len(new), fonts, digest, error), modified
+
+def main():
+    ap = argparse.ArgumentParser(description="Minify SVGs and losslessly recompress PNGs under docs/.")
+    ap.add_argument("--path", default="docs", help="Root folder to scan (default: ./docs)")
+    ap.add_argument("--ext", nargs="*", default=[".svg", ".png"], help="Asset file extensions")
+    ap.add_argument("--dry-run", action="store_true", help="Report the bytes that would be saved without writing")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    ap.add_argument("--include", action="append", default=[], help="Glob pattern to include (repeatable)")
+    ap.add_argument("--exclude", action="append", default=[], help="Glob pattern to exclude (repeatable)")
+    ap.add_argument("--precision", type=int, default=3,
+                    help="Decimals kept in SVG geometry numbers (default: 3; -1 leaves numbers alone)")
+    ap.add_argument("--transform-precision", type=int, default=6,
+                    help="Decimals kept in SVG transform matrices (default: 6; -1 leaves them alone)")
+    ap.add_argument("--keep-editor-data", action="store_true",
+                    help="Keep SVG metadata and Inkscape/Sodipodi/Sketch editor data")
+    ap.add_argument("--strip-drawio-source", dest="strip_drawio", action="store_true",
+                    help="Also remove the draw.io diagram source (the SVG can no longer be edited in draw.io)")
+    ap.add_argument("--keep-metadata", action="store_true", help="Keep PNG text and time chunks")
+    ap.add_argument("--subset-fonts", dest="subset", action="store_true",
+                    help="Subset fonts embedded in SVGs to the characters they use (needs fonttools and brotli)")
+    add_jobs_argument(ap)
+    add_cache_argument(ap, "optimize_assets")
+    ap.set_defaults(cache=DEFAULT_MANIFEST)
+    ap.add_argument("--no-cache", dest="cache", action="store_const", const=None,
+                    help="Process every asset, ignoring the manifest")
+    add_backup_arguments(ap)
+    add_profile_argument(ap, "optimize_assets")
+    args = ap.parse_args()
+    if args.restore:
+        sys.exit(restore_run(args.restore, args.backup_dir, args.verbose))
+
+    if args.subset:
+        try:
+            import fontTools.subset  # noqa: F401
+            import brotli  # noqa: F401  (woff2)
+        except ImportError as e:
+            print(f"ERROR: --subset-fonts needs fontTools and brotli (pip install fonttools brotli): {e}", file=sys.stderr)
+            sys.exit(2)
+
+    root = pathlib.Path(args.path).resolve()
+    if not root.exists() or not root.is_dir():
+        print(f"ERROR: Path not found or not a directory: {root}", file=sys.stderr)
+        sys.exit(2)
+
+    total_files = total_mod = total_cached = total_errors = 0
+    before = after = fonts = 0
+
+    profile = open_profile(args.profile, "optimize_assets", resolve_jobs(args.jobs))
+    archive = open_backup(args.backup, args.backup_dir, "optimize_assets")
+
+    candidates = iter_files(root, args.ext, args.include, args.exclude)
+    if profile:
+        candidates = profile.timed(candidates)
+
+    worker = partial(
+        process_file,
+        dry_run=args.dry_run,
+        verbose=args.verbose,
+        backup=args.backup,
+        precision=args.precision,
+        transform_precision=args.transform_precision,
+        keep_editor_data=args.keep_editor_data,
+        strip_drawio=args.strip_drawio,
+        keep_metadata=args.keep_metadata,
+        subset=args.subset,
+    )
+    cache = open_cache(args.cache, "optimize_assets", {
+        "precision": args.precision,
+        "transform_precision": args.transform_precision,
+        "keep_editor_data": args.keep_editor_data,
+        "strip_drawio": args.strip_drawio,
+        "keep_metadata": args.keep_metadata,
+        "subset": args.subset,
+    }, sources=[__file__])
+    paths = list(candidates)
+    for path, result in zip(paths, run_files(worker, paths, jobs=args.jobs, cache=cache, verbose=args.verbose)):
+        total_files += 1
+        if result is None:
+            total_cached += 1
+            continue
+        res, modified = result
+        before += res.before
+        after += res.after
+        fonts += res.fonts
+        total_errors += 1 if res.error else 0
+        total_mod += 1 if modified else 0
+        if cache and modified and not args.dry_run:
+            # The rewritten file is optimal: record it so the next run skips it
+            st = os.stat(path)
+            cache.record(path, (st.st_mtime_ns, st.st_size, res.digest))
+
+    if args.verbose or args.dry_run:
+        cached = f" | Cached: {total_cached}" if cache else ""
+        errors = f" | Errors: {total_errors}" if total_errors else ""
+        print(f"\nScanned: {total_files} files | Optimized: {total_mod}{cached}{errors} | Dry-run: {args.dry_run}")
+        saved = before - after
+        print(f"Bytes: {before / 1024:,.1f} KB -> {after / 1024:,.1f} KB | Saved: {saved / 1024:,.1f} KB "
+              f"({saved / max(before, 1):.1%})")
+        if fonts and not args.subset:
+            print(f"Embedded SVG fonts: {fonts / 1024:,.1f} KB (--subset-fonts can shrink them)")
+    close_backup(archive)
+    if cache:
+        cache.save()
+    if profile:
+        profile.finish(args.profile_top)
+    # CI gate: non-zero if changes would occur
+    if args.dry_run and total_mod > 0:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
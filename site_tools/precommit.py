@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+precommit.py — Run the cleanup.py rules on an explicit list of files in one process (pre-commit hook).
+
+Takes the staged filenames as arguments or, with none (or "-"), one per line on
+stdin, and applies the selected rules to exactly those files:
+
+- names without a Markdown extension (--ext) and files that no longer exist are ignored,
+- no directory walk, git call, process pool, cache or backup,
+- every file is read once and run through the byte prefilter first; the
+  transform modules (cleanup.py, or mdcheck.py with --check) are imported only
+  when some file may actually change, so a commit of clean files only pays for
+  the interpreter and prefilter.py.
+
+Rule options match cleanup.py's defaults; --replacement and --also-en-dash are
+passed through. --timing prints the import, per-file and total time to stderr.
+
+Usage:
+  python site_tools/precommit.py docs/index.md docs/gtm/pricing.md
+  git diff --cached --name-only --diff-filter=ACMR | python site_tools/precommit.py
+  python site_tools/precommit.py --check --timing docs/index.md
+
+Exit codes:
+  0 when no file needs changes
+  1 when files were rewritten (stage them and commit again), or with --check have violations
+  2 on an invalid rule name
+"""
+
+from __future__ import annotations
+import time
+_STARTED = time.perf_counter()
+
+import argparse
+import pathlib
+import sys
+from functools import partial
+from typing import Iterable, List
+
+from prefilter import RULES, applicable_rules, parse_rules
+
+def read_names(args: List[str], stdin: Iterable[str]) -> List[str]:
+    """Filenames from argv, or from stdin when there are none or one of them is "-"."""
+    names = [a for a in args if a != "-"]
+    if not args or "-" in args:
+        names += [line.strip() for line in stdin if line.strip()]
+    return names
+
+def select_files(names: Iterable[str], exts: Iterable[str]) -> List[pathlib.Path]:
+    """Existing files with a Markdown extension, in first-seen order and without duplicates."""
+    exts = {e.lower() for e in exts}
+    seen = set()
+    out: List[pathlib.Path] = []
+    for name in names:
+        path = pathlib.Path(name)
+        if path.suffix.lower() not in exts or path in seen or not path.is_file():
+            continue
+        seen.add(path)
+        out.append(path)
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Apply the site_tools cleanup rules to the given Markdown files (pre-commit hook).")
+    ap.add_argument("files", nargs="*", help="Files to process; read from stdin (one per line) when none or '-' is given")
+    ap.add_argument("--rules", default=",".join(RULES),
+                    help=f"Comma-separated rules to apply (default: {','.join(RULES)})")
+    ap.add_argument("--check", action="store_true",
+                    help="Only report violations as path:line:col: rule (no rewriting); exit 1 if any")
+    ap.add_argument("--ext", nargs="*", default=[".md", ".markdown"], help="Markdown file extensions")
+    ap.add_argument("--replacement", default="-", help="Replacement string for em dashes (default: '-')")
+    ap.add_argument("--also-en-dash", dest="also_en", action="store_true", default=False,
+                    help="Also replace en dashes (–) with the same replacement")
+    ap.add_argument("--timing", action="store_true", help="Print import, per-file and total time to stderr")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    args = ap.parse_args()
+    ready = time.perf_counter()
+
+    try:
+        rules = parse_rules(args.rules)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    options = dict(
+        skip_headings=True,
+        skip_leading_bold=True,
+        repl=args.replacement,
+        also_en=args.also_en,
+        keep_setext=True,
+        collapse_blank_lines=True,
+    )
+    files = select_files(read_names(args.files, sys.stdin), args.ext)
+
+    worker = None
+    failed = 0
+    timings = []
+    for path in files:
+        t0 = time.perf_counter()
+        if not applicable_rules(rules, path.read_bytes(), options):
+            if args.verbose:
+                print(f"[OK ] {path}")
+            timings.append((path, time.perf_counter() - t0))
+            continue
+        if worker is None:
+            # Only now pay for the transforms
+            if args.check:
+                from mdcheck import check_file
+                worker = partial(check_file, verbose=args.verbose, fail_fast=None, rules=rules, **options)
+            else:
+                from cleanup import process_file
+                worker = partial(process_file, dry_run=False, verbose=args.verbose, backup=False, rules=rules, **options)
+        _, changed = worker(path)
+        if changed:
+            failed += 1
+            if not args.check and not args.verbose:
+                print(f"Rewrote {path}")
+        timings.append((path, time.perf_counter() - t0))
+
+    if args.timing:
+        done = time.perf_counter()
+        print(f"precommit: {len(files)} files | {'violations' if args.check else 'rewritten'}: {failed} | "
+              f"startup {(ready - _STARTED) * 1000:.1f} ms | files {(done - ready) * 1000:.1f} ms | "
+              f"total {(done - _STARTED) * 1000:.1f} ms", file=sys.stderr)
+        for path, secs in timings:
+            print(f"  {secs * 1000:8.2f} ms  {path}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+precompress.py — Write .gz and .br variants next to the files of a built site
+
+Run after `mkdocs build`, so a static server can send the precompressed files
+(nginx gzip_static/brotli_static, Caddy precompressed, ...) instead of
+compressing every response:
+
+- compresses each .html, .js, .css, .svg and .json file (search_index.json
+  included) under the site directory on a process pool (--jobs),
+- writes FILE.gz (gzip level 9) and, when the brotli module is installed,
+  FILE.br (quality 11, --br-quality), with the source file's mtime,
+- skips files smaller than --min-size and variants that are not at most
+  --max-ratio of the original size (stale variants of those files are removed),
+- keeps every compressed output in a store keyed by the source's sha256
+  (default: .site_tools_cache/precompress, outside the site directory, which
+  `mkdocs build` wipes); unchanged files reuse their stored output instead of
+  being compressed again. Outputs no file used in this run are pruned
+  (except on runs filtered with --include/--exclude).
+
+Usage:
+  python precompress.py --jobs 0
+  python precompress.py --site-dir site --formats gz --min-size 512 -v
+  python precompress.py --dry-run -v
+
+Exit codes:
+  0 on success
+  2 on a missing site directory, or --formats br without the brotli module
+"""
+
+from __future__ import annotations
+import argparse
+import gzip
+import hashlib
+import os
+import pathlib
+import sys
+from functools import partial
+from typing import Dict, List, NamedTuple, Sequence
+
+from mdcache import CACHE_DIR
+from runner import add_jobs_argument, run_files
+from walk import iter_files
+
+DEFAULT_EXTS = [".html", ".js", ".css", ".svg", ".json"]
+DEFAULT_STORE = f"{CACHE_DIR}/precompress"
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+def brotli_available() -> bool:
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def compress(data: bytes, fmt: str, br_quality: int) -> bytes:
+    if fmt == "gz":
+        return gzip.compress(data, GZIP_LEVEL, mtime=0)  # mtime=0: same input, same bytes
+    import brotli
+    return brotli.compress(data, quality=br_quality)
+
+def _blob_name(digest: str, fmt: str, br_quality: int) -> str:
+    level = GZIP_LEVEL if fmt == "gz" else br_quality
+    return f"{digest[:2]}/{digest}.{fmt}{level}"
+
+def _write_atomic(path: pathlib.Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+class Outcome(NamedTuple):
+    size: int
+    written: Dict[str, int]   # format → bytes written (or that would be written)
+    reused: int               # variants taken from the store
+    skipped: str              # "small", "ratio" or ""
+    blobs: List[str]          # store entries this file used
+
+def process_file(path: pathlib.Path, formats: Sequence[str], store: pathlib.Path, min_size: int,
+                 max_ratio: float, br_quality: int, dry_run: bool, verbose: bool) -> Outcome:
+    st = os.stat(path)
+    if st.st_size < min_size:
+        stale = _remove_variants(path, formats, dry_run)
+        if verbose:
+            print(f"[OK ] {path}  (below --min-size{stale})")
+        return Outcome(st.st_size, {}, 0, "small", [])
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    written: Dict[str, int] = {}
+    reused = 0
+    blobs = []
+    for fmt in formats:
+        name = _blob_name(digest, fmt, br_quality)
+        blob = store / name
+        blobs.append(name)
+        try:
+            packed = blob.read_bytes()
+            reused += 1
+        except FileNotFoundError:
+            packed = compress(data, fmt, br_quality)
+            if not dry_run:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                _write_atomic(blob, packed)
+        target = path.with_name(f"{path.name}.{fmt}")
+        if len(packed) > len(data) * max_ratio:
+            if target.exists() and not dry_run:
+                target.unlink()
+            continue
+        written[fmt] = len(packed)
+        if not dry_run:
+            _write_atomic(target, packed)
+            os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+    if verbose:
+        sizes = ", ".join(f".{fmt} {n / 1024:,.1f} KB" for fmt, n in written.items()) or "does not compress well"
+        cached = f", {reused} reused" if reused else ""
+        print(f"[{'CHG' if written else 'OK '}] {path}  ({len(data) / 1024:,.1f} KB -> {sizes}{cached})")
+    return Outcome(len(data), written, reused, "" if written else "ratio", blobs)
+
+def _remove_variants(path: pathlib.Path, formats: Sequence[str], dry_run: bool) -> str:
+    """Delete FILE.gz/FILE.br left by an earlier run (e.g. the file shrank below --min-size)."""
+    stale = [path.with_name(f"{path.name}.{fmt}") for fmt in formats]
+    stale = [p for p in stale if p.exists()]
+    if not dry_run:
+        for p in stale:
+            p.unlink()
+    return f"; removed {len(stale)} stale variant(s)" if stale else ""
+
+def prune_store(store: pathlib.Path, used: set, dry_run: bool) -> int:
+    """Delete stored outputs that no file in this run used; returns how many."""
+    removed = 0
+    if not store.is_dir():
+        return 0
+    for blob in store.glob("*/*"):
+        if f"{blob.parent.name}/{blob.name}" not in used:
+            removed += 1
+            if not dry_run:
+                blob.unlink()
+    return removed
+
+def main():
+    ap = argparse.ArgumentParser(description="Write .gz/.br variants next to the files of a built site.")
+    ap.add_argument("--site-dir", default="site", help="Built site to compress (default: ./site)")
+    ap.add_argument("--ext", nargs="*", default=DEFAULT_EXTS, help="File extensions to compress")
+    ap.add_argument("--formats", nargs="+", choices=["gz", "br"], default=None,
+                    help="Variants to write (default: gz, plus br when the brotli module is installed)")
+    ap.add_argument("--min-size", type=int, default=1024,
+                    help="Leave files smaller than this many bytes uncompressed (default: 1024)")
+    ap.add_argument("--max-ratio", type=float, default=0.9,
+                    help="Only keep a variant at most this fraction of the original size (default: 0.9)")
+    ap.add_argument("--br-quality", type=int, choices=range(12), default=BROTLI_QUALITY, metavar="0-11",
+                    help=f"Brotli quality (default: {BROTLI_QUALITY}; lower is much faster on a cold store)")
+    ap.add_argument("--store", default=DEFAULT_STORE,
+                    help=f"Folder of compressed outputs reused across builds (default: {DEFAULT_STORE})")
+    ap.add_argument("--dry-run", action="store_true", help="Report the variants that would be written")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    ap.add_argument("--include", action="append", default=[], help="Glob pattern to include (repeatable)")
+    ap.add_argument("--exclude", action="append", default=[], help="Glob pattern to exclude (repeatable)")
+    add_jobs_argument(ap)
+    args = ap.parse_args()
+
+    root = pathlib.Path(args.site_dir).resolve()
+    if not root.is_dir():
+        print(f"ERROR: Site directory not found: {root} (run mkdocs build first)", file=sys.stderr)
+        sys.exit(2)
+    have_brotli = brotli_available()
+    formats = args.formats or (["gz", "br"] if have_brotli else ["gz"])
+    if "br" in formats and not have_brotli:
+        print("ERROR: --formats br needs the brotli module (pip install brotli)", file=sys.stderr)
+        sys.exit(2)
+    store = pathlib.Path(args.store).resolve()
+    if store == root or root in store.parents:
+        print(f"ERROR: --store must be outside the site directory: {store}", file=sys.stderr)
+        sys.exit(2)
+
+    worker = partial(
+        process_file,
+        formats=formats,
+        store=store,
+        min_size=args.min_size,
+        max_ratio=args.max_ratio,
+        br_quality=args.br_quality,
+        dry_run=args.dry_run,
+        verbose=args.verbose,
+    )
+    total_files = small = poor = reused = 0
+    before = 0
+    after: Dict[str, int] = {fmt: 0 for fmt in formats}
+    counts: Dict[str, int] = {fmt: 0 for fmt in formats}
+    used = set()
+    paths = list(iter_files(root, args.ext, args.include, args.exclude))
+    for outcome in run_files(worker, paths, jobs=args.jobs):
+        total_files += 1
+        small += outcome.skipped == "small"
+        poor += outcome.skipped == "ratio"
+        reused += outcome.reused
+        used.update(outcome.blobs)
+        if outcome.written:
+            before += outcome.size
+        for fmt, n in outcome.written.items():
+            after[fmt] += n
+            counts[fmt] += 1
+    # A filtered run sees only part of the site, so it cannot tell which outputs are unused
+    pruned = 0 if args.include or args.exclude else prune_store(store, used, args.dry_run)
+
+    written = ", ".join(f"{fmt}: {counts[fmt]}" for fmt in formats)
+    print(f"\nScanned: {total_files} files | Written: {written} | Reused: {reused} | "
+          f"Skipped: {small} small, {poor} incompressible | Dry-run: {args.dry_run}")
+    sizes = " | ".join(f".{fmt} {after[fmt] / 1024:,.1f} KB ({after[fmt] / max(before, 1):.1%})" for fmt in formats)
+    print(f"Compressed files: {before / 1024:,.1f} KB -> {sizes}")
+    if args.formats is None and not have_brotli:
+        print("Note: brotli module not installed; .br variants skipped (pip install brotli)")
+    if args.verbose and pruned:
+        print(f"Pruned {pruned} unused output(s) from {store}")
+
+if __name__ == "__main__":
+    main()
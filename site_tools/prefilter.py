@@ -0,0 +1,84 @@
+"""
+prefilter.py — Byte-level fast path for the site_tools transforms.
+
+Most Markdown files are already clean. Each process_file bulk-reads the raw bytes
+and runs a cheap literal/bytes-regex search for the sequences that could trigger
+its transform; only files with a candidate are decoded and sent through the full
+line-by-line pipeline. The checks are conservative: they may report a candidate
+that the full pipeline then leaves alone, but never miss one.
+
+- bold:     "**", "__", or an opening/closing <b>/<strong> tag.
+- em dash:  UTF-8 bytes of U+2014 (and U+2013 with --also-en-dash).
+- rule:     a line made only of *, - or _ markers, or two blank lines in a row.
+            Files holding Unicode whitespace or line breaks other than space, tab,
+            CR and LF always take the full path, since bytes regexes do not see them.
+"""
+
+from __future__ import annotations
+import re
+from typing import Dict, Sequence, Tuple
+
+# cleanup.py rule names, in the order they are applied
+RULES = ("bold", "em-dash", "rule")
+
+EM_DASH_BYTES = "—".encode('utf-8')
+EN_DASH_BYTES = "–".encode('utf-8')
+
+# Opening or closing <b>/<strong>; "\xc5\xbf" is U+017F, which matches "s" under re.IGNORECASE
+HTML_B_TAG_BYTES_RE = re.compile(rb'</?(?:b|(?:s|\xc5\xbf)trong)', re.IGNORECASE)
+
+HR_LINE_BYTES_RE = re.compile(rb'^[ \t\r]*([*\-_])(?:[ \t\r]*\1){2,}[ \t\r]*$', re.MULTILINE)
+BLANK_RUN_BYTES_RE = re.compile(rb'(?:\A|\n)[ \t\r]*\n[ \t\r]*(?:\n|\Z)')
+
+# Whitespace / line boundaries that str.strip(), str.splitlines() and "\s" honor beyond " \t\r\n",
+# plus a lone CR (a line break for splitlines, not for a bytes "$")
+UNICODE_SPACE_BYTES_RE = re.compile(
+    rb'[\x0b\x0c\x1c-\x1f]|\r(?!\n)|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80'
+)
+
+def decode(data: bytes) -> str:
+    """Decode like path.read_text(encoding='utf-8', errors='replace'), including newline translation."""
+    text = data.decode('utf-8', errors='replace')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+def may_have_bold(data: bytes) -> bool:
+    return b'**' in data or b'__' in data or HTML_B_TAG_BYTES_RE.search(data) is not None
+
+def may_have_dashes(data: bytes, also_en: bool) -> bool:
+    return EM_DASH_BYTES in data or (also_en and EN_DASH_BYTES in data)
+
+def may_have_rules(data: bytes, collapse_blank_lines: bool) -> bool:
+    if UNICODE_SPACE_BYTES_RE.search(data):
+        return True
+    if HR_LINE_BYTES_RE.search(data):
+        return True
+    return collapse_blank_lines and BLANK_RUN_BYTES_RE.search(data) is not None
+
+def parse_rules(value: str) -> Tuple[str, ...]:
+    """Parse a comma-separated cleanup.py rule list, keeping the canonical rule order."""
+    wanted = {r.strip() for r in value.split(',') if r.strip()}
+    unknown = wanted - set(RULES)
+    if unknown:
+        raise ValueError(f"Unknown rule(s): {', '.join(sorted(unknown))} (choose from {', '.join(RULES)})")
+    return tuple(r for r in RULES if r in wanted)
+
+def may_apply(rule: str, data: bytes, options: Dict[str, object]) -> bool:
+    """Byte-level prefilter for a cleanup.py rule name: False when the rule cannot change the file."""
+    if rule == "bold":
+        return may_have_bold(data)
+    if rule == "em-dash":
+        return may_have_dashes(data, options.get("also_en", False))
+    return may_have_rules(data, options.get("collapse_blank_lines", True))
+
+def applicable_rules(rules: Sequence[str], data: bytes, options: Dict[str, object]) -> Tuple[str, ...]:
+    """
+    The subset of rules (cleanup.py order) that may change the file. Once bold or
+    em-dash applies, rule stays too: their rewriting can leave a rule line or an
+    empty line behind (e.g. "<b>---</b>").
+    """
+    active = [r for r in rules if may_apply(r, data, options)]
+    if active and "rule" in rules and "rule" not in active:
+        active.append("rule")
+    return tuple(active)
@@ -8,15 +8,21 @@ Features:
 - Skips YAML front matter at the top of a file.
 - Optional: Skip headings (ATX "#" and Setext "underlines") [default ON].
 - Optional: Preserve a leading label-style bold at the start of a line [default ON].
-- Optional: Create .bak backups before modifying files.
+- Optional: Back up the originals of modified files into one archive per run (--backup, --restore).
 - Optional: Include/Exclude glob patterns to target a subset of files.
 
 Usage:
   python remove_bold.py --dry-run -v
   python remove_bold.py --path docs --include "docs/gtm/**/*.md" --exclude "docs/brand-guide/**" -v
   python remove_bold.py --backup -v
+  python remove_bold.py --restore latest -v
+  python remove_bold.py --path archived/docs-v1.zip --dry-run -v
   python remove_bold.py --no-skip-headings
   python remove_bold.py --no-skip-leading-bold
+  python remove_bold.py --dry-run --jobs 0
+  python remove_bold.py --dry-run --cache
+  python remove_bold.py --dry-run --changed-since origin/main -v
+  python remove_bold.py --dry-run --profile --profile-top 20
 
 Exit codes:
   0 on success (or no changes)
@@ -26,92 +32,107 @@ Exit codes:
 
 from __future__ import annotations
 import argparse
-import fnmatch
 import pathlib
 import re
 import sys
-from typing import Tuple, List
+from functools import partial
+from typing import Tuple, List, Optional
+
+from gitscope import GitScopeError, add_changed_since_argument, changed_paths
+from prefilter import decode, may_have_bold
+from mdcache import add_cache_argument, open_cache, transform_sources
+from backups import add_backup_arguments, close_backup, open_backup, restore_run, stash
+from runner import add_jobs_argument, resolve_jobs, run_files
+from runprofile import add_profile_argument, open_profile, start_file
+from walk import SKIP_DIRS, iter_files, should_process
+from ziparchive import is_archive, process_archive
+from mdblocks import HEADINGS, INLINE_CODE_SPLIT_RE, PASSTHROUGH, scan_lines
 
 # Regexes
-FENCE_RE = re.compile(r'^\s*([`~]{3,})(.*)$')                     # start/end of fenced code block
-INLINE_CODE_SPLIT_RE = re.compile(r'(`+[^`]*`+)')                 # split keeping inline code spans
 HTML_B_TAGS_RE = re.compile(r'</?(?:strong|b)\s*>', re.IGNORECASE)
 
-# Bold patterns for segments outside code:
-MD_BOLD_DOUBLE_RE = re.compile(r'\*\*(.+?)\*\*', re.DOTALL)
-MD_BOLD_UNDERS_RE = re.compile(r'__(.+?)__', re.DOTALL)
+def _unwrap(seg: str, marker: str) -> Tuple[str, int]:
+    r"""
+    Remove marker…marker pairs (at least one character inside), scanning left to right
+    with str.find. Same result as re.subn(r'\*\*(.+?)\*\*', r'\1', seg) for marker '**'.
+    """
+    start = seg.find(marker)
+    if start == -1:
+        return seg, 0
+    out: List[str] = []
+    pos = 0
+    count = 0
+    while start != -1:
+        end = seg.find(marker, start + 3)
+        if end == -1:
+            # No closer for the first open marker means none for any later one either
+            break
+        out.append(seg[pos:start])
+        out.append(seg[start + 2:end])
+        pos = end + 2
+        count += 1
+        start = seg.find(marker, pos)
+    if not count:
+        return seg, 0
+    out.append(seg[pos:])
+    return ''.join(out), count
+
+def strip_bold_segment(seg: str) -> Tuple[str, int]:
+    """
+    Remove bold from text that contains no code span: HTML bold tags first, then
+    **text**, then __text__. Returns (new_seg, changes_count); tags are not counted.
+    """
+    if '<' in seg:
+        seg = HTML_B_TAGS_RE.sub('', seg)
+    seg, c1 = _unwrap(seg, '**')
+    seg, c2 = _unwrap(seg, '__')
+    return seg, c1 + c2
+
+def _leading_bold_end(seg: str) -> int:
+    """Offset just past a leading **label** or __label__ (after optional whitespace), or 0 if none."""
+    body = seg.lstrip()
+    marker = body[:2]
+    if marker != '**' and marker != '__':
+        return 0
+    end = body.find(marker, 3)
+    if end == -1:
+        return 0
+    return len(seg) - len(body) + end + 2
 
-FRONT_MATTER_DELIM = re.compile(r'^\s*---\s*$')
-ATX_HEADING_RE = re.compile(r'^\s*#{1,6}\s+')
-SETEXT_UNDERLINE_RE = re.compile(r'^\s*(=+|-+)\s*$')
+def _split_code(line: str) -> List[str]:
+    return INLINE_CODE_SPLIT_RE.split(line) if '`' in line else [line]
 
 def process_line_outside_code(line: str) -> Tuple[str, int]:
     """
     Remove bold markers from a single line that is OUTSIDE a fenced code block.
     Preserves inline code spans (backticks). Returns (new_line, changes_count).
     """
-    parts = INLINE_CODE_SPLIT_RE.split(line)
-    changed = 0
-    for i in range(0, len(parts), 2):  # even indices: outside inline code
-        seg = parts[i]
-        before = seg
-        # Remove HTML bold tags first
-        seg = HTML_B_TAGS_RE.sub('', seg)
-        # Replace **text** → text
-        seg, c1 = MD_BOLD_DOUBLE_RE.subn(r'\1', seg)
-        # Replace __text__ → text
-        seg, c2 = MD_BOLD_UNDERS_RE.subn(r'\1', seg)
-        changed += c1 + c2
-        if seg != before:
-            parts[i] = seg
-    return ''.join(parts), changed
+    return process_line_outside_code_with_leading(line, skip_leading_bold=False)
 
-# If True, keep leading **label** or __label__ at the beginning of a non-code/non-heading line.
-def _preserve_leading_bold_segment(seg: str, enable: bool) -> tuple[str, int]:
-    if not enable:
-        return seg, 0
-    # Match optional indentation then a single leading bold span (**...** or __...__)
-    m = re.match(r'^(\s*)(\*\*.+?\*\*|__.+?__)(.*)$', seg, flags=re.DOTALL)
-    if not m:
-        return seg, 0
-    indent, leading_bold, rest = m.groups()
-    # Do not alter the leading bold; process only the rest (outside inline code already)
-    processed_rest, changes = process_line_outside_code(rest)
-    return indent + leading_bold + processed_rest, changes
-
-def process_line_outside_code_with_leading(line: str, skip_leading_bold: bool) -> tuple[str, int]:
+def process_line_outside_code_with_leading(line: str, skip_leading_bold: bool, parts: Optional[List[str]] = None) -> tuple[str, int]:
     """
     Like process_line_outside_code, but preserves a leading **bold** or __bold__ segment if configured.
+    parts may carry the line already split around code spans (see BlockIndex.segments).
+
+    One left-to-right pass over the outside-code segments: the leading label (first
+    segment only) keeps its **/__ markers but loses any <b>/<strong> tags, and the
+    text after it is stripped exactly once.
     """
-    parts = INLINE_CODE_SPLIT_RE.split(line)
+    if parts is None:
+        parts = _split_code(line)
     changed_total = 0
 
-    if parts:
-        # Preserve the very first outside-code part's leading bold if present
-        preserved, ch = _preserve_leading_bold_segment(parts[0], enable=skip_leading_bold)
-        if preserved != parts[0]:
-            parts[0] = preserved
-        changed_total += ch
-
-    # Now strip the rest; if we preserved leading bold in parts[0], protect it while stripping other bolds
-    for i in range(0, len(parts), 2):
-        if i == 0 and skip_leading_bold:
-            before = parts[0]
-            # Remove HTML bold tags
-            seg = HTML_B_TAGS_RE.sub('', before)
-            # Protect the leading bold by temporarily marking it, then strip others
-            lead_match = re.match(r'^(\s*)(\*\*.+?\*\*|__.+?__)', before, flags=re.DOTALL)
-            if lead_match:
-                seg_marked = re.sub(r'^(\s*)(\*\*.+?\*\*|__.+?__)', r'\1@@LEADING_BOLD@@', seg, count=1, flags=re.DOTALL)
-                seg_marked, c1 = MD_BOLD_DOUBLE_RE.subn(r'\1', seg_marked)
-                seg_marked, c2 = MD_BOLD_UNDERS_RE.subn(r'\1', seg_marked)
-                seg_final = seg_marked.replace('@@LEADING_BOLD@@', lead_match.group(0))
-                parts[0] = seg_final
-                changed_total += (c1 + c2)
-                continue
-            # If no leading bold, just strip normally
-        new_seg, ch = process_line_outside_code(parts[i])
-        if new_seg != parts[i]:
+    for i in range(0, len(parts), 2):  # even indices: outside inline code
+        seg = parts[i]
+        if not seg:
+            continue
+        keep = _leading_bold_end(seg) if i == 0 and skip_leading_bold else 0
+        label = seg[:keep]
+        if '<' in label:
+            label = HTML_B_TAGS_RE.sub('', label)
+        new_tail, ch = strip_bold_segment(seg[keep:] if keep else seg)
+        new_seg = label + new_tail
+        if new_seg != seg:
             parts[i] = new_seg
         changed_total += ch
 
@@ -124,91 +145,57 @@ def strip_bold_from_text(text: str, skip_headings: bool, skip_leading_bold: bool
     Returns (new_text, total_changes).
     """
     lines = text.splitlines(keepends=False)
-    out_lines: List[str] = []
-    in_fence = False
-    fence_marker = None
-    in_front_matter = False
+    index = scan_lines(lines)
     total_changes = 0
 
-    # Detect YAML front matter only if present at the very start
-    if lines and FRONT_MATTER_DELIM.match(lines[0] or ''):
-        in_front_matter = True
-
-    for ln, line in enumerate(lines):
-        # Handle YAML front matter block at the very top
-        if in_front_matter:
-            out_lines.append(line)
-            if ln != 0 and FRONT_MATTER_DELIM.match(line):
-                in_front_matter = False
-            continue
-
-        # Handle fenced code blocks
-        m = FENCE_RE.match(line)
-        if m:
-            marker = m.group(1)
-            if not in_fence:
-                in_fence = True
-                fence_marker = marker
-            else:
-                # Only end fence if markers match char and length or longer
-                if marker[0] == fence_marker[0] and len(marker) >= len(fence_marker):
-                    in_fence = False
-                    fence_marker = None
-            out_lines.append(line)
-            continue
-
-        if in_fence:
-            out_lines.append(line)
-            continue
-
-        # Headings: skip if requested (ATX or Setext underline lines)
-        if skip_headings:
-            if ATX_HEADING_RE.match(line):
-                out_lines.append(line)
-                continue
-            if ln > 0 and SETEXT_UNDERLINE_RE.match(line) and lines[ln - 1].strip():
-                out_lines.append(line)
-                continue
-
-        # Outside fences and front matter → process
-        new_line, changed = process_line_outside_code_with_leading(line, skip_leading_bold=skip_leading_bold)
+    # Only prose (and headings, unless skipped) is rewritten; lines are replaced in place
+    skip = PASSTHROUGH | HEADINGS if skip_headings else PASSTHROUGH
+    for ln, _kind in index.lines_of(skip):
+        line = lines[ln]
+        new_line, changed = process_line_outside_code_with_leading(
+            line, skip_leading_bold=skip_leading_bold, parts=index.segments(ln, line))
         total_changes += changed
-        out_lines.append(new_line)
+        lines[ln] = new_line
 
-    return '\n'.join(out_lines) + ('' if text.endswith('\n') else ''), total_changes
-
-def should_process(path: pathlib.Path, includes: List[str], excludes: List[str]) -> bool:
-    p = str(path.as_posix())
-    if includes:
-        if not any(fnmatch.fnmatch(p, pat) for pat in includes):
-            return False
-    if excludes:
-        if any(fnmatch.fnmatch(p, pat) for pat in excludes):
-            return False
-    return True
+    return '\n'.join(lines) + ('' if text.endswith('\n') else ''), total_changes
 
 def process_file(path: pathlib.Path, dry_run: bool, verbose: bool, skip_headings: bool, backup: bool, skip_leading_bold: bool) -> Tuple[int, bool]:
-    original = path.read_text(encoding='utf-8', errors='replace')
+    prof = start_file(path)
+    data = path.read_bytes()
+    if prof:
+        prof.lap("read", len(data))
+    if not may_have_bold(data):
+        # Fast path: no bold marker anywhere in the file
+        if prof:
+            prof.lap("decode")
+        if verbose:
+            print(f"[OK ] {path}  (replacements=0)")
+        return 0, False
+    original = decode(data)
+    if prof:
+        prof.lap("decode")
     new_text, changes = strip_bold_from_text(original, skip_headings=skip_headings, skip_leading_bold=skip_leading_bold)
+    if prof:
+        prof.lap("transform")
     modified = (changes > 0 and new_text != original)
     if verbose:
         print(f"[{'CHG' if modified else 'OK '}] {path}  (replacements={changes})")
     if modified and not dry_run:
         if backup:
-            bak = path.with_suffix(path.suffix + ".bak")
-            bak.write_text(original, encoding='utf-8')
+            stash(path, data)
         path.write_text(new_text, encoding='utf-8')
+        if prof:
+            prof.lap("write")
     return changes, modified
 
 def main():
     ap = argparse.ArgumentParser(description="Strip bold formatting from Markdown files under a docs/ folder.")
-    ap.add_argument("--path", default="docs", help="Root folder to scan (default: ./docs)")
+    ap.add_argument("--path", default="docs", help="Root folder or .zip archive to scan (default: ./docs)")
     ap.add_argument("--ext", nargs="*", default=[".md", ".markdown"], help="Markdown file extensions to include")
     ap.add_argument("--dry-run", action="store_true", help="Show changes without writing")
     ap.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
     ap.add_argument("--skip-headings", dest="skip_headings", action="store_true", default=True, help="Skip heading lines (ATX/Setext) [default]")
     ap.add_argument("--no-skip-headings", dest="skip_headings", action="store_false", help="Do not skip headings")
-    ap.add_argument("--backup", action="store_true", help="Write .bak backups before modifying")
     ap.add_argument("--include", action="append", default=[], help="Glob pattern to include (can be repeated)")
     ap.add_argument("--exclude", action="append", default=[], help="Glob pattern to exclude (can be repeated)")
     ap.add_argument(
@@ -221,41 +208,81 @@ def main():
         action="store_false",
         help="Also strip leading bold labels at line start"
     )
+    add_jobs_argument(ap)
+    add_changed_since_argument(ap)
+    add_cache_argument(ap, "remove_bold")
+    add_backup_arguments(ap)
+    add_profile_argument(ap, "remove_bold")
     args = ap.parse_args()
+    if args.restore:
+        sys.exit(restore_run(args.restore, args.backup_dir, args.verbose))
 
     root = pathlib.Path(args.path).resolve()
-    if not root.exists() or not root.is_dir():
-        print(f"ERROR: Path not found or not a directory: {root}", file=sys.stderr)
+    zipped = is_archive(root)
+    if not zipped and (not root.exists() or not root.is_dir()):
+        print(f"ERROR: Path not found or not a directory or zip archive: {root}", file=sys.stderr)
+        sys.exit(2)
+    if zipped and args.changed_since:
+        print("ERROR: --changed-since needs a folder, not a zip archive", file=sys.stderr)
         sys.exit(2)
 
     total_files = 0
+    total_cached = 0
     total_changes = 0
     total_modified = 0
 
-    skip_dirs = {".git", ".venv", "node_modules", ".mypy_cache", ".pytest_cache", ".cache"}
+    profile = open_profile(args.profile, "remove_bold", resolve_jobs(args.jobs))
+    archive = open_backup(args.backup, args.backup_dir, "remove_bold")
 
-    for p in root.rglob("*"):
-        if p.is_dir():
-            if p.name in skip_dirs:
-                continue
-        else:
-            if p.suffix.lower() in args.ext and p.is_file():
-                if not should_process(p, args.include, args.exclude):
-                    continue
-                total_files += 1
-                changes, modified = process_file(
-                    p,
-                    dry_run=args.dry_run,
-                    verbose=args.verbose,
-                    skip_headings=args.skip_headings,
-                    backup=args.backup,
-                    skip_leading_bold=args.skip_leading_bold,
-                )
-                total_changes += changes
-                total_modified += 1 if modified else 0
+    changed = None
+    if args.changed_since:
+        try:
+            changed = changed_paths(root, args.changed_since, args.ext, SKIP_DIRS)
+        except GitScopeError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(2)
+
+    if changed is not None:
+        candidates = (p for p in changed if should_process(p, args.include, args.exclude))
+    else:
+        candidates = iter_files(root, args.ext, args.include, args.exclude)
+    if profile:
+        candidates = profile.timed(candidates)
+
+    worker = partial(
+        process_file,
+        dry_run=args.dry_run,
+        verbose=args.verbose,
+        skip_headings=args.skip_headings,
+        backup=args.backup and not zipped,  # a zip archive is backed up whole
+        skip_leading_bold=args.skip_leading_bold,
+    )
+    cache = open_cache(None if zipped else args.cache, "remove_bold", {
+        "skip_headings": args.skip_headings,
+        "skip_leading_bold": args.skip_leading_bold,
+    }, sources=transform_sources(__file__))
+    if zipped:
+        results = process_archive(root, worker, args.ext, args.include, args.exclude,
+                                  write=not args.dry_run, backup=args.backup)
+    else:
+        results = run_files(worker, candidates, jobs=args.jobs, cache=cache, verbose=args.verbose)
+    for result in results:
+        total_files += 1
+        if result is None:
+            total_cached += 1
+            continue
+        changes, modified = result
+        total_changes += changes
+        total_modified += 1 if modified else 0
 
     if args.verbose or args.dry_run:
-        print(f"\nScanned: {total_files} files | Modified: {total_modified} | Replacements: {total_changes} | Dry-run: {args.dry_run}")
+        cached = f" | Cached: {total_cached}" if cache else ""
+        print(f"\nScanned: {total_files} files | Modified: {total_modified} | Replacements: {total_changes}{cached} | Dry-run: {args.dry_run}")
+    close_backup(archive)
+    if cache:
+        cache.save()
+    if profile:
+        profile.finish(args.profile_top)
     # Exit code non-zero if dry-run with modifications (useful in CI)
     if args.dry_run and total_modified > 0:
         sys.exit(1)
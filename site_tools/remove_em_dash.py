@@ -12,38 +12,35 @@ Safety:
 Usage:
   python remove_em_dash.py --dry-run -v
   python remove_em_dash.py --path docs --backup -v
+  python remove_em_dash.py --restore latest -v
+  python remove_em_dash.py --path archived/docs-v1.zip --dry-run -v
   python remove_em_dash.py --replacement " - " --also-en-dash -v
+  python remove_em_dash.py --dry-run --jobs 0
+  python remove_em_dash.py --dry-run --cache
+  python remove_em_dash.py --dry-run --changed-since origin/main -v
+  python remove_em_dash.py --dry-run --profile --profile-top 20
 """
 
 from __future__ import annotations
 import argparse
 import pathlib
-import re
 import sys
-import fnmatch
-from typing import List, Tuple
-
-FENCE_RE = re.compile(r'^\s*([`~]{3,})(.*)$')
-INLINE_CODE_SPLIT_RE = re.compile(r'(`+[^`]*`+)')
-FRONT_MATTER_DELIM = re.compile(r'^\s*---\s*$')
-ATX_HEADING_RE = re.compile(r'^\s*#{1,6}\s+')
-SETEXT_UNDERLINE_RE = re.compile(r'^\s*(=+|-+)\s*$')
+from functools import partial
+from typing import List, Optional, Tuple
+
+from gitscope import GitScopeError, add_changed_since_argument, changed_paths
+from prefilter import decode, may_have_dashes
+from mdcache import add_cache_argument, open_cache, transform_sources
+from backups import add_backup_arguments, close_backup, open_backup, restore_run, stash
+from runner import add_jobs_argument, resolve_jobs, run_files
+from runprofile import add_profile_argument, open_profile, start_file
+from walk import SKIP_DIRS, iter_files, should_process
+from ziparchive import is_archive, process_archive
+from mdblocks import HEADINGS, INLINE_CODE_SPLIT_RE, PASSTHROUGH, scan_lines
 
 EM_DASH = "\u2014"
 EN_DASH = "\u2013"
 
-def _norm(pat: str) -> str:
-    """Normalize glob patterns to POSIX style so Windows backslashes work."""
-    return pat.replace('\\', '/')
-
-def should_process(path: pathlib.Path, includes: List[str], excludes: List[str]) -> bool:
-    p = path.as_posix()
-    if includes and not any(fnmatch.fnmatch(p, _norm(pat)) for pat in includes):
-        return False
-    if excludes and any(fnmatch.fnmatch(p, _norm(pat)) for pat in excludes):
-        return False
-    return True
-
 def replace_outside_code_segment(seg: str, repl: str, also_en: bool) -> Tuple[str, int]:
     count = 0
     c1 = seg.count(EM_DASH)
@@ -57,8 +54,9 @@ def replace_outside_code_segment(seg: str, repl: str, also_en: bool) -> Tuple[st
         count += c2
     return seg, count
 
-def process_line(line: str, repl: str, also_en: bool) -> Tuple[str, int]:
-    parts = INLINE_CODE_SPLIT_RE.split(line)  # keep code spans intact
+def process_line(line: str, repl: str, also_en: bool, parts: Optional[List[str]] = None) -> Tuple[str, int]:
+    if parts is None:
+        parts = INLINE_CODE_SPLIT_RE.split(line)  # keep code spans intact
     changes = 0
     for i in range(0, len(parts), 2):  # even indices are outside code
         parts[i], c = replace_outside_code_segment(parts[i], repl, also_en)
@@ -67,75 +65,56 @@ def process_line(line: str, repl: str, also_en: bool) -> Tuple[str, int]:
 
 def process_text(text: str, skip_headings: bool, repl: str, also_en: bool) -> Tuple[str, int]:
     lines = text.splitlines(keepends=False)
-    out_lines: List[str] = []
-    in_fence = False
-    fence_marker = None
-    in_front_matter = False
+    index = scan_lines(lines)
     total_changes = 0
 
-    if lines and FRONT_MATTER_DELIM.match(lines[0] or ''):
-        in_front_matter = True
-
-    for ln, line in enumerate(lines):
-        if in_front_matter:
-            out_lines.append(line)
-            if ln != 0 and FRONT_MATTER_DELIM.match(line):
-                in_front_matter = False
-            continue
-
-        m = FENCE_RE.match(line)
-        if m:
-            marker = m.group(1)
-            if not in_fence:
-                in_fence = True
-                fence_marker = marker
-            else:
-                if marker[0] == fence_marker[0] and len(marker) >= len(fence_marker):
-                    in_fence = False
-                    fence_marker = None
-            out_lines.append(line)
-            continue
-
-        if in_fence:
-            out_lines.append(line)
-            continue
-
-        # Headings (optional skip)
-        if skip_headings:
-            if ATX_HEADING_RE.match(line):
-                out_lines.append(line)
-                continue
-            if ln > 0 and SETEXT_UNDERLINE_RE.match(line) and lines[ln - 1].strip():
-                out_lines.append(line)
-                continue
-
-        new_line, ch = process_line(line, repl, also_en)
-        out_lines.append(new_line)
+    # Headings (optional skip); front matter and fences are never touched
+    skip = PASSTHROUGH | HEADINGS if skip_headings else PASSTHROUGH
+    for ln, _kind in index.lines_of(skip):
+        line = lines[ln]
+        new_line, ch = process_line(line, repl, also_en, parts=index.segments(ln, line))
+        lines[ln] = new_line
         total_changes += ch
 
     trailing_nl = text.endswith('\n')
-    result = '\n'.join(out_lines) + ('\n' if trailing_nl else '')
+    result = '\n'.join(lines) + ('\n' if trailing_nl else '')
     return result, total_changes
 
 def process_file(path: pathlib.Path, dry_run: bool, verbose: bool, skip_headings: bool, backup: bool, repl: str, also_en: bool) -> Tuple[int, bool]:
-    original = path.read_text(encoding='utf-8', errors='replace')
+    prof = start_file(path)
+    data = path.read_bytes()
+    if prof:
+        prof.lap("read", len(data))
+    if not may_have_dashes(data, also_en):
+        # Fast path: no em (or en) dash anywhere in the file
+        if prof:
+            prof.lap("decode")
+        if verbose:
+            print(f"[OK ] {path}  (replacements=0)")
+        return 0, False
+    original = decode(data)
+    if prof:
+        prof.lap("decode")
     new_text, changes = process_text(original, skip_headings=skip_headings, repl=repl, also_en=also_en)
+    if prof:
+        prof.lap("transform")
     modified = (changes > 0 and new_text != original)
     if verbose:
         print(f"[{'CHG' if modified else 'OK '}] {path}  (replacements={changes})")
     if modified and not dry_run:
         if backup:
-            path.with_suffix(path.suffix + ".bak").write_text(original, encoding='utf-8')
+            stash(path, data)
         path.write_text(new_text, encoding='utf-8')
+        if prof:
+            prof.lap("write")
     return changes, modified
 
 def main():
     ap = argparse.ArgumentParser(description="Replace em dash (—) characters in Markdown under docs/.")
-    ap.add_argument("--path", default="docs", help="Root folder to scan (default: ./docs)")
+    ap.add_argument("--path", default="docs", help="Root folder or .zip archive to scan (default: ./docs)")
     ap.add_argument("--ext", nargs="*", default=[".md", ".markdown"], help="Markdown file extensions")
     ap.add_argument("--dry-run", action="store_true", help="Show changes without writing")
     ap.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
-    ap.add_argument("--backup", action="store_true", help="Write .bak backups before modifying")
     ap.add_argument("--include", action="append", default=[], help="Glob pattern to include (repeatable)")
     ap.add_argument("--exclude", action="append", default=[], help="Glob pattern to exclude (repeatable)")
     ap.add_argument("--skip-headings", dest="skip_headings", action="store_true", default=True,
@@ -146,39 +125,80 @@ def main():
                     help="Replacement string for em dashes (default: '-')")
     ap.add_argument("--also-en-dash", dest="also_en", action="store_true", default=False,
                     help="Also replace en dashes (–) with the same replacement")
+    add_jobs_argument(ap)
+    add_changed_since_argument(ap)
+    add_cache_argument(ap, "remove_em_dash")
+    add_backup_arguments(ap)
+    add_profile_argument(ap, "remove_em_dash")
     args = ap.parse_args()
+    if args.restore:
+        sys.exit(restore_run(args.restore, args.backup_dir, args.verbose))
 
     root = pathlib.Path(args.path).resolve()
-    if not root.exists() or not root.is_dir():
-        print(f"ERROR: Path not found or not a directory: {root}", file=sys.stderr)
+    zipped = is_archive(root)
+    if not zipped and (not root.exists() or not root.is_dir()):
+        print(f"ERROR: Path not found or not a directory or zip archive: {root}", file=sys.stderr)
+        sys.exit(2)
+    if zipped and args.changed_since:
+        print("ERROR: --changed-since needs a folder, not a zip archive", file=sys.stderr)
         sys.exit(2)
 
-    total_files = total_mod = total_changes = 0
-    skip_dirs = {".git", ".venv", "node_modules", ".mypy_cache", ".pytest_cache", ".cache"}
-
-    for p in root.rglob("*"):
-        if p.is_dir():
-            if p.name in skip_dirs:
-                continue
-        else:
-            if p.suffix.lower() in args.ext and p.is_file():
-                if not should_process(p, args.include, args.exclude):
-                    continue
-                total_files += 1
-                changes, modified = process_file(
-                    p,
-                    dry_run=args.dry_run,
-                    verbose=args.verbose,
-                    skip_headings=args.skip_headings,
-                    backup=args.backup,
-                    repl=args.replacement,
-                    also_en=args.also_en
-                )
-                total_changes += changes
-                total_mod += 1 if modified else 0
+    total_files = total_mod = total_changes = total_cached = 0
+
+    profile = open_profile(args.profile, "remove_em_dash", resolve_jobs(args.jobs))
+    archive = open_backup(args.backup, args.backup_dir, "remove_em_dash")
+
+    changed = None
+    if args.changed_since:
+        try:
+            changed = changed_paths(root, args.changed_since, args.ext, SKIP_DIRS)
+        except GitScopeError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(2)
+
+    if changed is not None:
+        candidates = (p for p in changed if should_process(p, args.include, args.exclude))
+    else:
+        candidates = iter_files(root, args.ext, args.include, args.exclude)
+    if profile:
+        candidates = profile.timed(candidates)
+
+    worker = partial(
+        process_file,
+        dry_run=args.dry_run,
+        verbose=args.verbose,
+        skip_headings=args.skip_headings,
+        backup=args.backup and not zipped,  # a zip archive is backed up whole
+        repl=args.replacement,
+        also_en=args.also_en
+    )
+    cache = open_cache(None if zipped else args.cache, "remove_em_dash", {
+        "skip_headings": args.skip_headings,
+        "replacement": args.replacement,
+        "also_en": args.also_en,
+    }, sources=transform_sources(__file__))
+    if zipped:
+        results = process_archive(root, worker, args.ext, args.include, args.exclude,
+                                  write=not args.dry_run, backup=args.backup)
+    else:
+        results = run_files(worker, candidates, jobs=args.jobs, cache=cache, verbose=args.verbose)
+    for result in results:
+        total_files += 1
+        if result is None:
+            total_cached += 1
+            continue
+        changes, modified = result
+        total_changes += changes
+        total_mod += 1 if modified else 0
 
     if args.verbose or args.dry_run:
-        print(f"\nScanned: {total_files} files | Modified: {total_mod} | Replacements: {total_changes} | Dry-run: {args.dry_run}")
+        cached = f" | Cached: {total_cached}" if cache else ""
+        print(f"\nScanned: {total_files} files | Modified: {total_mod} | Replacements: {total_changes}{cached} | Dry-run: {args.dry_run}")
+    close_backup(archive)
+    if cache:
+        cache.save()
+    if profile:
+        profile.finish(args.profile_top)
     # CI gate: non-zero if changes would occur
     if args.dry_run and total_mod > 0:
         sys.exit(1)
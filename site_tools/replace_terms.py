@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+replace_terms.py — Apply a dictionary of term substitutions to Markdown under ./docs
+
+Loads a rules file (default: site_tools/ste_terms.txt) of STE-style substitutions,
+such as banned words to approved terms, curly quotes and non-breaking spaces, and
+compiles all terms into one trie-shaped regex alternation. The text is scanned
+once, whatever the number of terms: the regex engine only stops at positions
+whose character can start a term, and from there follows a single trie path.
+
+Rules file, one substitution per line:
+  old => new
+  old => new | word,icase
+  "  " => " "
+- "#" starts a comment line; blank lines are ignored.
+- Surrounding whitespace is trimmed; wrap a side in double quotes to keep it.
+- Escapes \\uXXXX, \\xXX, \\t and \\\\ work on both sides (e.g. \\u00a0 for a non-breaking space).
+- Flags: "word" matches whole words only; "icase" ignores case and keeps the
+  capitalization of the match (Utilize → Use, UTILIZE → USE).
+- Where terms overlap, the longest one starting leftmost wins.
+
+Safety (same as remove_em_dash.py):
+- Skips fenced code blocks (``` or ~~~) and inline code spans (`code`).
+- Skips YAML front matter at the top.
+- Skips ATX and Setext headings by default (configurable).
+
+Usage:
+  python replace_terms.py --dry-run -v
+  python replace_terms.py --terms site_tools/ste_terms.txt --path docs --backup -v
+  python replace_terms.py --restore latest -v
+  python replace_terms.py --path archived/docs-v1.zip --dry-run -v
+  python replace_terms.py --dry-run --jobs 0
+  python replace_terms.py --dry-run --cache
+  python replace_terms.py --dry-run --changed-since origin/main -v
+  python replace_terms.py --dry-run --profile --profile-top 20
+
+Exit codes:
+  0 on success (or no changes)
+  1 on dry-run with modifications (useful in CI)
+  2 on an invalid path or rules file
+"""
+
+from __future__ import annotations
+import argparse
+import pathlib
+import re
+import sys
+from collections import Counter
+from functools import partial
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from gitscope import GitScopeError, add_changed_since_argument, changed_paths
+from prefilter import decode
+from mdcache import add_cache_argument, content_hash, open_cache, transform_sources
+from backups import add_backup_arguments, close_backup, open_backup, restore_run, stash
+from runner import add_jobs_argument, resolve_jobs, run_files
+from runprofile import add_profile_argument, open_profile, start_file
+from walk import SKIP_DIRS, iter_files, should_process
+from ziparchive import is_archive, process_archive
+from mdblocks import HEADINGS, PASSTHROUGH, scan_lines
+
+DEFAULT_TERMS = pathlib.Path(__file__).with_name("ste_terms.txt")
+FLAGS = ("word", "icase")
+
+_ESCAPE_RE = re.compile(r'\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|t|\\)')
+
+class Term(NamedTuple):
+    old: str
+    new: str
+    word: bool
+    icase: bool
+
+    @property
+    def label(self) -> str:
+        # repr() makes spaces, NBSP and quotes visible in the report
+        return f"{self.old!r} → {self.new!r}"
+
+def _unescape(value: str) -> str:
+    def sub(m: re.Match) -> str:
+        esc = m.group(1)
+        if esc == 't':
+            return '\t'
+        if esc == '\\':
+            return '\\'
+        return chr(int(esc[1:], 16))
+    return _ESCAPE_RE.sub(sub, value)
+
+def _side(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        value = value[1:-1]
+    return _unescape(value)
+
+def parse_terms(text: str, source: str = "<terms>") -> List[Term]:
+    """Parse a rules file; raises ValueError naming the file and line of the first problem."""
+    terms: List[Term] = []
+    seen: Dict[str, int] = {}
+    for lineno, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        if '=>' not in line:
+            raise ValueError(f"{source}:{lineno}: expected 'old => new'")
+        old, rest = line.split('=>', 1)
+        flags: List[str] = []
+        if ' | ' in rest or rest.rstrip().endswith('|'):
+            rest, flag_text = rest.rsplit('|', 1)
+            flags = [f.strip() for f in flag_text.split(',') if f.strip()]
+        unknown = set(flags) - set(FLAGS)
+        if unknown:
+            raise ValueError(f"{source}:{lineno}: unknown flag(s) {', '.join(sorted(unknown))} (choose from {', '.join(FLAGS)})")
+        term = Term(_side(old), _side(rest), "word" in flags, "icase" in flags)
+        if not term.old:
+            raise ValueError(f"{source}:{lineno}: empty term")
+        key = term.old.lower() if term.icase else term.old
+        if key in seen:
+            raise ValueError(f"{source}:{lineno}: duplicate term {term.old!r} (first on line {seen[key]})")
+        seen[key] = lineno
+        terms.append(term)
+    return terms
+
+def load_terms(path: pathlib.Path) -> List[Term]:
+    return parse_terms(path.read_text(encoding='utf-8'), str(path))
+
+def _trie_pattern(words: Sequence[str]) -> str:
+    """One regex alternation shaped like a trie of words; the longest word wins at each position."""
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # A word ends here but longer ones continue: try them first (greedy)
+            body = '(?:' + body + ')?'
+        return body
+
+    return emit(trie)
+
+def _match_case(found: str, repl: str) -> str:
+    if len(found) > 1 and found.isupper():
+        return repl.upper()
+    if found[:1].isupper():
+        return repl[:1].upper() + repl[1:]
+    return repl
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+class TermReplacer:
+    """All terms compiled into one matcher; replace() returns the new text and per-term counts."""
+
+    def __init__(self, terms: Sequence[Term]):
+        self.terms = list(terms)
+        self._exact = {t.old: t for t in self.terms}
+        self._folded = {t.old.lower(): t for t in self.terms if t.icase}
+        flags = re.IGNORECASE if self._folded else 0
+        # Case-insensitive terms go into the trie lowercased; IGNORECASE covers the rest.
+        # Whole-word terms get their own trie behind (?<!\w), so the engine only tries
+        # them where a word starts instead of at every letter.
+        words = {t.old.lower() if t.icase else t.old for t in self.terms if t.word}
+        others = {t.old.lower() if t.icase else t.old for t in self.terms if not t.word} - words
+        branches = []
+        if words:
+            branches.append(r'(?<!\w)' + _trie_pattern(sorted(words)))
+        if others:
+            branches.append(_trie_pattern(sorted(others)))
+        self.pattern = re.compile('|'.join(branches), flags) if branches else None
+
+    def _term_for(self, found: str) -> Optional[Term]:
+        term = self._exact.get(found)
+        if term is None:
+            term = self._folded.get(found.lower())
+        return term
+
+    def search(self, text: str) -> bool:
+        return self.pattern is not None and self.pattern.search(text) is not None
+
+    def replace(self, seg: str, counts: Counter) -> str:
+        if self.pattern is None:
+            return seg
+
+        def sub(m: re.Match) -> str:
+            found = m.group()
+            term = self._term_for(found)
+            if term is None:
+                return found  # matched only because another term is case-insensitive
+            if term.word:
+                start, end = m.span()
+                if (start and _is_word_char(seg[start - 1])) or (end < len(seg) and _is_word_char(seg[end])):
+                    return found
+            counts[term.label] += 1
+            return _match_case(found, term.new) if term.icase else term.new
+
+        return self.pattern.sub(sub, seg)
+
+def process_text(text: str, replacer: TermReplacer, skip_headings: bool) -> Tuple[str, Counter]:
+    counts: Counter = Counter()
+    if not replacer.search(text):
+        return text, counts
+    lines = text.splitlines(keepends=False)
+    index = scan_lines(lines)
+
+    skip = PASSTHROUGH | HEADINGS if skip_headings else PASSTHROUGH
+    for ln, _kind in index.lines_of(skip):
+        line = lines[ln]
+        if not replacer.search(line):
+            continue
+        parts = index.segments(ln, line)
+        for i in range(0, len(parts), 2):  # even indices are outside code
+            parts[i] = replacer.replace(parts[i], counts)
+        lines[ln] = ''.join(parts)
+
+    trailing_nl = text.endswith('\n')
+    return '\n'.join(lines) + ('\n' if trailing_nl else ''), counts
+
+def format_counts(counts: Counter) -> str:
+    return ", ".join(f"{label}: {n}" for label, n in counts.most_common())
+
+def process_file(path: pathlib.Path, dry_run: bool, verbose: bool, skip_headings: bool, backup: bool, replacer: TermReplacer) -> Tuple[Counter, bool]:
+    prof = start_file(path)
+    data = path.read_bytes()
+    if prof:
+        prof.lap("read", len(data))
+    original = decode(data)
+    if prof:
+        prof.lap("decode")
+    new_text, counts = process_text(original, replacer, skip_headings=skip_headings)
+    if prof:
+        prof.lap("transform")
+    modified = (sum(counts.values()) > 0 and new_text != original)
+    if verbose:
+        detail = f": {format_counts(counts)}" if counts else ""
+        print(f"[{'CHG' if modified else 'OK '}] {path}  (replacements={sum(counts.values())}{detail})")
+    if modified and not dry_run:
+        if backup:
+            stash(path, data)
+        path.write_text(new_text, encoding='utf-8')
+        if prof:
+            prof.lap("write")
+    return counts, modified
+
+def main():
+    ap = argparse.ArgumentParser(description="Apply a dictionary of term substitutions to Markdown under docs/.")
+    ap.add_argument("--path", default="docs", help="Root folder or .zip archive to scan (default: ./docs)")
+    ap.add_argument("--ext", nargs="*", default=[".md", ".markdown"], help="Markdown file extensions")
+    ap.add_argument("--terms", default=str(DEFAULT_TERMS), help=f"Rules file (default: {DEFAULT_TERMS.name} next to this script)")
+    ap.add_argument("--dry-run", action="store_true", help="Show changes without writing")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    ap.add_argument("--include", action="append", default=[], help="Glob pattern to include (repeatable)")
+    ap.add_argument("--exclude", action="append", default=[], help="Glob pattern to exclude (repeatable)")
+    ap.add_argument("--skip-headings", dest="skip_headings", action="store_true", default=True,
+                    help="Skip heading lines (ATX/Setext) [default]")
+    ap.add_argument("--no-skip-headings", dest="skip_headings", action="store_false",
+                    help="Also process headings")
+    add_jobs_argument(ap)
+    add_changed_since_argument(ap)
+    add_cache_argument(ap, "replace_terms")
+    add_backup_arguments(ap)
+    add_profile_argument(ap, "replace_terms")
+    args = ap.parse_args()
+    if args.restore:
+        sys.exit(restore_run(args.restore, args.backup_dir, args.verbose))
+
+    terms_path = pathlib.Path(args.terms)
+    try:
+        terms_data = terms_path.read_bytes()
+        replacer = TermReplacer(parse_terms(decode(terms_data), str(terms_path)))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    root = pathlib.Path(args.path).resolve()
+    zipped = is_archive(root)
+    if not zipped and (not root.exists() or not root.is_dir()):
+        print(f"ERROR: Path not found or not a directory or zip archive: {root}", file=sys.stderr)
+        sys.exit(2)
+    if zipped and args.changed_since:
+        print("ERROR: --changed-since needs a folder, not a zip archive", file=sys.stderr)
+        sys.exit(2)
+
+    total_files = total_mod = total_cached = 0
+    totals: Counter = Counter()
+
+    profile = open_profile(args.profile, "replace_terms", resolve_jobs(args.jobs))
+    archive = open_backup(args.backup, args.backup_dir, "replace_terms")
+
+    changed = None
+    if args.changed_since:
+        try:
+            changed = changed_paths(root, args.changed_since, args.ext, SKIP_DIRS)
+        except GitScopeError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(2)
+
+    if changed is not None:
+        candidates = (p for p in changed if should_process(p, args.include, args.exclude))
+    else:
+        candidates = iter_files(root, args.ext, args.include, args.exclude)
+    if profile:
+        candidates = profile.timed(candidates)
+
+    worker = partial(
+        process_file,
+        dry_run=args.dry_run,
+        verbose=args.verbose,
+        skip_headings=args.skip_headings,
+        backup=args.backup and not zipped,  # a zip archive is backed up whole
+        replacer=replacer,
+    )
+    cache = open_cache(None if zipped else args.cache, "replace_terms", {
+        "skip_headings": args.skip_headings,
+        "terms": content_hash(terms_data),
+    }, sources=transform_sources(__file__))
+    if zipped:
+        results = process_archive(root, worker, args.ext, args.include, args.exclude,
+                                  write=not args.dry_run, backup=args.backup)
+    else:
+        results = run_files(worker, candidates, jobs=args.jobs, cache=cache, verbose=args.verbose)
+    for result in results:
+        total_files += 1
+        if result is None:
+            total_cached += 1
+            continue
+        counts, modified = result
+        totals.update(counts)
+        total_mod += 1 if modified else 0
+
+    if args.verbose or args.dry_run:
+        cached = f" | Cached: {total_cached}" if cache else ""
+        print(f"\nScanned: {total_files} files | Modified: {total_mod} | Replacements: {sum(totals.values())} | "
+              f"Terms: {len(replacer.terms)}{cached} | Dry-run: {args.dry_run}")
+        for label, n in totals.most_common():
+            print(f"  {n:>6}  {label}")
+    close_backup(archive)
+    if cache:
+        cache.save()
+    if profile:
+        profile.finish(args.profile_top)
+    # CI gate: non-zero if changes would occur
+    if args.dry_run and total_mod > 0:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+runner.py — Shared file-processing driver for the site_tools scripts.
+
+Runs a per-file worker (a script's process_file with its options bound) over a
+list of paths, either serially or on a process pool (--jobs N). Pool workers
+capture what the worker prints, and the parent replays it in path order, so
+verbose [CHG]/[OK ] output and the returned results are identical to a serial run.
+
+With a CleanCache (--cache), files verified clean on an earlier run are skipped
+and yield None instead of a worker result.
+
+With --profile, pool workers record per-file timings too and send them back
+with each result (see runprofile.py). With --backup they send back the
+originals of the files they rewrote, for the parent's archive (see backups.py).
+"""
+
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import os
+import pathlib
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+import backups
+import runprofile
+from mdcache import CacheKey, CleanCache, file_hash
+
+R = TypeVar("R")
+
+# Work item: (path, track_cache, known_hash)
+Item = Tuple[pathlib.Path, bool, Optional[str]]
+
+def add_jobs_argument(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--jobs", "-j", type=int, default=1,
+                    help="Worker processes (default: 1 = serial; 0 = one per CPU)")
+
+def resolve_jobs(jobs: int) -> int:
+    """Map the --jobs value to a worker count (0 or negative means all CPUs)."""
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+def _process(func: Callable[[pathlib.Path], R], item: Item) -> Tuple[Optional[R], Optional[CacheKey]]:
+    """
+    Run func on one work item. When tracking the cache, return the key to record
+    if the file turned out clean; a result of None means the content hash matched
+    the manifest and func was not called.
+    """
+    path, track, known = item
+    if not track:
+        return func(path), None
+    st = os.stat(path)
+    digest = None
+    if known is not None:
+        digest = file_hash(path)
+        if digest == known:
+            return None, (st.st_mtime_ns, st.st_size, digest)
+    result = func(path)
+    if result[1]:  # every process_file returns (counters, modified)
+        return result, None
+    if digest is None:
+        digest = file_hash(path)
+    return result, (st.st_mtime_ns, st.st_size, digest)
+
+def _init_worker(profiling: bool, backing_up: bool) -> None:
+    if profiling:
+        runprofile.enable()
+    if backing_up:
+        backups.collect()
+
+def _process_captured(func: Callable[[pathlib.Path], R], item: Item) -> Tuple[Tuple[Optional[R], Optional[CacheKey]], str, list, list]:
+    """Pool-side wrapper: run _process and return its outcome, anything func printed, its profile records and backed-up originals."""
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        outcome = _process(func, item)
+    return outcome, buf.getvalue(), runprofile.drain(), backups.drain()
+
+def _report_cached(path: pathlib.Path, verbose: bool) -> None:
+    if verbose:
+        print(f"[OK ] {path}  (cached)")
+
+def run_files(
+    func: Callable[[pathlib.Path], R],
+    paths: Iterable[pathlib.Path],
+    jobs: int = 1,
+    chunksize: Optional[int] = None,
+    cache: Optional[CleanCache] = None,
+    verbose: bool = False,
+) -> Iterator[Optional[R]]:
+    """
+    Yield func(path) for each path, in input order, or None for files the cache
+    shows are still clean. With jobs > 1 the paths are sent to a process pool in
+    chunks; func must be picklable (a module-level function or a functools.partial of one).
+    """
+    def items() -> Iterator[Item]:
+        for p in paths:
+            if cache is None:
+                yield p, False, None
+                continue
+            fresh, known = cache.lookup(p, os.stat(p))
+            yield p, not fresh, known
+
+    def settle(item: Item, outcome: Tuple[Optional[R], Optional[CacheKey]]) -> Optional[R]:
+        path, track, _ = item
+        result, key = outcome
+        if track:
+            if key is not None:
+                cache.record(path, key)
+            else:
+                cache.forget(path)
+        if result is None:
+            _report_cached(path, verbose)
+        return result
+
+    jobs = resolve_jobs(jobs)
+    if jobs <= 1:
+        for item in items():
+            path, track, _ = item
+            if cache is not None and not track:
+                _report_cached(path, verbose)
+                yield None
+                continue
+            yield settle(item, _process(func, item))
+        return
+
+    work: List[Item] = list(items())
+    pending = [it for it in work if cache is None or it[1]]
+    if not pending:
+        for path, _, _ in work:
+            _report_cached(path, verbose)
+            yield None
+        return
+    jobs = min(jobs, len(pending))
+    if chunksize is None:
+        # A few chunks per worker keeps the pool balanced without per-file IPC
+        chunksize = max(1, len(pending) // (jobs * 4))
+    # Imported here so serial runs (and precommit.py) never load multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(runprofile.enabled(), backups.active())) as pool:
+        outcomes = pool.map(partial(_process_captured, func), pending, chunksize=chunksize)
+        try:
+            for item in work:
+                path, track, _ = item
+                if cache is not None and not track:
+                    _report_cached(path, verbose)
+                    yield None
+                    continue
+                outcome, output, records, originals = next(outcomes)
+                if output:
+                    print(output, end='')
+                if records:
+                    runprofile.extend(records)
+                if originals:
+                    backups.extend(originals)
+                yield settle(item, outcome)
+        except GeneratorExit:
+            # The caller stopped early (e.g. --fail-fast run): drop the chunks not started yet
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
@@ -0,0 +1,165 @@
+"""
+runprofile.py — Per-phase and per-file timing for the site_tools scripts (--profile).
+
+With --profile, every process_file records how long one file spent in each phase
+and how many bytes it read:
+
+- read:      path.read_bytes()
+- decode:    byte prefilter and UTF-8 decode
+- transform: the Markdown transform itself
+- write:     --backup and the rewritten file
+
+The parent also times the walk (the directory scan, or filtering the --changed-since list).
+At the end the script prints cumulative phase times and the top-N slowest
+files, and writes a JSON metrics file (default: .site_tools_cache/<tool>.profile.json).
+
+When --profile is off, start_file() returns None and each checkpoint in
+process_file is a single "if prof:" test.
+
+With --jobs > 1 the phase totals add up time from all workers, so they can
+exceed the wall time.
+"""
+
+from __future__ import annotations
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, TypeVar
+
+from mdcache import CACHE_DIR
+
+T = TypeVar("T")
+
+PHASES = ("walk", "read", "decode", "transform", "write")
+PROFILE_VERSION = 1
+
+_enabled = False
+_records: List["FileProfile"] = []
+
+class FileProfile:
+    """Timing of one file; lap(phase) charges the time since the previous checkpoint to phase."""
+    __slots__ = ("path", "bytes", "phases", "_last")
+
+    def __init__(self, path: pathlib.Path):
+        self.path = str(path)
+        self.bytes = 0
+        self.phases: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str, nbytes: int = 0) -> None:
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last)
+        self._last = now
+        self.bytes += nbytes
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "bytes": self.bytes, "seconds": round(self.total, 6),
+                "phases": {k: round(v, 6) for k, v in self.phases.items()}}
+
+def enable() -> None:
+    """Turn recording on in this process (also the pool initializer for --jobs)."""
+    global _enabled
+    _enabled = True
+
+def enabled() -> bool:
+    return _enabled
+
+def start_file(path: pathlib.Path) -> Optional[FileProfile]:
+    """Begin timing path, or return None when profiling is off."""
+    if not _enabled:
+        return None
+    rec = FileProfile(path)
+    _records.append(rec)
+    return rec
+
+def drain() -> List[FileProfile]:
+    """Return and clear the records collected in this process."""
+    global _records
+    out, _records = _records, []
+    return out
+
+def extend(records: Iterable[FileProfile]) -> None:
+    """Add records sent back from a pool worker."""
+    _records.extend(records)
+
+def add_profile_argument(ap: argparse.ArgumentParser, tool: str) -> None:
+    default = f"{CACHE_DIR}/{tool}.profile.json"
+    ap.add_argument("--profile", nargs="?", const=default, default=None, metavar="FILE",
+                    help=f"Time each phase and file; print the slowest files and write JSON metrics (default: {default})")
+    ap.add_argument("--profile-top", type=int, default=10, metavar="N",
+                    help="With --profile: number of slowest files to print (default: 10)")
+
+class RunProfile:
+    """Parent-side collector: walk timing, wall time, report and JSON output."""
+
+    def __init__(self, tool: str, output: pathlib.Path, jobs: int):
+        self.tool = tool
+        self.output = output
+        self.jobs = jobs
+        self.walk = 0.0
+        self.started = time.perf_counter()
+
+    def timed(self, items: Iterable[T]) -> Iterator[T]:
+        """Yield from items, charging the time spent producing each one to the walk phase."""
+        it = iter(items)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.walk += time.perf_counter() - t0
+                return
+            self.walk += time.perf_counter() - t0
+            yield item
+
+    def finish(self, top: int) -> None:
+        wall = time.perf_counter() - self.started
+        records = drain()
+        phases = dict.fromkeys(PHASES, 0.0)
+        phases["walk"] = self.walk
+        for rec in records:
+            for name, secs in rec.phases.items():
+                phases[name] = phases.get(name, 0.0) + secs
+        total_bytes = sum(rec.bytes for rec in records)
+        slowest = sorted(records, key=lambda r: r.total, reverse=True)[:max(0, top)]
+
+        print(f"\nProfile: {len(records)} files | {total_bytes / (1024 * 1024):.2f} MB | wall {wall:.3f}s | jobs {self.jobs}")
+        for name, secs in phases.items():
+            share = secs / wall * 100 if wall else 0.0
+            print(f"  {name:<10} {secs:>9.3f}s  {share:>5.1f}%")
+        if slowest:
+            print(f"  Slowest {len(slowest)} files:")
+            for rec in slowest:
+                print(f"    {rec.total * 1000:>9.2f} ms  {rec.bytes:>9} B  {rec.path}")
+
+        report = {
+            "version": PROFILE_VERSION,
+            "tool": self.tool,
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "jobs": self.jobs,
+            "wall_seconds": round(wall, 6),
+            "file_count": len(records),
+            "bytes": total_bytes,
+            "phases": {k: round(v, 6) for k, v in phases.items()},
+            "slowest": [rec.to_dict() for rec in slowest],
+            "files": [rec.to_dict() for rec in records],
+        }
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.output.with_name(f"{self.output.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(report, indent=1) + "\n", encoding='utf-8')
+        os.replace(tmp, self.output)
+        print(f"  Metrics: {self.output}")
+
+def open_profile(output: Optional[str], tool: str, jobs: int) -> Optional[RunProfile]:
+    """Start profiling when --profile was given, or return None."""
+    if not output:
+        return None
+    enable()
+    return RunProfile(tool, pathlib.Path(output), jobs)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+search_shards.py — Split the built search index into small, lazily loaded shards
+
+Reads site/search/search_index.json (written by the MkDocs search plugin) and
+writes site/search/shards/:
+
+- manifest.json: tokenizer settings and the file name of every shard,
+- one inverted-index shard per term prefix (--prefix-len characters, default 2):
+  {"term": [doc, score, doc, score, ...], ...},
+- the document table (location, title, page title) in chunks of --docs-chunk
+  entries, so a query only fetches the chunks that hold its results.
+
+docs/javascripts/search-shards.js loads the manifest on the first search and
+then only the shards for the query's terms: a two-term query needs two shard
+files and a few document chunks instead of the whole index.
+
+Shard file names carry a hash of their content, so browsers can cache them
+until they change. Pages are indexed incrementally: the tokens of every page
+are kept in a manifest (default: .site_tools_cache/search_shards.json) keyed
+by a hash of the page's search entries, and only new or changed pages are
+tokenized again; --no-cache indexes everything.
+
+With --replace-index, search_index.json is replaced by an empty index with the
+same config, so the theme's own search stops downloading the full index and
+search-shards.js answers the queries instead.
+
+Usage:
+  python search_shards.py --site-dir site -v
+  python search_shards.py --replace-index
+  python search_shards.py --prefix-len 3 --docs-chunk 250 --no-cache
+
+Exit codes:
+  0 on success
+  2 on a missing or already replaced search_index.json
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import html
+import json
+import pathlib
+import re
+import sys
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+
+from mdcache import CACHE_DIR, add_cache_argument, fingerprint
+
+SHARDS_DIR = "shards"
+MANIFEST = "manifest.json"
+CACHE_VERSION = 1
+TITLE_WEIGHT = 10
+TEXT_CAP = 10   # occurrences in the text beyond this do not raise the score
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have if in into is it its no not of on or "
+    "such that the their then there these they this to was were will with".split()
+)
+_COMBINING_RE = re.compile('[\u0300-\u036f]')
+_TAG_RE = re.compile(r'<[^>]*>')   # Material keeps <p>, <code>, <li>, ... in "text"; a literal < is &lt;
+_EDGE_RE = re.compile(r'^\W+|\W+$')
+
+def tokenize(text: str, separator: re.Pattern, min_len: int) -> Iterator[str]:
+    """Index terms of text; search-shards.js tokenizes queries the same way."""
+    if '<' in text or '&' in text:
+        text = html.unescape(_TAG_RE.sub(' ', text))
+    text = _COMBINING_RE.sub('', unicodedata.normalize('NFKD', text.lower()))
+    for tok in separator.split(text):
+        tok = _EDGE_RE.sub('', tok)
+        if len(tok) >= min_len and tok not in STOPWORDS:
+            yield tok
+
+def group_pages(docs: List[dict]) -> Dict[str, List[dict]]:
+    """Search entries by page location, in index order (the page entry, then its sections)."""
+    pages: Dict[str, List[dict]] = {}
+    for doc in docs:
+        pages.setdefault(doc["location"].split('#', 1)[0], []).append(doc)
+    return pages
+
+def page_hash(entries: List[dict]) -> str:
+    return hashlib.sha256(json.dumps(entries, sort_keys=True).encode('utf-8')).hexdigest()
+
+def index_page(entries: List[dict], separator: re.Pattern, min_len: int) -> Dict[str, List[int]]:
+    """term → [entry, score, entry, score, ...] over the page's entries."""
+    postings: Dict[str, List[int]] = {}
+    for i, entry in enumerate(entries):
+        scores = Counter()
+        for tok in tokenize(entry.get("title", ""), separator, min_len):
+            scores[tok] += TITLE_WEIGHT
+        text = Counter(tokenize(entry.get("text", ""), separator, min_len))
+        for tok, n in text.items():
+            scores[tok] += min(n, TEXT_CAP)
+        for tok, score in scores.items():
+            postings.setdefault(tok, []).extend((i, score))
+    return postings
+
+def doc_row(entry: dict, page_title: str) -> list:
+    row = [entry["location"], entry.get("title", "")]
+    if '#' in entry["location"]:
+        row.append(page_title)
+    return row
+
+def _shard_key(prefix: str) -> str:
+    """File-name-safe shard name: the prefix itself if alphanumeric ASCII, else its UTF-8 hex."""
+    if prefix.isascii() and prefix.isalnum():
+        return prefix
+    return "x" + prefix.encode('utf-8').hex()
+
+def _dump(data: object) -> bytes:
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def _write_hashed(out_dir: pathlib.Path, stem: str, data: object) -> Tuple[str, int]:
+    body = _dump(data)
+    name = f"{stem}.{hashlib.sha256(body).hexdigest()[:10]}.json"
+    path = out_dir / name
+    if not path.exists():
+        path.write_bytes(body)
+    return name, len(body)
+
+def load_cache(path: pathlib.Path, fp: str) -> Dict[str, dict]:
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}  # missing or unreadable manifest → index everything
+    if data.get("version") != CACHE_VERSION or data.get("fingerprint") != fp:
+        return {}
+    return data.get("pages", {})
+
+def save_cache(path: pathlib.Path, fp: str, pages: Dict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(_dump({"version": CACHE_VERSION, "fingerprint": fp, "pages": pages}))
+    tmp.replace(path)
+
+def build(index: dict, out_dir: pathlib.Path, prefix_len: int, docs_chunk: int,
+          cached: Dict[str, dict], verbose: bool) -> Tuple[dict, Dict[str, dict], int, int]:
+    """Write the shards and document chunks; returns (manifest, page cache, pages tokenized, bytes)."""
+    config = index.get("config", {})
+    separator = re.compile(config.get("separator") or r'[\s\-]+')
+    rows: List[list] = []
+    shards: Dict[str, Dict[str, List[int]]] = {}
+    pages: Dict[str, dict] = {}
+    indexed = 0
+    for location, entries in group_pages(index.get("docs", [])).items():
+        digest = page_hash(entries)
+        page = cached.get(location)
+        if page is None or page["hash"] != digest:
+            page = {"hash": digest, "postings": index_page(entries, separator, prefix_len)}
+            indexed += 1
+            if verbose:
+                print(f"[IDX] {location or '/'}  ({len(entries)} entries)")
+        pages[location] = page
+        base = len(rows)
+        page_title = entries[0].get("title", "")
+        rows.extend(doc_row(e, page_title) for e in entries)
+        for term, plist in page["postings"].items():
+            merged = shards.setdefault(term[:prefix_len], {}).setdefault(term, [])
+            for i in range(0, len(plist), 2):
+                merged.extend((base + plist[i], plist[i + 1]))
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "version": 1,
+        "separator": separator.pattern,
+        "min_search_length": config.get("min_search_length", 3),
+        "prefix_len": prefix_len,
+        "stopwords": sorted(STOPWORDS),
+        "docs_chunk": docs_chunk,
+        "docs": [],
+        "shards": {},
+    }
+    total = 0
+    for start in range(0, len(rows), docs_chunk):
+        name, size = _write_hashed(out_dir, f"docs-{start // docs_chunk}", rows[start:start + docs_chunk])
+        manifest["docs"].append(name)
+        total += size
+    for prefix in sorted(shards):
+        terms = shards[prefix]
+        name, size = _write_hashed(out_dir, f"t-{_shard_key(prefix)}", {t: terms[t] for t in sorted(terms)})
+        manifest["shards"][prefix] = name
+        total += size
+    keep = set(manifest["docs"]) | set(manifest["shards"].values()) | {MANIFEST}
+    for stale in out_dir.glob("*.json"):
+        if stale.name not in keep:
+            stale.unlink()
+    (out_dir / MANIFEST).write_bytes(_dump(manifest))
+    return manifest, pages, indexed, total
+
+def main():
+    ap = argparse.ArgumentParser(description="Split the built search index into lazily loaded shards.")
+    ap.add_argument("--site-dir", default="site", help="Built site (default: ./site)")
+    ap.add_argument("--prefix-len", type=int, default=2,
+                    help="Characters of a term that pick its shard; shorter terms are not indexed (default: 2)")
+    ap.add_argument("--docs-chunk", type=int, default=500, help="Document table entries per file (default: 500)")
+    ap.add_argument("--replace-index", action="store_true",
+                    help="Replace search_index.json with an empty index once the shards are written")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    add_cache_argument(ap, "search_shards")
+    ap.set_defaults(cache=f"{CACHE_DIR}/search_shards.json")
+    ap.add_argument("--no-cache", dest="cache", action="store_const", const=None,
+                    help="Tokenize every page, ignoring the manifest")
+    args = ap.parse_args()
+
+    search_dir = pathlib.Path(args.site_dir) / "search"
+    index_path = search_dir / "search_index.json"
+    try:
+        index = json.loads(index_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Cannot read {index_path} (run mkdocs build first): {e}", file=sys.stderr)
+        sys.exit(2)
+    if "shards" in index.get("config", {}):
+        print(f"ERROR: {index_path} was already replaced by --replace-index; rebuild the site first", file=sys.stderr)
+        sys.exit(2)
+
+    fp = fingerprint("search_shards", {"prefix_len": args.prefix_len, "config": index.get("config", {})}, [__file__])
+    cache_path = pathlib.Path(args.cache) if args.cache else None
+    cached = load_cache(cache_path, fp) if cache_path else {}
+    manifest, pages, indexed, total = build(index, search_dir / SHARDS_DIR, args.prefix_len, args.docs_chunk,
+                                     cached, args.verbose)
+    if cache_path:
+        save_cache(cache_path, fp, pages)
+
+    original = index_path.stat().st_size
+    if args.replace_index:
+        stub = {"config": dict(index.get("config", {}), shards=f"{SHARDS_DIR}/{MANIFEST}"), "docs": []}
+        index_path.write_bytes(_dump(stub))
+
+    shard_sizes = sorted((search_dir / SHARDS_DIR / n).stat().st_size for n in manifest["shards"].values())
+    print(f"\nPages: {len(pages)} | Re-indexed: {indexed} | Entries: {len(index.get('docs', []))} | "
+          f"Shards: {len(shard_sizes)} | Doc chunks: {len(manifest['docs'])}")
+    if shard_sizes:
+        print(f"Bytes: index {original / 1024:,.1f} KB -> shards {total / 1024:,.1f} KB total, "
+              f"median shard {shard_sizes[len(shard_sizes) // 2] / 1024:,.1f} KB, "
+              f"largest {shard_sizes[-1] / 1024:,.1f} KB | Replaced index: {args.replace_index}")
+
+if __name__ == "__main__":
+    main()
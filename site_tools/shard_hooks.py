@@ -0,0 +1,81 @@
+"""
+shard_hooks.py — MkDocs hook that limits a build to one shard of the pages (used by shardbuild.py).
+
+shardbuild.py lists this file under hooks: in the generated shard configs and
+points the SITE_TOOLS_SHARD environment variable at the shard's JSON spec:
+
+  {"pages": [src_uri, ...], "static": true|false, "manifest": "<path>"}
+
+on_files marks every documentation page outside "pages" as excluded, and every
+other file too unless "static" is set (only one shard copies the assets). The
+excluded pages stay in the Files collection, so the nav and the links to them
+still resolve to the right URLs; MkDocs only logs those links at INFO level.
+on_nav renders the excluded pages that have no title in the nav, so the nav shows
+the same title (their first heading) as in a single build instead of "None".
+on_post_build writes the manifest for the merge step: src_uri, dest_uri, url,
+sitemap location and update date of every page this shard wrote, and the
+src_uri of every documentation page in MkDocs' file order.
+
+Without SITE_TOOLS_SHARD the hook does nothing.
+"""
+
+from __future__ import annotations
+import json
+import os
+from typing import List, Optional
+
+from mkdocs.structure.files import InclusionLevel
+
+SHARD_ENV = "SITE_TOOLS_SHARD"
+
+_spec: Optional[dict] = None
+_built: List[dict] = []
+_order: List[str] = []
+
+def on_config(config, **kwargs):
+    global _spec
+    path = os.environ.get(SHARD_ENV)
+    _spec = None
+    if path:
+        with open(path, encoding='utf-8') as f:
+            _spec = json.load(f)
+    return config
+
+def on_files(files, config, **kwargs):
+    if _spec is None:
+        return files
+    pages = set(_spec["pages"])
+    _order[:] = [f.src_uri for f in files.documentation_pages(inclusion=InclusionLevel.all)]
+    for file in files:
+        if file.is_documentation_page():
+            if file.src_uri not in pages:
+                file.inclusion = InclusionLevel.EXCLUDED
+        elif not _spec["static"]:
+            file.inclusion = InclusionLevel.EXCLUDED
+    return files
+
+def on_nav(nav, config, files, **kwargs):
+    if _spec is None:
+        return nav
+    for page in nav.pages:
+        # The title of an untitled nav entry comes from the rendered page
+        if page.file.inclusion.is_excluded() and page.title is None:
+            page.read_source(config)
+            page.markdown = config.plugins.on_page_markdown(page.markdown, page=page, config=config, files=files)
+            page.render(config, files)
+    return nav
+
+def on_pre_build(config, **kwargs) -> None:
+    _built.clear()
+
+def on_post_page(output: str, page, config, **kwargs) -> str:
+    if _spec is not None:
+        _built.append({"src": page.file.src_uri, "dest": page.file.dest_uri, "url": page.url,
+                       "loc": page.canonical_url or page.abs_url, "updated": page.update_date})
+    return output
+
+def on_post_build(config, **kwargs) -> None:
+    if _spec is None:
+        return
+    with open(_spec["manifest"], 'w', encoding='utf-8') as f:
+        json.dump({"site_dir": config.site_dir, "pages": _built, "order": _order}, f)
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+shardbuild.py — Build the MkDocs site in parallel shards split along the nav: sections
+
+Splits the nav of mkdocs.yml into sections, packs them into --jobs shards of
+about the same size, and runs one `mkdocs build` process per shard. Each shard
+uses a generated config that INHERITs mkdocs.yml and adds shard_hooks.py, which
+excludes the pages of the other shards (and, except in shard 1, the static
+files). Excluded pages stay known to MkDocs, so every shard renders the full nav
+and cross-section links with the same URLs as a single build.
+
+Sharding:
+- The top-level nav sections are the units; a section with more than its share
+  of pages (all pages / --jobs) is split into its sub-sections, recursively.
+- Units are packed into shards by size (Markdown bytes plus a fixed cost per
+  page for the theme render), largest first.
+- Shard 1 also builds the pages that are not in the nav, copies the assets and
+  writes the theme files (404.html, sitemap.xml, ...) straight into the site
+  folder; the other shards build into .site_tools_cache/shards/ and their pages
+  are moved in afterwards.
+
+The search index (search/search_index.json) and sitemap.xml of every shard only
+hold its own pages; the merge step concatenates the search entries into the
+site's index and writes sitemap.xml (and sitemap.xml.gz) again with the <url>
+entries of all shards, in the order of a single build. A prebuilt lunr
+index (search prebuild_index) cannot be merged and is dropped with a warning.
+
+--section "Modules/Data Store" rebuilds only that nav section into an existing
+site: its pages are replaced and their search and sitemap entries swapped. Use
+it for quick previews after a full build.
+
+Anchor links into pages of another shard are not validated by MkDocs (it never
+renders those pages); run linkcheck.py for that.
+
+Usage:
+  python site_tools/shardbuild.py --jobs 0
+  python site_tools/shardbuild.py --jobs 4 --strict -v
+  python site_tools/shardbuild.py --list --jobs 4
+  python site_tools/shardbuild.py --section "Modules/Data Store"
+
+Exit codes:
+  0 on success
+  1 when a shard build failed
+  2 on an invalid config, section or site folder
+"""
+
+from __future__ import annotations
+import argparse
+import gzip
+import html
+import json
+import os
+import pathlib
+import re
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+import yaml
+
+from linkcheck import SCHEME_RE, iter_nav, load_config
+from mdcache import CACHE_DIR
+from runner import add_jobs_argument, resolve_jobs
+from walk import iter_files
+
+SHARD_DIR = f"{CACHE_DIR}/shards"
+SHARD_ENV = "SITE_TOOLS_SHARD"    # read by shard_hooks.py
+SEARCH_INDEX = "search/search_index.json"
+SITEMAP = "sitemap.xml"
+PAGE_COST = 8 * 1024              # weight of one page's theme render, in Markdown bytes
+_URL_ENTRY_RE = re.compile(r'\s*<url>.*?</url>', re.S)
+_LOC_RE = re.compile(r'<loc>(.*?)</loc>', re.S)
+
+class Section(NamedTuple):
+    title: str                    # nav titles joined with "/"
+    pages: List[str]              # src paths relative to docs_dir
+
+class Shard(NamedTuple):
+    sections: List[Section]
+    pages: List[str]
+    static: bool
+
+def _local_pages(nav, known: Set[str]) -> List[str]:
+    return [p for p in iter_nav(nav) if not SCHEME_RE.match(p) and p in known]
+
+def _has_subsections(items) -> bool:
+    return any(isinstance(i, dict) and any(isinstance(v, list) for v in i.values()) for i in items)
+
+def nav_sections(nav: list, known: Set[str], max_pages: int) -> List[Section]:
+    """Nav sections in nav order, splitting the ones with more than max_pages pages into their sub-sections."""
+    out: List[Section] = []
+
+    def visit(items: list, prefix: str) -> None:
+        loose: List[str] = []
+        for item in items:
+            entries = item.items() if isinstance(item, dict) else [(None, item)]
+            for title, value in entries:
+                if not isinstance(value, list):
+                    loose.extend(_local_pages(value, known))
+                    continue
+                name = f"{prefix}/{title}" if prefix else str(title)
+                pages = _local_pages(value, known)
+                if len(pages) > max_pages and _has_subsections(value):
+                    visit(value, name)
+                elif pages:
+                    out.append(Section(name, pages))
+        if loose:
+            out.append(Section(prefix or "(top)", loose))
+
+    visit(nav, "")
+    return out
+
+def find_section(nav: list, name: str, known: Set[str]) -> Optional[Section]:
+    """The nav section at title path name ("Modules/Data Store"), matched case-insensitively."""
+    items = nav
+    titles = []
+    for part in [p.strip().lower() for p in name.split("/") if p.strip()]:
+        match = None
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, dict):
+                for title, value in item.items():
+                    if str(title).strip().lower() == part:
+                        match = (title, value)
+                        break
+            if match:
+                break
+        if match is None:
+            return None
+        titles.append(str(match[0]))
+        items = match[1]
+    pages = _local_pages(items, known)
+    return Section("/".join(titles), pages) if titles and pages else None
+
+def pack(sections: Sequence[Section], weights: Dict[str, int], count: int) -> List[List[Section]]:
+    """Greedy largest-first packing of sections into count bins of about equal weight."""
+    bins: List[List[Section]] = [[] for _ in range(count)]
+    loads = [0] * count
+    for section in sorted(sections, key=lambda s: -sum(weights[p] for p in s.pages)):
+        i = loads.index(min(loads))
+        bins[i].append(section)
+        loads[i] += sum(weights[p] for p in section.pages)
+    return [b for b in bins if b]
+
+def plan_shards(nav: list, pages: Sequence[str], weights: Dict[str, int], jobs: int) -> List[Shard]:
+    known = set(pages)
+    sections = nav_sections(nav, known, max(1, len(pages) // jobs))
+    # A page listed in two sections is built once, by the first
+    seen: Set[str] = set()
+    unique_sections = []
+    for s in sections:
+        fresh = [p for p in s.pages if p not in seen]
+        seen.update(fresh)
+        if fresh:
+            unique_sections.append(Section(s.title, fresh))
+    orphans = [p for p in pages if p not in seen]
+    bins = pack(unique_sections, weights, jobs) or [[]]
+    shards = []
+    for i, b in enumerate(bins):
+        shard_pages = [p for s in b for p in s.pages]
+        if i == 0:
+            shard_pages += orphans
+        shards.append(Shard(b, shard_pages, static=(i == 0)))
+    return shards
+
+def _shard_config(config_path: pathlib.Path, config: dict, index: int, site_dir: pathlib.Path) -> pathlib.Path:
+    """Write the shard's config next to mkdocs.yml, so its relative paths keep working."""
+    here = config_path.parent
+    hooks = list(config.get("hooks") or [])
+    hooks.append(os.path.relpath(pathlib.Path(__file__).with_name("shard_hooks.py"), here).replace(os.sep, "/"))
+    shard_config = {"INHERIT": config_path.name, "site_dir": str(site_dir), "hooks": hooks}
+    path = here / f".site_tools_shard-{index}.yml"
+    path.write_text(yaml.safe_dump(shard_config, sort_keys=False), encoding='utf-8')
+    return path
+
+def _load_index(path: pathlib.Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+def merge_search(site_dir: pathlib.Path, parts: Iterable[dict], replace_urls: Iterable[str] = (),
+                 order: Sequence[str] = ()) -> Optional[int]:
+    """
+    Append the search docs of parts to the site's index and sort them by the page urls in
+    order. Entries of pages in replace_urls are dropped first; without an order, their
+    replacements then take their places. Returns the doc count.
+    """
+    target = site_dir / SEARCH_INDEX
+    merged = _load_index(target)
+    if merged is None:
+        return None
+    replace = set(replace_urls)
+    if replace:
+        if not order:
+            order = list(dict.fromkeys(d.get("location", "").split("#", 1)[0] for d in merged.get("docs", [])))
+        merged["docs"] = [d for d in merged.get("docs", []) if d.get("location", "").split("#", 1)[0] not in replace]
+    for part in parts:
+        merged.setdefault("docs", []).extend(part.get("docs", []))
+    if order:
+        rank = {url: i for i, url in enumerate(order)}
+        merged["docs"].sort(key=lambda d: rank.get(d.get("location", "").split("#", 1)[0], len(rank)))
+    if "index" in merged:
+        print("WARNING: dropping the prebuilt search index (search prebuild_index); the browser builds it instead", file=sys.stderr)
+        del merged["index"]
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(merged, separators=(',', ':')), encoding='utf-8')
+    os.replace(tmp, target)
+    return len(merged["docs"])
+
+def _sitemap_entries(text: str) -> Dict[str, str]:
+    """loc → the <url> entry's text, with the whitespace before it."""
+    entries = {}
+    for m in _URL_ENTRY_RE.finditer(text):
+        loc = _LOC_RE.search(m.group())
+        if loc:
+            entries[html.unescape(loc.group(1).strip())] = m.group()
+    return entries
+
+def _gzip_mtime(path: pathlib.Path) -> int:
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(8)
+    except OSError:
+        return 0
+    return int.from_bytes(header[4:8], 'little') if len(header) == 8 else 0
+
+def merge_sitemap(site_dir: pathlib.Path, part_dirs: Iterable[pathlib.Path], order: Optional[Sequence[str]],
+                  updated: Sequence[str]) -> Optional[int]:
+    """
+    Write the site's sitemap.xml and sitemap.xml.gz again with the <url> entries of the
+    shard sitemaps in part_dirs added (same location: the shard's entry wins). order lists
+    the locations in MkDocs' page order; without it the site's entries keep their places
+    and new ones go last. updated holds the update dates of the pages built, which date
+    the .gz as MkDocs does. Returns the entry count, or None when there is no sitemap.
+    """
+    target = site_dir / SITEMAP
+    try:
+        text = target.read_text(encoding='utf-8')
+    except OSError:
+        return None
+    entries = _sitemap_entries(text)
+    kept = list(entries)
+    for part_dir in part_dirs:
+        try:
+            entries.update(_sitemap_entries((part_dir / SITEMAP).read_text(encoding='utf-8')))
+        except OSError:
+            continue
+    partial = order is None
+    if partial:
+        order = kept + [loc for loc in entries if loc not in set(kept)]
+    found = list(_URL_ENTRY_RE.finditer(text))
+    end = re.search(r'\s*</urlset>', text)
+    if found:
+        head, tail = text[:found[0].start()], text[found[-1].end():]
+    elif end:
+        head, tail = text[:end.start()], text[end.start():]
+    else:
+        return None
+    body = [entries[loc] for loc in order if loc in entries]
+    output = (head + "".join(body) + tail).encode('utf-8')
+
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(output)
+    os.replace(tmp, target)
+    gz_path = target.with_name(SITEMAP + ".gz")
+    # MkDocs dates the .gz with the newest page update date; a partial rebuild keeps a newer one
+    stamps = [int(datetime.fromisoformat(max(updated)).replace(tzinfo=timezone.utc).timestamp())] if updated else []
+    if partial or not stamps:
+        stamps.append(_gzip_mtime(gz_path))
+    with open(tmp, 'wb') as f:
+        with gzip.GzipFile(fileobj=f, filename=str(gz_path), mode='wb', mtime=max(stamps, default=0)) as gz:
+            gz.write(output)
+    os.replace(tmp, gz_path)
+    return len(body)
+
+def run_shards(shards: Sequence[Shard], config_path: pathlib.Path, config: dict, site_dirs: Sequence[pathlib.Path],
+               work: pathlib.Path, strict: bool, verbose: bool) -> List[Optional[dict]]:
+    """Run one mkdocs build process per shard at the same time; returns each shard's manifest (None if it failed)."""
+    procs = []
+    configs = []
+    try:
+        for i, (shard, site_dir) in enumerate(zip(shards, site_dirs)):
+            spec_path = work / f"shard-{i}.json"
+            manifest = work / f"shard-{i}.manifest.json"
+            spec_path.write_text(json.dumps({"pages": shard.pages, "static": shard.static, "manifest": str(manifest)}), encoding='utf-8')
+            cfg = _shard_config(config_path, config, i, site_dir)
+            configs.append(cfg)
+            cmd = [sys.executable, "-m", "mkdocs", "build", "-f", str(cfg)] + (["--strict"] if strict else []) + ([] if verbose else ["-q"])
+            log = open(work / f"shard-{i}.log", 'w+', encoding='utf-8')
+            env = dict(os.environ, **{SHARD_ENV: str(spec_path)})
+            procs.append((subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, env=env), log, manifest, time.perf_counter()))
+
+        results: List[Optional[dict]] = []
+        for i, (proc, log, manifest, started) in enumerate(procs):
+            code = proc.wait()
+            secs = time.perf_counter() - started
+            log.seek(0)
+            output = log.read()
+            log.close()
+            names = ", ".join(s.title for s in shards[i].sections) or "(pages not in nav)"
+            print(f"Shard {i + 1}/{len(shards)}: {len(shards[i].pages)} pages | {secs:.1f} s | {names}", flush=True)
+            if verbose or code != 0:
+                print(output.rstrip(), file=sys.stderr if code else sys.stdout)
+            results.append(_load_index(manifest) if code == 0 else None)
+        return results
+    finally:
+        for cfg in configs:
+            cfg.unlink(missing_ok=True)
+
+def move_pages(manifest: dict, site_dir: pathlib.Path) -> None:
+    source = pathlib.Path(manifest["site_dir"])
+    for page in manifest["pages"]:
+        dst = site_dir / page["dest"]
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source / page["dest"], dst)
+
+def main():
+    ap = argparse.ArgumentParser(description="Build the MkDocs site in parallel shards split along the nav sections.")
+    ap.add_argument("--config", "-f", default="mkdocs.yml", help="MkDocs config (default: mkdocs.yml)")
+    ap.add_argument("--site-dir", default=None, help="Output folder (default: site_dir from the config, else ./site)")
+    ap.add_argument("--section", default=None, metavar="TITLE[/TITLE...]",
+                    help="Rebuild only this nav section into an existing site (e.g. \"Modules/Data Store\")")
+    ap.add_argument("--list", action="store_true", help="Print the shard plan and exit")
+    ap.add_argument("--strict", action="store_true", help="Pass --strict to every shard build")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Show each shard's mkdocs output")
+    add_jobs_argument(ap)
+    args = ap.parse_args()
+    started = time.perf_counter()
+
+    config_path = pathlib.Path(args.config).resolve()
+    try:
+        config = load_config(config_path)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        print(f"ERROR: cannot read {config_path}: {e}", file=sys.stderr)
+        sys.exit(2)
+    docs_dir = config_path.parent / config.get("docs_dir", "docs")
+    site_dir = pathlib.Path(args.site_dir).resolve() if args.site_dir else config_path.parent / config.get("site_dir", "site")
+    if not docs_dir.is_dir():
+        print(f"ERROR: Path not found or not a directory: {docs_dir}", file=sys.stderr)
+        sys.exit(2)
+
+    paths = list(iter_files(docs_dir, [".md", ".markdown"]))
+    pages = [p.relative_to(docs_dir).as_posix() for p in paths]
+    weights = {rel: p.stat().st_size + PAGE_COST for rel, p in zip(pages, paths)}
+    nav = config.get("nav") or []
+    jobs = resolve_jobs(args.jobs)
+
+    if args.section:
+        section = find_section(nav, args.section, set(pages))
+        if section is None:
+            print(f"ERROR: No nav section with pages: {args.section}", file=sys.stderr)
+            sys.exit(2)
+        if _load_index(site_dir / SEARCH_INDEX) is None:
+            print(f"ERROR: No full build in {site_dir}; run shardbuild.py (or mkdocs build) once first", file=sys.stderr)
+            sys.exit(2)
+        shards = [Shard([section], section.pages, static=False)]
+    else:
+        shards = plan_shards(nav, pages, weights, jobs)
+
+    if args.list:
+        for i, shard in enumerate(shards):
+            kb = sum(weights[p] for p in shard.pages) / 1024
+            print(f"Shard {i + 1}: {len(shard.pages)} pages | weight {kb:,.0f} KB{' | assets' if shard.static else ''}")
+            for s in shard.sections:
+                print(f"  {len(s.pages):>5}  {s.title}")
+        return
+
+    work = pathlib.Path(SHARD_DIR).resolve()
+    shutil.rmtree(work, ignore_errors=True)
+    work.mkdir(parents=True)
+    # Shard 1 of a full build writes the site folder itself; the rest build next to it
+    site_dirs = [site_dir if shard.static else work / f"shard-{i}" for i, shard in enumerate(shards)]
+
+    manifests = run_shards(shards, config_path, config, site_dirs, work, args.strict, args.verbose)
+    if any(m is None for m in manifests):
+        print("ERROR: shard build failed; the site folder is incomplete", file=sys.stderr)
+        sys.exit(1)
+
+    parts = []
+    rebuilt_urls: List[str] = []
+    for shard, manifest, shard_dir in zip(shards, manifests, site_dirs):
+        if shard_dir == site_dir:
+            continue
+        move_pages(manifest, site_dir)
+        rebuilt_urls += [p["url"] for p in manifest["pages"]]
+        part = _load_index(shard_dir / SEARCH_INDEX)
+        if part is not None:
+            parts.append(part)
+    built_pages = {p["src"]: p for m in manifests for p in m["pages"]}
+    page_order = [built_pages[src] for src in manifests[0]["order"] if src in built_pages]
+    docs = merge_search(site_dir, parts, rebuilt_urls if args.section else (),
+                        () if args.section else [p["url"] for p in page_order])
+    order = None if args.section else [p["loc"] for p in page_order if p.get("loc")]
+    sitemap = merge_sitemap(site_dir, [d for d in site_dirs if d != site_dir], order,
+                            [p["updated"] for m in manifests for p in m["pages"] if p.get("updated")])
+    shutil.rmtree(work, ignore_errors=True)
+
+    built = sum(len(m["pages"]) for m in manifests)
+    search = f" | Search docs: {docs}" if docs is not None else ""
+    search += f" | Sitemap: {sitemap} URLs" if sitemap is not None else ""
+    print(f"\nBuilt: {built} pages | Shards: {len(shards)}{search} | {time.perf_counter() - started:.1f} s -> {site_dir}")
+
+if __name__ == "__main__":
+    main()
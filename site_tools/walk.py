@@ -0,0 +1,93 @@
+"""
+walk.py — Shared directory walker and glob matcher for the site_tools scripts.
+
+iter_files() walks a tree with os.scandir and:
+- prunes SKIP_DIRS (.git, node_modules, .venv, caches) before descending into them,
+- reuses the DirEntry type information instead of stat'ing every path twice,
+- filters by extension on the entry name, without extra syscalls,
+- applies --include/--exclude through one compiled GlobMatcher.
+
+Files are yielded in the same order as the previous root.rglob("*") loop:
+a directory's files first, then its subdirectories, depth first.
+"""
+
+from __future__ import annotations
+import fnmatch
+import os
+import pathlib
+import re
+from functools import lru_cache
+from typing import AbstractSet, Iterable, Iterator, List, Optional, Sequence
+
+SKIP_DIRS = frozenset({".git", ".venv", "node_modules", ".mypy_cache", ".pytest_cache", ".cache"})
+
+def _norm(pat: str) -> str:
+    """Normalize glob patterns to POSIX style so Windows backslashes work."""
+    return pat.replace('\\', '/')
+
+def _compile(patterns: Sequence[str]) -> Optional[re.Pattern]:
+    if not patterns:
+        return None
+    # fnmatch.fnmatch semantics: both sides go through os.path.normcase
+    return re.compile('|'.join(fnmatch.translate(os.path.normcase(_norm(p))) for p in patterns))
+
+class GlobMatcher:
+    """All include and exclude globs compiled into one regex each."""
+
+    def __init__(self, includes: Sequence[str], excludes: Sequence[str]):
+        self._include = _compile(includes)
+        self._exclude = _compile(excludes)
+
+    def matches(self, posix_path: str) -> bool:
+        p = os.path.normcase(posix_path)
+        if self._include is not None and not self._include.match(p):
+            return False
+        if self._exclude is not None and self._exclude.match(p):
+            return False
+        return True
+
+@lru_cache(maxsize=32)
+def compile_globs(includes: tuple, excludes: tuple) -> GlobMatcher:
+    return GlobMatcher(includes, excludes)
+
+def should_process(path: pathlib.Path, includes: List[str], excludes: List[str]) -> bool:
+    """Glob filtering on the POSIX form of path, with normalized patterns."""
+    return compile_globs(tuple(includes), tuple(excludes)).matches(path.as_posix())
+
+def iter_files(
+    root: pathlib.Path,
+    exts: Iterable[str],
+    includes: Sequence[str] = (),
+    excludes: Sequence[str] = (),
+    skip_dirs: AbstractSet[str] = SKIP_DIRS,
+) -> Iterator[pathlib.Path]:
+    """Yield files under root whose extension is in exts and that pass the include/exclude globs."""
+    exts = {e.lower() for e in exts}
+    matcher = compile_globs(tuple(includes), tuple(excludes))
+    filtered = bool(includes or excludes)
+    sep = os.sep
+
+    def walk(dirpath: str) -> Iterator[pathlib.Path]:
+        subdirs = []
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in skip_dirs:
+                        subdirs.append(entry.path)
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in exts or not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if filtered and not matcher.matches(entry.path.replace(sep, '/')):
+                continue
+            yield pathlib.Path(entry.path)
+        for d in subdirs:
+            yield from walk(d)
+
+    yield from walk(str(root))
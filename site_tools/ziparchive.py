@@ -0,0 +1,157 @@
+"""
+ziparchive.py — Run a site_tools transform over the Markdown members of a .zip archive.
+
+--path may name a .zip file instead of a folder. process_archive() then:
+- hands each matching member (by --ext and the --include/--exclude globs, matched
+  on "<archive>/<member>") to the script's process_file/check_file as a ZipMember,
+  which has the read_bytes()/write_text() subset of pathlib.Path those use, so the
+  transforms run unchanged,
+- in check and dry-run mode writes nothing,
+- otherwise, from the first member that changes, writes a new archive next to the
+  original and swaps it in at the end: changed members are compressed again with
+  their original method, every other entry is copied byte for byte, compressed
+  data included. An archive without changes is not rewritten.
+
+Members are read one at a time in the parent process; --jobs, --cache and
+--changed-since do not apply to archives. With --backup the original archive is
+stored in the run's backup archive before it is replaced.
+"""
+
+from __future__ import annotations
+import copy
+import os
+import pathlib
+import struct
+import zipfile
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from backups import stash_file
+from walk import should_process
+
+R = TypeVar("R")
+
+LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+DATA_DESCRIPTOR_FLAG = 0x08
+ZIP64_EXTRA_ID = 0x0001
+COPY_CHUNK = 1 << 20
+
+def is_archive(path: pathlib.Path) -> bool:
+    return path.is_file() and zipfile.is_zipfile(path)
+
+class ZipMember:
+    """Stands in for the pathlib.Path of a Markdown file; collects the rewritten text."""
+
+    def __init__(self, path: pathlib.Path, info: zipfile.ZipInfo, data: bytes):
+        self.path = path
+        self.info = info
+        self.name = self.path.name
+        self.suffix = self.path.suffix
+        self._data = data
+        self.new_data: Optional[bytes] = None
+
+    def read_bytes(self) -> bytes:
+        return self._data
+
+    def write_text(self, text: str, encoding: str = 'utf-8') -> None:
+        self.new_data = text.encode(encoding)
+
+    def as_posix(self) -> str:
+        return self.path.as_posix()
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+def _strip_zip64(extra: bytes) -> bytes:
+    """extra without its ZIP64 record; ZipFile adds a fresh one when the sizes need it."""
+    out = []
+    i = 0
+    while i + 4 <= len(extra):
+        tag, size = struct.unpack('<HH', extra[i:i + 4])
+        if tag != ZIP64_EXTRA_ID:
+            out.append(extra[i:i + 4 + size])
+        i += 4 + size
+    return b''.join(out)
+
+def copy_raw(src: zipfile.ZipFile, dst: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+    """Append info's entry from src to dst without decompressing it."""
+    src.fp.seek(info.header_offset)
+    fields = LOCAL_HEADER.unpack(src.fp.read(LOCAL_HEADER.size))
+    if fields[0] != LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+    src.fp.seek(info.header_offset + LOCAL_HEADER.size + fields[10] + fields[11])
+
+    out = copy.copy(info)
+    out.flag_bits &= ~DATA_DESCRIPTOR_FLAG  # CRC and sizes go in the local header instead
+    out.extra = _strip_zip64(info.extra)
+    out.header_offset = dst.fp.tell()
+    dst.fp.write(out.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        chunk = src.fp.read(min(remaining, COPY_CHUNK))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated data for {info.filename}")
+        dst.fp.write(chunk)
+        remaining -= len(chunk)
+    dst.filelist.append(out)
+    dst.NameToInfo[out.filename] = out
+    dst.start_dir = dst.fp.tell()
+
+def _write_member(dst: zipfile.ZipFile, info: zipfile.ZipInfo, data: bytes) -> None:
+    out = zipfile.ZipInfo(info.filename, info.date_time)
+    out.compress_type = info.compress_type
+    out.external_attr = info.external_attr
+    out.create_system = info.create_system
+    out.comment = info.comment
+    out.extra = _strip_zip64(info.extra)
+    dst.writestr(out, data)
+
+def process_archive(
+    archive: pathlib.Path,
+    worker: Callable[[ZipMember], R],
+    exts: Iterable[str],
+    includes: List[str],
+    excludes: List[str],
+    write: bool,
+    backup: bool,
+) -> Iterator[R]:
+    """
+    Yield worker(member) for each matching member, in archive order. The new
+    archive is written once the last result has been consumed.
+    """
+    exts = {e.lower() for e in exts}
+    tmp = archive.with_name(f"{archive.name}.{os.getpid()}.tmp")
+    dst: Optional[zipfile.ZipFile] = None
+    try:
+        with zipfile.ZipFile(archive) as src:
+            infos = src.infolist()
+            for pos, info in enumerate(infos):
+                path = archive / info.filename
+                if info.is_dir() or path.suffix.lower() not in exts or not should_process(path, includes, excludes):
+                    if dst is not None:
+                        copy_raw(src, dst, info)
+                    continue
+                member = ZipMember(path, info, src.read(info))
+                result = worker(member)
+                yield result
+                if write and member.new_data is not None and dst is None:
+                    dst = zipfile.ZipFile(tmp, 'w')
+                    dst.comment = src.comment
+                    for earlier in infos[:pos]:
+                        copy_raw(src, dst, earlier)
+                if dst is not None:
+                    if member.new_data is not None:
+                        _write_member(dst, info, member.new_data)
+                    else:
+                        copy_raw(src, dst, info)
+        if dst is not None:
+            dst.close()
+            dst = None
+            if backup:
+                stash_file(archive)
+            os.replace(tmp, archive)
+    finally:
+        if dst is not None:
+            dst.close()
+        if tmp.exists():
+            tmp.unlink()